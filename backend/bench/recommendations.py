@@ -0,0 +1,102 @@
+"""Benchmark the in-memory recommendation scan on a synthetic catalog.
+
+No database needed. From the backend directory:
+
+    python -m bench.recommendations
+    python -m bench.recommendations --companions 10000,50000 --interests 500
+
+Fills the index with random companions (interest tags drawn from a
+skewed vocabulary, by default the seeder's, plus ratings and locations)
+and times recommend() for random callers. Reports the build time, the
+number of distinct interest combinations and p50/p95/p99 per call.
+"""
+import argparse
+import random
+import time
+from bench.run import percentile
+from bench.seed import INTERESTS
+from utils.recommendations import IndexEntry, RecommendationIndex
+
+STATES = 30
+DISTRICTS_PER_STATE = 20
+
+
+class SyntheticIndex(RecommendationIndex):
+    """A RecommendationIndex that loads random companions instead of querying"""
+
+    def __init__(self, companions, interests, tags, seed):
+        super().__init__(max_age=float('inf'))
+        self.companions = companions
+        self.interests = interests
+        self.tags = tags
+        self.seed = seed
+
+    def _load(self, companion_ids=None, interest_ids=()):
+        rng = random.Random(self.seed)
+        # Interest ids are sparse and large, like a real table after deletes
+        vocabulary = rng.sample(range(1, self.interests * 50), self.interests)
+        interest_ids = sorted(vocabulary)
+        positions = {interest_id: position for position, interest_id in enumerate(interest_ids)}
+        # A few popular interests, a long tail of rare ones
+        weights = [1 / (rank + 1) for rank in range(self.interests)]
+        entries = {}
+        for companion_id in range(1, self.companions + 1):
+            bits = 0
+            for interest_id in rng.choices(vocabulary, weights, k=rng.randint(1, self.tags)):
+                bits |= 1 << positions[interest_id]
+            state = rng.randrange(STATES)
+            entries[companion_id] = IndexEntry(
+                companion_id, bits, round(rng.uniform(3, 5), 1),
+                f'state{state}', f'district{state}-{rng.randrange(DISTRICTS_PER_STATE)}'
+            )
+        self.vocabulary, self.weights = vocabulary, weights
+        return entries, interest_ids
+
+
+def run(companions, interests, tags, callers, limit, seed):
+    index = SyntheticIndex(companions, interests, tags, seed)
+    started = time.perf_counter()
+    index.snapshot()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(seed + 1)
+    latencies = []
+    for _ in range(callers):
+        interest_ids = set(rng.choices(index.vocabulary, index.weights, k=rng.randint(1, tags)))
+        history_ids = set(rng.choices(index.vocabulary, index.weights, k=rng.randint(0, tags * 2)))
+        state = rng.randrange(STATES)
+        started = time.perf_counter()
+        index.recommend(interest_ids, history_ids, f'state{state}', f'district{state}-0', limit)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        'companions': companions,
+        'build_ms': round(build_ms, 1),
+        'distinct_bitsets': len({entry.bits for entry in index.entries().values()}),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--companions', default='1000,10000,50000', help='comma-separated catalog sizes')
+    parser.add_argument('--interests', type=int, default=len(INTERESTS), help='size of the interest vocabulary')
+    parser.add_argument('--tags', type=int, default=4, help='most interests per companion')
+    parser.add_argument('--callers', type=int, default=200, help='recommend() calls per catalog size')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'companions':>10} {'build ms':>9} {'bitsets':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for size in args.companions.split(','):
+        result = run(int(size), args.interests, args.tags, args.callers, args.limit, args.seed)
+        print(
+            f"{result['companions']:>10} {result['build_ms']:>9} {result['distinct_bitsets']:>8} "
+            f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8}"
+        )
+
+
+if __name__ == '__main__':
+    main()
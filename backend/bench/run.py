@@ -0,0 +1,276 @@
+"""Benchmark the key API endpoints and compare against a saved baseline.
+
+Seed a database first (python -m bench.seed), then from the backend
+directory:
+
+    python -m bench.run                               # in-process test client
+    python -m bench.run --url http://localhost:5000   # a running server
+    python -m bench.run --save bench/baseline.json
+    python -m bench.run --baseline bench/baseline.json --fail-on-regression
+
+Reports p50/p95/p99 latency and SQL statements per request for every
+scenario. Query counts come from the X-SQL-Query-Count header, so a
+server under test needs SQL_QUERY_COUNT=1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+# Measure the app, not the limiter or the expiry thread
+os.environ.setdefault('SESSION_SCHEDULER', 'off')
+os.environ.setdefault('CHAT_PUBSUB', 'local')
+os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+os.environ.setdefault('SQL_QUERY_COUNT', '1')
+
+from sqlalchemy import func
+from app import create_app
+from database import db
+from models import Booking, ChatMessage, Companion, User
+from utils.cache import response_cache
+from utils.query_counter import QUERY_COUNT_HEADER
+from bench.seed import ADMIN_EMAIL, BENCH_PASSWORD, USER_EMAIL
+
+# name -> (path template, who calls it)
+SCENARIOS = {
+    'companions.list': ('/api/companions', None),
+    'companions.list_filtered': ('/api/companions?state={state}&interests={interests}', None),
+    'companions.list_newest': ('/api/companions?sort=newest&limit=50', None),
+    'companions.list_fields': ('/api/companions?fields=name,rating&limit=100', None),
+    'companions.detail': ('/api/companions/{companion_id}', None),
+    'companions.slots': ('/api/companions/{companion_id}/slots', None),
+    'users.profile': ('/api/users/profile', 'user'),
+    'bookings.mine': ('/api/bookings', 'user'),
+    'bookings.all': ('/api/bookings/all', 'admin'),
+    'bookings.all_filtered': ('/api/bookings/all?status=pending,approved', 'admin'),
+    'chat.messages_latest': ('/api/chat/bookings/{booking_id}/messages', 'user'),
+    'chat.messages_after': ('/api/chat/bookings/{booking_id}/messages?after_id={after_id}', 'user'),
+    'chat.messages_before': ('/api/chat/bookings/{booking_id}/messages?before_id={before_id}', 'user'),
+    'chat.status': ('/api/chat/bookings/{booking_id}/status', 'user'),
+}
+
+
+class TestClientTransport:
+    """Drives the app in-process through Flask's test client"""
+
+    def __init__(self, app, cold_cache=False):
+        self.client = app.test_client()
+        self.cold_cache = cold_cache
+
+    def request(self, method, path, headers=None, body=None):
+        if self.cold_cache:
+            response_cache.clear()
+        started = time.perf_counter()
+        response = self.client.open(path, method=method, headers=headers, json=body)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        return response.status_code, elapsed, response.headers.get(QUERY_COUNT_HEADER), response.get_json(silent=True)
+
+
+class HttpTransport:
+    """Drives a running server over HTTP"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, headers=None, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=dict(headers or {}))
+        if data is not None:
+            req.add_header('Content-Type', 'application/json')
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req) as response:
+                payload = response.read()
+                status, response_headers = response.status, response.headers
+        except urllib.error.HTTPError as e:
+            payload, status, response_headers = e.read(), e.code, e.headers
+        elapsed = time.perf_counter() - started
+        try:
+            parsed = json.loads(payload)
+        except ValueError:
+            parsed = None
+        return status, elapsed, response_headers.get(QUERY_COUNT_HEADER), parsed
+
+
+def discover_fixtures():
+    """Pick ids and filter values from the seeded data (needs an app context)"""
+    bench_user = User.query.filter_by(email=USER_EMAIL).first()
+    if bench_user is None or not User.query.filter_by(email=ADMIN_EMAIL).first():
+        raise SystemExit('No benchmark accounts found; run `python -m bench.seed` first')
+
+    # The bench user's booking with the longest transcript
+    booking_id, message_count = (
+        db.session.query(ChatMessage.booking_id, func.count(ChatMessage.id))
+        .join(Booking, Booking.id == ChatMessage.booking_id)
+        .filter(Booking.user_id == bench_user.id)
+        .group_by(ChatMessage.booking_id)
+        .order_by(func.count(ChatMessage.id).desc())
+        .first()
+    ) or (None, 0)
+    if booking_id is None:
+        raise SystemExit('The bench user has no chat history; seed with more bookings and messages')
+    message_ids = [
+        row.id for row in db.session.query(ChatMessage.id)
+        .filter(ChatMessage.booking_id == booking_id)
+        .order_by(ChatMessage.id)
+    ]
+    companion = Companion.query.filter_by(availability=True).order_by(Companion.rating.desc()).first()
+    tags = bench_user.interests.split(',')[:2] if bench_user.interests else []
+
+    return {
+        'booking_id': booking_id,
+        'messages_in_booking': message_count,
+        'after_id': message_ids[len(message_ids) // 2],
+        'before_id': message_ids[-1],
+        'companion_id': companion.id,
+        'state': bench_user.state or '',
+        'interests': ','.join(tag.strip() for tag in tags),
+        'database': db.engine.url.get_backend_name(),
+        'dataset': {
+            'users': User.query.count(),
+            'companions': Companion.query.count(),
+            'bookings': Booking.query.count(),
+            'chat_messages': ChatMessage.query.count(),
+        },
+    }
+
+
+def login(transport, email):
+    status, _, _, payload = transport.request('POST', '/api/auth/login', body={'email': email, 'password': BENCH_PASSWORD})
+    if status != 200:
+        raise SystemExit(f'Login as {email} failed with {status}: {payload}')
+    return payload['token']
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def run_scenario(transport, path, headers, iterations, warmup):
+    for _ in range(warmup):
+        transport.request('GET', path, headers)
+
+    latencies, queries, errors = [], [], 0
+    for _ in range(iterations):
+        status, elapsed, query_count, _ = transport.request('GET', path, headers)
+        latencies.append(elapsed * 1000)
+        if status >= 400:
+            errors += 1
+        if query_count is not None:
+            queries.append(int(query_count))
+
+    latencies.sort()
+    return {
+        'requests': iterations,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print deltas against a baseline; return the names of regressed scenarios.
+
+    A scenario regresses when its p95 grows by more than tolerance
+    percent, or when it runs more SQL statements per request.
+    """
+    regressions = []
+    print(f"\n{'scenario':<28}{'p50':>16}{'p95':>16}{'p99':>16}{'queries':>14}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<28}{'(new)':>16}")
+            continue
+
+        cells = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            change = (current[key] - previous[key]) / previous[key] * 100 if previous[key] else 0.0
+            cells.append(f"{current[key]:.1f} ({change:+.0f}%)")
+        queries = f"{previous['queries_per_request']} -> {current['queries_per_request']}"
+        print(f"{name:<28}{cells[0]:>16}{cells[1]:>16}{cells[2]:>16}{queries:>14}")
+
+        p95_change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 if previous['p95_ms'] else 0.0
+        more_queries = (current['queries_per_request'] or 0) > (previous['queries_per_request'] or 0)
+        if p95_change > tolerance or more_queries:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='benchmark a running server instead of the in-process app')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--only', help='comma-separated scenario names or prefixes')
+    parser.add_argument('--cold-cache', action='store_true', help='clear the response cache before every request (in-process only)')
+    parser.add_argument('--save', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='compare against results saved earlier with --save')
+    parser.add_argument('--tolerance', type=float, default=20.0, help='allowed p95 growth in percent')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        fixtures = discover_fixtures()
+
+    transport = HttpTransport(args.url) if args.url else TestClientTransport(app, args.cold_cache)
+    tokens = {'user': login(transport, USER_EMAIL), 'admin': login(transport, ADMIN_EMAIL)}
+
+    selected = SCENARIOS
+    if args.only:
+        prefixes = [name.strip() for name in args.only.split(',') if name.strip()]
+        selected = {name: spec for name, spec in SCENARIOS.items() if any(name.startswith(p) for p in prefixes)}
+
+    print(f"Dataset: {fixtures['dataset']}; transcript of {fixtures['messages_in_booking']} messages")
+    print(f"{'scenario':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'queries':>10}{'errors':>8}")
+    results = {}
+    for name, (template, caller) in selected.items():
+        headers = {'Authorization': f'Bearer {tokens[caller]}'} if caller else {}
+        result = run_scenario(transport, template.format(**fixtures), headers, args.iterations, args.warmup)
+        results[name] = result
+        print(f"{name:<28}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+              f"{result['mean_ms']:>10.2f}{str(result['queries_per_request']):>10}{result['errors']:>8}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'meta': {
+                    'created_at': datetime.utcnow().isoformat(),
+                    'target': args.url or 'test-client',
+                    'database': fixtures['database'],
+                    'iterations': args.iterations,
+                    'cold_cache': args.cold_cache,
+                    'python': platform.python_version(),
+                    'dataset': fixtures['dataset'],
+                },
+                'results': results,
+            }, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.tolerance)
+        if regressions:
+            print(f"\nRegressed: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                sys.exit(1)
+        else:
+            print('\nNo regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
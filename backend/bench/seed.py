@@ -0,0 +1,301 @@
+"""Fill the database with a large synthetic dataset for benchmarking.
+
+Run from the backend directory against SQLite or a local Postgres:
+
+    DATABASE_URL=sqlite:///bench.db python -m bench.seed --reset
+    python -m bench.seed --scale 0.01       # 1k users, 10k bookings, ...
+
+Defaults are 100k users (20k of them companions), 1M bookings and 10M
+chat messages. Rows are inserted in batches through the models in
+models.py and the output is deterministic for a given --seed. Every
+seeded account has the password BENCH_PASSWORD; bench.run signs in as
+bench-admin@example.com and bench-user@example.com.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+# One-off job: no background session scheduler or chat event listener
+os.environ.setdefault('SESSION_SCHEDULER', 'off')
+os.environ.setdefault('CHAT_PUBSUB', 'local')
+
+from sqlalchemy import func, insert, text
+from app import create_app
+from database import db
+from models import (Booking, ChatMessage, Companion, Interest, Review, User, user_interests,
+                    SESSION_MINUTES, SESSION_PRICE)
+from utils.password_handler import hash_password
+from utils.search import create_search_schema, drop_search_schema, reindex_companions
+from utils.facets import rebuild_location_facets
+from utils.ratings import reconcile_ratings
+
+BENCH_PASSWORD = 'bench-password'
+ADMIN_EMAIL = 'bench-admin@example.com'
+USER_EMAIL = 'bench-user@example.com'
+
+DEFAULTS = {'users': 100000, 'companions': 20000, 'bookings': 1000000, 'messages': 10000000}
+
+LOCATIONS = {
+    'Maharashtra': ['Mumbai', 'Pune', 'Nagpur', 'Nashik'],
+    'Karnataka': ['Bengaluru Urban', 'Mysuru', 'Mangaluru'],
+    'Tamil Nadu': ['Chennai', 'Coimbatore', 'Madurai'],
+    'Delhi': ['New Delhi', 'South Delhi', 'North Delhi'],
+    'West Bengal': ['Kolkata', 'Howrah', 'Darjeeling'],
+    'Telangana': ['Hyderabad', 'Warangal'],
+    'Gujarat': ['Ahmedabad', 'Surat', 'Vadodara'],
+    'Rajasthan': ['Jaipur', 'Udaipur', 'Jodhpur'],
+    'Kerala': ['Ernakulam', 'Thiruvananthapuram', 'Kozhikode'],
+    'Uttar Pradesh': ['Lucknow', 'Kanpur Nagar', 'Varanasi'],
+}
+INTERESTS = [
+    'music', 'movies', 'travel', 'cooking', 'reading', 'fitness', 'yoga', 'cricket',
+    'football', 'photography', 'art', 'dancing', 'gaming', 'hiking', 'poetry', 'coffee',
+    'technology', 'fashion', 'meditation', 'history', 'languages', 'startups', 'pets',
+    'gardening', 'anime', 'theatre', 'cycling', 'chess', 'podcasts', 'food',
+]
+FIRST_NAMES = ['Aarav', 'Diya', 'Vihaan', 'Ananya', 'Arjun', 'Isha', 'Kabir', 'Meera',
+               'Rohan', 'Saanvi', 'Aditya', 'Kavya', 'Dev', 'Nisha', 'Rahul', 'Priya']
+LAST_NAMES = ['Sharma', 'Iyer', 'Patel', 'Reddy', 'Khan', 'Singh', 'Das', 'Nair',
+              'Gupta', 'Menon', 'Joshi', 'Bose']
+WORDS = ('hi hello how are you doing today that sounds great tell me more about it '
+         'i love this really nice thanks see you soon what do you think yes no maybe').split()
+
+# Bookings of one companion are spread this far apart, so they never overlap
+BOOKING_SPACING = timedelta(hours=6)
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(model_or_table, rows, batch_size, label, total):
+    started = time.perf_counter()
+    done = 0
+    for batch in _batches(rows, batch_size):
+        db.session.execute(insert(model_or_table), batch)
+        db.session.commit()
+        done += len(batch)
+        if done % (batch_size * 20) < batch_size or done == total:
+            rate = done / max(time.perf_counter() - started, 1e-9)
+            print(f"  {label}: {done}/{total} ({rate:,.0f} rows/s)")
+    return done
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def seed(users, companions, bookings, messages, batch_size=5000, seed_value=42):
+    """Insert the dataset; returns the number of rows per table"""
+    rng = random.Random(seed_value)
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    password = hash_password(BENCH_PASSWORD)
+    states = list(LOCATIONS)
+
+    # Interest tags
+    existing = {tag.name for tag in Interest.query.all()}
+    missing = [name for name in INTERESTS if name not in existing]
+    if missing:
+        db.session.execute(insert(Interest), [{'name': name} for name in missing])
+        db.session.commit()
+    interest_ids = dict(db.session.query(Interest.name, Interest.id).filter(Interest.name.in_(INTERESTS)).all())
+
+    # Users: companions first, then regular users, then the two bench accounts
+    first_user = _next_id(User)
+    user_tags = {}
+
+    def user_rows():
+        for i in range(users):
+            user_id = first_user + i
+            state = rng.choice(states)
+            tags = rng.sample(INTERESTS, rng.randint(1, 4))
+            user_tags[user_id] = tags
+            if i == users - 2:
+                email, role = ADMIN_EMAIL, 'admin'
+            elif i == users - 1:
+                email, role = USER_EMAIL, 'user'
+            else:
+                email, role = f'bench{user_id}@example.com', 'companion' if i < companions else 'user'
+            yield {
+                'id': user_id,
+                'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                'email': email,
+                'password': password,
+                'role': role,
+                'state': state,
+                'district': rng.choice(LOCATIONS[state]),
+                'age': rng.randint(18, 60),
+                'interests': ', '.join(tags),
+                'created_at': now - timedelta(days=rng.randint(0, 720)),
+            }
+
+    print(f"Seeding {users} users")
+    _insert(User, user_rows(), batch_size, 'users', users)
+
+    def tag_rows():
+        for user_id, tags in user_tags.items():
+            for name in tags:
+                yield {'user_id': user_id, 'interest_id': interest_ids[name]}
+
+    tag_total = sum(len(tags) for tags in user_tags.values())
+    _insert(user_interests, tag_rows(), batch_size, 'interest tags', tag_total)
+
+    # Companion profiles for the first `companions` users
+    first_companion = _next_id(Companion)
+
+    def companion_rows():
+        for i in range(companions):
+            yield {
+                'id': first_companion + i,
+                'user_id': first_user + i,
+                'bio': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))),
+                'price_per_hour': SESSION_PRICE,
+                'image_url': None,
+                'availability': rng.random() < 0.9,
+                'created_at': now - timedelta(days=rng.randint(0, 365)),
+            }
+
+    print(f"Seeding {companions} companions")
+    _insert(Companion, companion_rows(), batch_size, 'companions', companions)
+
+    # Bookings: round-robin over companions with each companion's slots
+    # spaced apart, two thirds of them in the past
+    first_booking = _next_id(Booking)
+    bench_user = first_user + users - 1
+    regular_users = list(range(first_user + companions, first_user + users - 2)) + [bench_user]
+    per_companion = max(1, -(-bookings // max(companions, 1)))
+    start = now - BOOKING_SPACING * (per_companion * 2 // 3)
+    chat_bookings = []
+    completed_bookings = []
+
+    def booking_rows():
+        for k in range(bookings):
+            booking_id = first_booking + k
+            slot, companion_index = divmod(k, companions)
+            date = start + BOOKING_SPACING * slot + timedelta(minutes=SESSION_MINUTES * rng.randint(0, 20))
+            if date + timedelta(minutes=SESSION_MINUTES) <= now:
+                status = rng.choices(['completed', 'rejected'], weights=[85, 15])[0]
+            else:
+                status = rng.choices(['pending', 'approved', 'rejected'], weights=[50, 40, 10])[0]
+            # Give the bench account a realistic share of history to list
+            user_id = bench_user if k % 500 == 0 else rng.choice(regular_users)
+            if status in ('approved', 'completed'):
+                chat_bookings.append((booking_id, user_id, first_user + companion_index, date))
+            if status == 'completed':
+                completed_bookings.append((booking_id, user_id, first_companion + companion_index, date))
+            yield {
+                'id': booking_id,
+                'user_id': user_id,
+                'companion_id': first_companion + companion_index,
+                'date': date,
+                'duration': SESSION_MINUTES,
+                'price': SESSION_PRICE,
+                'status': status,
+                'chat_enabled': status == 'approved',
+                'ends_at': date + timedelta(minutes=SESSION_MINUTES),
+                'created_at': date - timedelta(days=rng.randint(1, 14)),
+            }
+
+    print(f"Seeding {bookings} bookings")
+    _insert(Booking, booking_rows(), batch_size, 'bookings', bookings)
+
+    # Chat messages, spread over the bookings that had a session
+    def message_rows():
+        if not chat_bookings:
+            return
+        per_booking, extra = divmod(messages, len(chat_bookings))
+        for index, (booking_id, user_id, companion_user_id, date) in enumerate(chat_bookings):
+            count = per_booking + (1 if index < extra else 0)
+            for n in range(count):
+                yield {
+                    'booking_id': booking_id,
+                    'sender_id': user_id if n % 2 == 0 else companion_user_id,
+                    'message': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 15))),
+                    'created_at': date + timedelta(seconds=n * SESSION_MINUTES * 60 // max(count, 1)),
+                }
+
+    print(f"Seeding {messages} chat messages")
+    message_total = _insert(ChatMessage, message_rows(), batch_size, 'messages', messages if chat_bookings else 0)
+
+    # Reviews for about 40% of completed sessions, skewed towards good
+    # ratings; a separate generator keeps the other tables unchanged
+    review_rng = random.Random(seed_value + 1)
+
+    def review_rows():
+        for booking_id, user_id, companion_id, date in completed_bookings:
+            if review_rng.random() < 0.4:
+                yield {
+                    'booking_id': booking_id,
+                    'companion_id': companion_id,
+                    'user_id': user_id,
+                    'rating': review_rng.choices([1, 2, 3, 4, 5], weights=[3, 5, 15, 37, 40])[0],
+                    'comment': ' '.join(review_rng.choice(WORDS) for _ in range(review_rng.randint(0, 20))) or None,
+                    'created_at': date + timedelta(minutes=SESSION_MINUTES + review_rng.randint(1, 600)),
+                }
+
+    reviews = list(review_rows())
+    print(f"Seeding {len(reviews)} reviews")
+    review_total = _insert(Review, reviews, batch_size, 'reviews', len(reviews))
+    reconcile_ratings(batch_size)
+
+    # Explicit ids leave Postgres sequences behind
+    if db.engine.dialect.name == 'postgresql':
+        for table in ('users', 'companions', 'bookings'):
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+            ))
+        db.session.commit()
+
+    print("Building the companion search index and location facets")
+    with db.engine.begin() as connection:
+        create_search_schema(connection)
+        reindex_companions(connection)
+        rebuild_location_facets(connection)
+
+    return {'users': users, 'user_interests': tag_total, 'companions': companions,
+            'bookings': bookings, 'reviews': review_total, 'chat_messages': message_total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f'--{name}', type=int, default=None, help=f'default {default:,}')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every default count')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='drop and recreate every table first')
+    args = parser.parse_args()
+
+    counts = {
+        name: getattr(args, name) if getattr(args, name) is not None else max(1, int(default * args.scale))
+        for name, default in DEFAULTS.items()
+    }
+    if counts['users'] < counts['companions'] + 3:
+        parser.error('--users must exceed --companions by at least 3')
+
+    app = create_app()
+    with app.app_context():
+        if args.reset:
+            with db.engine.begin() as connection:
+                drop_search_schema(connection)
+            db.drop_all()
+            db.create_all()
+        if User.query.filter(User.email.in_([ADMIN_EMAIL, USER_EMAIL])).first():
+            parser.error('This database is already seeded; pass --reset to start over')
+
+        started = time.perf_counter()
+        totals = seed(batch_size=args.batch_size, seed_value=args.seed, **counts)
+        print(f"Seeded {totals} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
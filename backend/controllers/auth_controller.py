@@ -1,12 +1,22 @@
 from flask import Blueprint, request, jsonify
 from database import db
 from models import User
-from utils.password_handler import hash_password, verify_password
+from utils.password_handler import hash_password, verify_password, needs_rehash, PasswordHasherBusy
 from utils.jwt_handler import generate_token
+from utils.interests import set_user_interests
+from utils.rate_limit import rate_limited
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
+
+def _busy_response(error):
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
 @auth_bp.route('/signup', methods=['POST'])
+@rate_limited('signup')
 def signup():
     """Register a new user"""
     try:
@@ -27,7 +37,10 @@ def signup():
             return jsonify({'error': 'Invalid role'}), 400
         
         # Hash password
-        hashed_password = hash_password(data['password'])
+        try:
+            hashed_password = hash_password(data['password'])
+        except PasswordHasherBusy as e:
+            return _busy_response(e)
         
         # Create new user
         new_user = User(
@@ -37,9 +50,9 @@ def signup():
             role=data['role'],
             state=data.get('state'),
             district=data.get('district'),
-            age=data.get('age'),
-            interests=data.get('interests', '')
+            age=data.get('age')
         )
+        set_user_interests(new_user, data.get('interests', ''))
         
         db.session.add(new_user)
         db.session.commit()
@@ -59,6 +72,7 @@ def signup():
 
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limited('login')
 def login():
     """User login"""
     try:
@@ -75,11 +89,23 @@ def login():
             return jsonify({'error': 'Invalid email or password'}), 401
         
         # Verify password
-        if not verify_password(data['password'], user.password):
-            return jsonify({'error': 'Invalid email or password'}), 401
+        try:
+            if not verify_password(data['password'], user.password):
+                return jsonify({'error': 'Invalid email or password'}), 401
+        except PasswordHasherBusy as e:
+            return _busy_response(e)
+        
+        # Upgrade the stored hash if the configured cost has changed
+        if needs_rehash(user.password):
+            try:
+                user.password = hash_password(data['password'])
+                db.session.commit()
+            except PasswordHasherBusy:
+                pass  # Try again on a later login
         
         # Generate token
-        token = generate_token(user.id, user.role)
+        companion_id = user.companion_profile.id if user.role == 'companion' and user.companion_profile else None
+        token = generate_token(user.id, user.role, companion_id)
         
         return jsonify({
             'message': 'Login successful',
@@ -88,4 +114,5 @@ def login():
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,85 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+from werkzeug.exceptions import HTTPException
+from urllib.parse import urlsplit
+
+batch_bp = Blueprint('batch', __name__, url_prefix='/api/batch')
+
+# Sub-requests accepted in one batch call
+MAX_BATCH_REQUESTS = 20
+# Endpoints whose responses stream; they are refused before their view runs,
+# since the stream would subscribe or open a cursor nobody reads
+STREAMING_ENDPOINTS = frozenset({'chat.stream_messages', 'booking.export_bookings'})
+
+
+def _run(path):
+    """Dispatch one GET sub-request and return (status, JSON body).
+
+    The sub-request runs inside the batch call's app context, so it shares
+    its database session and its resolved principal. Only the view runs:
+    before/after_request hooks are skipped, so metrics record the batch as
+    one request and its sub-requests' SQL counts toward the batch call's
+    X-SQL-Query-Count.
+    """
+    app = current_app._get_current_object()
+    headers = {'Authorization': request.headers.get('Authorization', '')}
+    with app.test_request_context(path, method='GET', headers=headers,
+                                  environ_base={'REMOTE_ADDR': request.remote_addr}):
+        # Pushing the context matched the URL, so the endpoint is known before anything runs
+        if request.endpoint in STREAMING_ENDPOINTS:
+            return 400, {'error': 'Streaming endpoints cannot be batched'}
+        try:
+            response = app.make_response(app.dispatch_request())
+        except HTTPException as e:
+            response = app.make_response(app.handle_user_exception(e))
+        except Exception as e:
+            return 500, {'error': str(e)}
+        if response.is_streamed:
+            # A streaming endpoint missing from STREAMING_ENDPOINTS
+            response.close()
+            return 400, {'error': 'Streaming endpoints cannot be batched'}
+        return response.status_code, response.get_json(silent=True)
+
+
+@batch_bp.route('', methods=['POST'])
+@jwt_required()
+def run_batch():
+    """Run several GET requests to the API in one call.
+
+    Body: {"requests": [{"id": "...", "path": "/api/..."}]} with up to
+    MAX_BATCH_REQUESTS entries. Each runs with the caller's token and gets
+    {"id", "status", "body"} in the response, in request order; one failing
+    doesn't fail the others.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        entries = data.get('requests')
+
+        if not isinstance(entries, list) or not entries:
+            return jsonify({'error': 'requests must be a non-empty list'}), 400
+        if len(entries) > MAX_BATCH_REQUESTS:
+            return jsonify({'error': f'At most {MAX_BATCH_REQUESTS} requests per batch'}), 400
+
+        responses = []
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                return jsonify({'error': f'requests[{index}] must be an object'}), 400
+            path = entry.get('path')
+            method = (entry.get('method') or 'GET').upper()
+            result = {'id': entry.get('id', index)}
+
+            if not isinstance(path, str) or not path.startswith('/api/'):
+                result.update(status=400, body={'error': 'path must start with /api/'})
+            elif method != 'GET':
+                result.update(status=405, body={'error': 'Only GET requests can be batched'})
+            elif urlsplit(path).path.rstrip('/') == batch_bp.url_prefix:
+                result.update(status=400, body={'error': 'Batches cannot be nested'})
+            else:
+                status, body = _run(path)
+                result.update(status=status, body=body)
+            responses.append(result)
+
+        return jsonify({'responses': responses}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,44 +1,108 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt
 from database import db
-from models import Booking, Companion
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from models import Booking, Companion, SESSION_MINUTES, SESSION_PRICE
 from utils.jwt_handler import get_current_user_id
-from datetime import datetime
+from utils.principal import current_principal
+from utils.chat_hub import chat_hub
+from utils.session_scheduler import session_scheduler
+from utils.pagination import parse_limit, encode_cursor, decode_cursor
+from utils.fields import parse_fields, load_fields
+from utils.time_utils import parse_utc_datetime, on_slot_grid
+from utils.ratings import add_review, remove_booking_review
+from utils.cache import invalidate_companion
+from utils.recommendations import recommendation_index
+from datetime import datetime, timedelta
+import csv
+import io
+import json
 
 booking_bp = Blueprint('booking', __name__, url_prefix='/api/bookings')
 
+def _bookings_query(fields):
+    """Booking query loading everything to_dict(fields) reads and nothing else"""
+    if fields is None:
+        return Booking.with_relations()
+    return Booking.query.options(*load_fields(Booking, fields))
+
+
 @booking_bp.route('', methods=['GET'])
 @jwt_required()
 def get_bookings():
-    """Get current user's bookings"""
+    """Get current user's bookings (?fields= limits the returned fields)"""
     try:
-        user_id = get_current_user_id()
-        claims = get_jwt()
-        role = claims.get('role')
+        principal = current_principal()
+        
+        try:
+            fields = parse_fields(request.args, Booking)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = _bookings_query(fields)
         
         # If companion, get bookings where they are the companion
-        if role == 'companion':
-            companion = Companion.query.filter_by(user_id=user_id).first()
-            if companion:
-                bookings = Booking.query.filter_by(companion_id=companion.id).all()
+        if principal.role == 'companion':
+            if principal.companion_id is not None:
+                bookings = query.filter_by(companion_id=principal.companion_id).all()
             else:
                 bookings = []
         else:
             # If user, get their bookings
-            bookings = Booking.query.filter_by(user_id=user_id).all()
+            bookings = query.filter_by(user_id=principal.user_id).all()
         
         return jsonify({
-            'bookings': [booking.to_dict() for booking in bookings]
+            'bookings': [booking.to_dict(fields) for booking in bookings]
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+BOOKING_STATUSES = ('pending', 'approved', 'rejected', 'completed')
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_BATCH_SIZE = 500
+EXPORT_COLUMNS = ['id', 'user_id', 'user_name', 'companion_id', 'companion_name', 'date',
+                  'duration', 'ends_at', 'price', 'status', 'chat_enabled', 'created_at']
+
+
+def _parse_datetime_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return parse_utc_datetime(value)
+    except ValueError:
+        raise ValueError(f'Invalid {name}. Use ISO format')
+
+
+def _filter_admin_bookings(query):
+    """Apply ?status= (comma-separated), ?date_from= (inclusive) and ?date_to= (exclusive)"""
+    statuses = [s.strip() for s in request.args.get('status', '').split(',') if s.strip()]
+    for status in statuses:
+        if status not in BOOKING_STATUSES:
+            raise ValueError(f'Invalid status: {status}')
+    date_from = _parse_datetime_arg('date_from')
+    date_to = _parse_datetime_arg('date_to')
+    
+    if statuses:
+        query = query.filter(Booking.status.in_(statuses))
+    if date_from:
+        query = query.filter(Booking.date >= date_from)
+    if date_to:
+        query = query.filter(Booking.date < date_to)
+    return query
+
+
 @booking_bp.route('/all', methods=['GET'])
 @jwt_required()
 def get_all_bookings():
-    """Get all bookings (admin only)"""
+    """Get a page of all bookings, newest first (admin only).
+
+    Filters: status, date_from, date_to. Pass the returned next_cursor
+    back as ?cursor= to get the following page. ?fields= limits the
+    returned fields.
+    """
     try:
         claims = get_jwt()
         
@@ -46,16 +110,100 @@ def get_all_bookings():
         if claims.get('role') != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
         
-        bookings = Booking.query.all()
+        try:
+            limit = parse_limit(request.args)
+            fields = parse_fields(request.args, Booking)
+            query = _filter_admin_bookings(_bookings_query(fields))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                (cursor_id,) = decode_cursor(cursor)
+                cursor_id = int(cursor_id)
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(Booking.id < cursor_id)
+        
+        # Fetch one extra row to learn whether another page exists
+        bookings = query.order_by(Booking.id.desc()).limit(limit + 1).all()
+        has_more = len(bookings) > limit
+        bookings = bookings[:limit]
         
         return jsonify({
-            'bookings': [booking.to_dict() for booking in bookings]
+            'bookings': [booking.to_dict(fields) for booking in bookings],
+            'next_cursor': encode_cursor([bookings[-1].id]) if has_more else None,
+            'has_more': has_more
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@booking_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_bookings():
+    """Stream all matching bookings as NDJSON or CSV (admin only).
+
+    Rows are read through a server-side cursor in batches, so memory use
+    stays flat however large the table is. Accepts the same filters as
+    /all plus ?format=ndjson|csv.
+    """
+    try:
+        claims = get_jwt()
+        
+        # Check if user is admin
+        if claims.get('role') != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        
+        try:
+            query = _filter_admin_bookings(Booking.with_relations())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # A plain 2.0-style statement: the legacy Query uniquifies joined
+        # rows, which rules out yield_per
+        statement = query.order_by(Booking.id).statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        
+        def rows():
+            return db.session.execute(statement).scalars()
+        
+        def generate_ndjson():
+            for booking in rows():
+                yield json.dumps(booking.to_dict()) + '\n'
+        
+        def generate_csv():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            for index, booking in enumerate(rows(), start=1):
+                writer.writerow(booking.to_dict())
+                # Flush the buffer once per batch instead of once per row
+                if index % EXPORT_BATCH_SIZE == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        
+        if export_format == 'csv':
+            generator, mimetype = generate_csv(), 'text/csv'
+        else:
+            generator, mimetype = generate_ndjson(), 'application/x-ndjson'
+        
+        filename = f"bookings-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}"
+        return Response(stream_with_context(generator), mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @booking_bp.route('', methods=['POST'])
 @jwt_required()
 def create_booking():
@@ -70,28 +218,43 @@ def create_booking():
             if field not in data:
                 return jsonify({'error': f'{field} is required'}), 400
         
-        # Check if companion exists
-        companion = Companion.query.get(data['companion_id'])
+        # Parse date
+        try:
+            booking_date = parse_utc_datetime(data['date'])
+        except (ValueError, AttributeError):
+            return jsonify({'error': 'Invalid date format. Use ISO format'}), 400
+        # Only times /companions/<id>/slots could offer: on the grid and not yet started
+        slot = timedelta(minutes=SESSION_MINUTES)
+        if not on_slot_grid(booking_date, slot):
+            return jsonify({'error': f'date must start a {SESSION_MINUTES}-minute slot (e.g. 10:00, 10:15)'}), 400
+        if booking_date < datetime.utcnow():
+            return jsonify({'error': 'date must be in the future'}), 400
+        booking_end = booking_date + slot
+        
+        # Lock the companion row so concurrent requests for the same
+        # companion check and insert one at a time (no-op on SQLite, which
+        # serializes writers anyway)
+        companion = Companion.query.filter_by(id=data['companion_id']).with_for_update().first()
         if not companion:
             return jsonify({'error': 'Companion not found'}), 404
         
         # Check if companion is available
         if not companion.availability:
+            db.session.rollback()
             return jsonify({'error': 'Companion is not available'}), 400
         
-        # Parse date
-        try:
-            booking_date = datetime.fromisoformat(data['date'].replace('Z', '+00:00'))
-        except:
-            return jsonify({'error': 'Invalid date format. Use ISO format'}), 400
+        # Reject overlaps with pending or approved sessions
+        if Booking.active_between(companion.id, booking_date, booking_end).first():
+            db.session.rollback()
+            return jsonify({'error': 'This time slot is already booked'}), 409
         
         # Create booking with fixed duration (15 min) and price (₹299)
         new_booking = Booking(
             user_id=user_id,
-            companion_id=data['companion_id'],
+            companion_id=companion.id,
             date=booking_date,
-            duration=15,  # Fixed 15 minutes
-            price=299,    # Fixed ₹299
+            duration=SESSION_MINUTES,
+            price=SESSION_PRICE,
             status='pending'
         )
         
@@ -108,6 +271,15 @@ def create_booking():
         return jsonify({'error': str(e)}), 500
 
 
+# Moderation, single or batch: action -> (statuses it applies to, new status).
+# Only pending bookings still hold their slot (create_booking checked it under
+# the companion lock); a rejected one may have been rebooked since
+MODERATION_ACTIONS = {
+    'approve': (('pending',), 'approved'),
+    'reject': (('pending', 'approved'), 'rejected'),
+}
+
+
 @booking_bp.route('/<int:booking_id>/approve', methods=['PUT'])
 @jwt_required()
 def approve_booking(booking_id):
@@ -119,14 +291,25 @@ def approve_booking(booking_id):
         if claims.get('role') != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
         
-        booking = Booking.query.get(booking_id)
+        # Lock the row so a concurrent reject or approve can't interleave
+        booking = Booking.query.filter_by(id=booking_id).with_for_update().first()
         
         if not booking:
             return jsonify({'error': 'Booking not found'}), 404
         
-        booking.status = 'approved'
+        from_statuses, new_status = MODERATION_ACTIONS['approve']
+        if booking.status not in from_statuses:
+            db.session.rollback()
+            return jsonify({'error': f'Only pending bookings can be approved (booking is {booking.status})'}), 409
+        
+        booking.status = new_status
         booking.chat_enabled = True  # Enable chat when approved
         db.session.commit()
+
+        # Complete the booking and close chat as soon as the session ends. This
+        # only arms a timer when the scheduler runs in this process; otherwise
+        # the scheduler's periodic sweep (SESSION_SWEEP_SECONDS) completes it
+        session_scheduler.schedule(booking.id, booking.ends_at)
         
         return jsonify({
             'message': 'Booking approved successfully - Chat enabled',
@@ -149,14 +332,23 @@ def reject_booking(booking_id):
         if claims.get('role') != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
         
-        booking = Booking.query.get(booking_id)
+        # Lock the row so a concurrent reject or approve can't interleave
+        booking = Booking.query.filter_by(id=booking_id).with_for_update().first()
         
         if not booking:
             return jsonify({'error': 'Booking not found'}), 404
         
-        booking.status = 'rejected'
+        from_statuses, new_status = MODERATION_ACTIONS['reject']
+        if booking.status not in from_statuses:
+            db.session.rollback()
+            return jsonify({'error': f'Only pending or approved bookings can be rejected (booking is {booking.status})'}), 409
+        
+        booking.status = new_status
         db.session.commit()
         
+        # Close any open chat streams for this booking
+        chat_hub.publish(booking_id, 'session_end', {'chat_enabled': False, 'time_remaining': 0})
+        
         return jsonify({
             'message': 'Booking rejected successfully',
             'booking': booking.to_dict()
@@ -167,6 +359,87 @@ def reject_booking(booking_id):
         return jsonify({'error': str(e)}), 500
 
 
+BATCH_MAX_IDS = 500
+
+
+@booking_bp.route('/batch', methods=['PUT'])
+@jwt_required()
+def batch_moderate_bookings():
+    """Approve or reject many bookings in one transaction (admin only).
+
+    Body: {"action": "approve" | "reject", "ids": [...]}. A single UPDATE
+    moves every eligible booking; the response lists the outcome for each
+    ID: the new status, 'not_found', or 'skipped' with its current status.
+    """
+    try:
+        claims = get_jwt()
+        
+        # Check if user is admin
+        if claims.get('role') != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        data = request.get_json() or {}
+        action = data.get('action')
+        if action not in MODERATION_ACTIONS:
+            return jsonify({'error': f"action must be one of: {', '.join(MODERATION_ACTIONS)}"}), 400
+        
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return jsonify({'error': 'ids must be a non-empty list'}), 400
+        if len(ids) > BATCH_MAX_IDS:
+            return jsonify({'error': f'At most {BATCH_MAX_IDS} ids per request'}), 400
+        if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify({'error': 'ids must be integers'}), 400
+        ids = list(dict.fromkeys(ids))
+        
+        from_statuses, new_status = MODERATION_ACTIONS[action]
+        values = {'status': new_status}
+        if action == 'approve':
+            values['chat_enabled'] = True
+        
+        changed = db.session.execute(
+            update(Booking)
+            .where(Booking.id.in_(ids), Booking.status.in_(from_statuses))
+            .values(**values)
+            .returning(Booking.id, Booking.ends_at)
+            .execution_options(synchronize_session=False)
+        ).all()
+        changed_ids = {row.id for row in changed}
+        
+        # Explain the rest with one lookup
+        remaining = [i for i in ids if i not in changed_ids]
+        current = {}
+        if remaining:
+            current = dict(db.session.query(Booking.id, Booking.status).filter(Booking.id.in_(remaining)).all())
+        db.session.commit()
+        
+        for row in changed:
+            if action == 'approve':
+                # As in approve_booking, other processes rely on the sweep
+                session_scheduler.schedule(row.id, row.ends_at)
+            else:
+                chat_hub.publish(row.id, 'session_end', {'chat_enabled': False, 'time_remaining': 0})
+        
+        results = []
+        for booking_id in ids:
+            if booking_id in changed_ids:
+                results.append({'id': booking_id, 'result': new_status})
+            elif booking_id in current:
+                results.append({'id': booking_id, 'result': 'skipped', 'status': current[booking_id]})
+            else:
+                results.append({'id': booking_id, 'result': 'not_found'})
+        
+        return jsonify({
+            'action': action,
+            'updated': len(changed_ids),
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @booking_bp.route('/<int:booking_id>', methods=['DELETE'])
 @jwt_required()
 def delete_booking(booking_id):
@@ -183,11 +456,72 @@ def delete_booking(booking_id):
         if booking.user_id != user_id and claims.get('role') != 'admin':
             return jsonify({'error': 'Unauthorized to delete this booking'}), 403
         
+        # Only completed bookings carry reviews
+        companion_id = booking.companion_id
+        reviewed = booking.status == 'completed' and remove_booking_review(booking_id) is not None
         db.session.delete(booking)
         db.session.commit()
         
+        chat_hub.publish(booking_id, 'session_end', {'chat_enabled': False, 'time_remaining': 0})
+        if reviewed:
+            invalidate_companion(companion_id, listing_changed=True)
+            recommendation_index.invalidate(companion_id)
+        
         return jsonify({'message': 'Booking deleted successfully'}), 200
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+REVIEW_COMMENT_MAX_LENGTH = 2000
+
+
+@booking_bp.route('/<int:booking_id>/review', methods=['POST'])
+@jwt_required()
+def review_booking(booking_id):
+    """Review a completed booking (the booking's user only, once).
+
+    Body: {"rating": 1-5, "comment": "..."}. The companion's rating
+    aggregates are updated in the same transaction as the review.
+    """
+    try:
+        principal = current_principal()
+        booking = Booking.query.get(booking_id)
+        
+        if not booking:
+            return jsonify({'error': 'Booking not found'}), 404
+        
+        if booking.user_id != principal.user_id:
+            return jsonify({'error': 'Only the user who booked can review it'}), 403
+        
+        if booking.status != 'completed':
+            return jsonify({'error': 'Only completed bookings can be reviewed'}), 400
+        
+        data = request.get_json() or {}
+        rating = data.get('rating')
+        if isinstance(rating, bool) or not isinstance(rating, int) or not 1 <= rating <= 5:
+            return jsonify({'error': 'rating must be an integer from 1 to 5'}), 400
+        comment = data.get('comment')
+        if comment is not None and (not isinstance(comment, str) or len(comment) > REVIEW_COMMENT_MAX_LENGTH):
+            return jsonify({'error': f'comment must be a string of at most {REVIEW_COMMENT_MAX_LENGTH} characters'}), 400
+        
+        try:
+            review = add_review(booking, rating, comment.strip() if comment else None)
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': 'This booking has already been reviewed'}), 409
+        db.session.commit()
+        
+        # The new average can move the companion within rating-sorted pages
+        invalidate_companion(booking.companion_id, listing_changed=True)
+        recommendation_index.invalidate(booking.companion_id)
+        
+        return jsonify({
+            'message': 'Review added successfully',
+            'review': review.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -1,9 +1,22 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt
+from flask import Blueprint, current_app, g, request, jsonify, Response
+from flask_jwt_extended import jwt_required, get_jwt, verify_jwt_in_request
 from database import db
 from models import ChatMessage, Booking, User
-from utils.jwt_handler import get_current_user_id
+from utils.principal import Principal, current_principal
+from utils.jwt_handler import generate_stream_token, load_stream_token
+from utils.chat_hub import chat_hub, format_sse, ChatHubFull
+from utils.pagination import parse_limit, parse_id_cursor
+from utils.fields import parse_fields, load_fields
+from utils.rate_limit import rate_limited
+from utils.chat_archive import transcript
 from functools import wraps
+from datetime import datetime
+import queue
+
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT_SECONDS = 15
+# Retry-After for streams refused at the per-process cap
+STREAM_RETRY_AFTER_SECONDS = 30
 
 chat_bp = Blueprint('chat', __name__, url_prefix='/api/chat')
 
@@ -18,30 +31,78 @@ def jwt_optional(fn):
 @chat_bp.route('/bookings/<int:booking_id>/messages', methods=['GET'])
 @jwt_required()
 def get_messages(booking_id):
-    """Get all messages for a booking"""
+    """Get a page of messages for a booking.
+
+    ?after_id= returns messages newer than the cursor (oldest first), for
+    incremental sync. ?before_id= returns the page just older than the
+    cursor, for loading long transcripts backwards. Without a cursor the
+    most recent page is returned. has_more tells whether another page
+    exists in the requested direction. ?fields= limits the message fields.
+    Archived transcripts page the same way.
+    """
     try:
-        user_id = get_current_user_id()
-        booking = Booking.query.get(booking_id)
+        principal = current_principal()
+        booking = Booking.with_relations().filter_by(id=booking_id).first()
         
         if not booking:
             return jsonify({'error': 'Booking not found'}), 404
         
         # Check if user is part of the booking
-        if booking.user_id != user_id and booking.companion.user_id != user_id:
+        if not principal.owns_booking(booking):
             return jsonify({'error': 'Unauthorized'}), 403
-        
-        messages = ChatMessage.query.filter_by(booking_id=booking_id).order_by(ChatMessage.created_at).all()
 
-        # Calculate time remaining
-        from datetime import datetime, timedelta
-        booking_end = booking.date + timedelta(minutes=booking.duration)
-        current_time = datetime.utcnow()
-        time_remaining = max(0, int((booking_end - current_time).total_seconds()))
+        try:
+            limit = parse_limit(request.args)
+            after_id = parse_id_cursor(request.args, 'after_id')
+            before_id = parse_id_cursor(request.args, 'before_id')
+            fields = parse_fields(request.args, ChatMessage)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if after_id is not None and before_id is not None:
+            return jsonify({'error': 'Use either after_id or before_id, not both'}), 400
+
+        archived = transcript(booking, ChatMessage.with_relations().filter(ChatMessage.booking_id == booking_id))
+        if archived is not None:
+            if after_id is not None:
+                newer = [msg for msg in archived if msg['id'] > after_id]
+                page, has_more = newer[:limit], len(newer) > limit
+            else:
+                older = [msg for msg in archived if before_id is None or msg['id'] < before_id]
+                page, has_more = older[-limit:], len(older) > limit
+            if fields is not None:
+                page = [{name: msg[name] for name in fields} for msg in page]
+            return jsonify({
+                'messages': page,
+                'has_more': has_more,
+                'chat_enabled': booking.chat_live,
+                'time_remaining': booking.time_remaining,
+                'booking': booking.to_dict()
+            }), 200
+
+        if fields is None:
+            query = ChatMessage.with_relations()
+        else:
+            query = ChatMessage.query.options(*load_fields(ChatMessage, fields))
+        query = query.filter(ChatMessage.booking_id == booking_id)
+
+        # Fetch one extra row to learn whether another page exists
+        if after_id is not None:
+            messages = query.filter(ChatMessage.id > after_id).order_by(ChatMessage.id.asc()).limit(limit + 1).all()
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+        else:
+            if before_id is not None:
+                query = query.filter(ChatMessage.id < before_id)
+            messages = query.order_by(ChatMessage.id.desc()).limit(limit + 1).all()
+            has_more = len(messages) > limit
+            messages = list(reversed(messages[:limit]))
 
         return jsonify({
-            'messages': [msg.to_dict() for msg in messages],
-            'chat_enabled': booking.chat_enabled and booking.status == 'approved' and current_time <= booking_end,
-            'time_remaining': time_remaining,
+            'messages': [msg.to_dict(fields) for msg in messages],
+            'has_more': has_more,
+            'chat_enabled': booking.chat_live,
+            'time_remaining': booking.time_remaining,
             'booking': booking.to_dict()
         }), 200
 
@@ -50,42 +111,44 @@ def get_messages(booking_id):
 
 @chat_bp.route('/bookings/<int:booking_id>/messages', methods=['POST'])
 @jwt_required()
+@rate_limited('chat_send')
 def send_message(booking_id):
     """Send a message in a booking chat"""
     try:
-        user_id = get_current_user_id()
-        booking = Booking.query.get(booking_id)
+        principal = current_principal()
+        booking = Booking.with_relations().filter_by(id=booking_id).first()
         
         if not booking:
             return jsonify({'error': 'Booking not found'}), 404
         
         # Check if user is part of the booking
-        if booking.user_id != user_id and booking.companion.user_id != user_id:
+        if not principal.owns_booking(booking):
             return jsonify({'error': 'Unauthorized'}), 403
         
         # Check if booking is active (approved and within time)
+        if booking.status == 'completed' or (booking.status == 'approved' and not booking.chat_live):
+            return jsonify({'error': 'Booking time has ended'}), 403
+        
         if booking.status != 'approved':
             return jsonify({'error': 'Chat is only available for approved bookings'}), 403
         
-        from datetime import datetime, timedelta
-        booking_end = booking.date + timedelta(minutes=booking.duration)
-        if datetime.utcnow() > booking_end:
-            return jsonify({'error': 'Booking time has ended'}), 403
-        
         data = request.get_json()
         if not data or 'message' not in data:
             return jsonify({'error': 'Message is required'}), 400
         
         new_message = ChatMessage(
             booking_id=booking_id,
-            sender_id=user_id,
+            sender_id=principal.user_id,
             message=data['message']
         )
         
         db.session.add(new_message)
         db.session.commit()
 
-        return jsonify({'message': new_message.to_dict()}), 201
+        message_data = new_message.to_dict()
+        chat_hub.publish(booking_id, 'message', message_data, event_id=new_message.id)
+
+        return jsonify({'message': message_data}), 201
 
     except Exception as e:
         db.session.rollback()
@@ -96,27 +159,139 @@ def send_message(booking_id):
 def get_chat_status(booking_id):
     """Get chat status for a booking"""
     try:
-        user_id = get_current_user_id()
-        booking = Booking.query.get(booking_id)
+        principal = current_principal()
+        booking = Booking.with_relations().filter_by(id=booking_id).first()
 
         if not booking:
             return jsonify({'error': 'Booking not found'}), 404
 
         # Check if user is part of the booking
-        if booking.user_id != user_id and booking.companion.user_id != user_id:
+        if not principal.owns_booking(booking):
             return jsonify({'error': 'Unauthorized'}), 403
 
-        # Calculate time remaining
-        from datetime import datetime, timedelta
-        booking_end = booking.date + timedelta(minutes=booking.duration)
-        current_time = datetime.utcnow()
-        time_remaining = max(0, int((booking_end - current_time).total_seconds()))
-
         return jsonify({
-            'chat_enabled': booking.chat_enabled and booking.status == 'approved' and current_time <= booking_end,
-            'time_remaining': time_remaining,
+            'chat_enabled': booking.chat_live,
+            'time_remaining': booking.time_remaining,
             'booking': booking.to_dict()
         }), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+@chat_bp.route('/bookings/<int:booking_id>/stream-token', methods=['POST'])
+@jwt_required()
+def create_stream_token(booking_id):
+    """Issue a short-lived token for opening this booking's chat stream"""
+    try:
+        principal = current_principal()
+        booking = Booking.query.get(booking_id)
+
+        if not booking:
+            return jsonify({'error': 'Booking not found'}), 404
+
+        # Check if user is part of the booking
+        if not principal.owns_booking(booking):
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        token = generate_stream_token(principal.user_id, principal.role, principal.companion_id, booking_id)
+        return jsonify({
+            'token': token,
+            'expires_in': current_app.config.get('CHAT_STREAM_TOKEN_SECONDS', 60)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@chat_bp.route('/bookings/<int:booking_id>/stream', methods=['GET'])
+def stream_messages(booking_id):
+    """Stream new messages and the session end for a booking (Server-Sent Events).
+
+    Authenticates with the Authorization header or, for EventSource, with
+    ?token= from POST /stream-token. Access tokens are never accepted in
+    the URL, so they can't leak into access logs.
+    """
+    token = request.args.get('token')
+    if token:
+        identity = load_stream_token(token, booking_id)
+        if identity is None:
+            return jsonify({'error': 'Invalid or expired stream token'}), 401
+        g.principal = Principal(*identity)
+    else:
+        verify_jwt_in_request()
+
+    try:
+        principal = current_principal()
+        booking = Booking.with_relations().filter_by(id=booking_id).first()
+
+        if not booking:
+            return jsonify({'error': 'Booking not found'}), 404
+
+        # Check if user is part of the booking
+        if not principal.owns_booking(booking):
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        # Subscribe before reading missed messages so nothing falls in between
+        try:
+            subscriber = chat_hub.subscribe(booking_id)
+        except ChatHubFull:
+            # Every stream holds a server thread; past the cap clients poll instead
+            response = jsonify({'error': 'Too many open chat streams, try again later'})
+            response.headers['Retry-After'] = str(STREAM_RETRY_AFTER_SECONDS)
+            return response, 503
+
+        try:
+            booking_end = booking.ends_at
+            chat_enabled = booking.chat_live
+            time_remaining = booking.time_remaining
+
+            # Replay anything the client missed while disconnected
+            last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+            missed = []
+            if last_event_id and last_event_id.isdigit():
+                missed = [
+                    msg.to_dict() for msg in ChatMessage.with_relations()
+                    .filter(ChatMessage.booking_id == booking_id, ChatMessage.id > int(last_event_id))
+                    .order_by(ChatMessage.id)
+                    .all()
+                ]
+        except Exception:
+            chat_hub.unsubscribe(booking_id, subscriber)
+            raise
+
+        # The generator runs after the request context is torn down, so it
+        # only touches values materialized above and never holds a DB connection.
+        def generate():
+            try:
+                yield 'retry: 3000\n\n'
+                yield format_sse('status', {
+                    'chat_enabled': chat_enabled,
+                    'time_remaining': time_remaining
+                })
+                for message in missed:
+                    yield format_sse('message', message, message['id'])
+
+                while True:
+                    remaining = (booking_end - datetime.utcnow()).total_seconds()
+                    if not chat_enabled or remaining <= 0:
+                        yield format_sse('session_end', {'chat_enabled': False, 'time_remaining': 0})
+                        return
+                    try:
+                        event, data, event_id = subscriber.get(timeout=min(STREAM_HEARTBEAT_SECONDS, remaining))
+                    except queue.Empty:
+                        yield ': keep-alive\n\n'
+                        continue
+                    yield format_sse(event, data, event_id)
+                    if event in ('session_end', 'reconnect'):
+                        return
+            finally:
+                chat_hub.unsubscribe(booking_id, subscriber)
+
+        return Response(generate(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,34 +1,282 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
+from sqlalchemy import or_, tuple_
+from sqlalchemy.orm import contains_eager
 from database import db
-from models import Companion, User
-from utils.jwt_handler import get_current_user_id
+from models import Companion, User, Booking, Review, SESSION_MINUTES
+from utils.jwt_handler import get_current_user_id, generate_token
+from utils.principal import current_principal
+from utils.interests import parse_interests, users_with_interests, has_interests
+from utils.pagination import parse_limit, encode_cursor, decode_cursor
+from utils.time_utils import parse_utc_datetime, next_slot_start
+from utils.fields import parse_fields, load_fields
+from utils.cache import cached_response, conditional_response, invalidate_companion, companion_tag, COMPANION_LIST_TAG
+from utils.search import search_terms, search_companions, sync_companion_search
+from utils.recommendations import recommendation_index, caller_profile, interest_names
+from utils.facets import location_facets, adjust_location_facet, invalidate_location_facets, LOCATION_FACETS_TAG
+from utils.images import store_image, ImageError
+from datetime import datetime, timedelta
 
 companion_bp = Blueprint('companion', __name__, url_prefix='/api/companions')
 
 
+# Sort orders for the catalog: name -> (sort column, cursor value parser)
+COMPANION_SORTS = {
+    'rating': (Companion.rating, float),
+    'newest': (Companion.created_at, datetime.fromisoformat),
+}
+CATALOG_PAGE_SIZE = 20
+CATALOG_MAX_PAGE_SIZE = 100
+# Deepest result a search cursor can page to
+SEARCH_MAX_OFFSET = 1000
+RECOMMENDED_PAGE_SIZE = 20
+RECOMMENDED_MAX_PAGE_SIZE = 100
+
+
+def _int_arg(name):
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+
+
+def _normalize_catalog_params(params):
+    """Make equivalent catalog queries share one cache entry"""
+    for name in ('state', 'district'):
+        if name in params:
+            params[name] = [value.lower() for value in params[name]]
+    if 'interests' in params:
+        params['interests'] = sorted(parse_interests(','.join(params['interests'])))
+    if 'fields' in params:
+        params['fields'] = sorted({name.strip() for value in params['fields'] for name in value.split(',') if name.strip()})
+    params.setdefault('sort', ['rating'])
+    return params
+
+
+def _catalog_tags(view_args, payload):
+    return [companion_tag(companion['id']) for companion in payload['companions']]
+
+
 @companion_bp.route('', methods=['GET'])
+@cached_response(COMPANION_LIST_TAG, tags=_catalog_tags, normalize=_normalize_catalog_params)
 def get_companions():
-    """Get all companions (public endpoint) with optional interest filtering"""
+    """Get a page of available companions (public endpoint).
+
+    Filters: state, district, min_price, max_price, interests (any of a
+    comma-separated list; companions with no interests always match).
+    sort is 'rating' (default) or 'newest'. Pass the returned next_cursor
+    back as ?cursor= to get the following page.
+    ?fields=name,rating returns (and selects) only those fields.
+    """
+    try:
+        try:
+            limit = parse_limit(request.args, default=CATALOG_PAGE_SIZE, maximum=CATALOG_MAX_PAGE_SIZE)
+            min_price = _int_arg('min_price')
+            max_price = _int_arg('max_price')
+            fields = parse_fields(request.args, Companion)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        sort = request.args.get('sort', 'rating')
+        if sort not in COMPANION_SORTS:
+            return jsonify({'error': f"sort must be one of: {', '.join(COMPANION_SORTS)}"}), 400
+        sort_column, parse_sort_value = COMPANION_SORTS[sort]
+        
+        # One statement: companions joined to their users, filtered and ordered in SQL
+        if fields is None:
+            load_options = [contains_eager(Companion.user)]
+        else:
+            load_options = load_fields(Companion, fields, always=(sort_column.key,), loader=contains_eager)
+        query = (
+            Companion.query
+            .join(Companion.user)
+            .options(*load_options)
+            .filter(Companion.availability == True)
+        )
+        
+        state = request.args.get('state', '').strip()
+        if state:
+            query = query.filter(db.func.lower(User.state) == state.lower())
+        district = request.args.get('district', '').strip()
+        if district:
+            query = query.filter(db.func.lower(User.district) == district.lower())
+        if min_price is not None:
+            query = query.filter(Companion.price_per_hour >= min_price)
+        if max_price is not None:
+            query = query.filter(Companion.price_per_hour <= max_price)
+        
+        # Filter by interests if provided (matches any of the given tags); companions
+        # without any interests always pass, as they did with the old client-side filter
+        interest_names = parse_interests(request.args.get('interests', ''))
+        if interest_names:
+            query = query.filter(or_(
+                Companion.user_id.in_(users_with_interests(interest_names)),
+                ~has_interests(Companion.user_id)
+            ))
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            # Cursors are only valid for the sort order that produced them
+            try:
+                cursor_sort, cursor_value, cursor_id = decode_cursor(cursor)
+                if cursor_sort != sort:
+                    raise ValueError
+                cursor_value = parse_sort_value(cursor_value)
+                cursor_id = int(cursor_id)
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(tuple_(sort_column, Companion.id) < (cursor_value, cursor_id))
+        
+        # Fetch one extra row to learn whether another page exists
+        companions = query.order_by(sort_column.desc(), Companion.id.desc()).limit(limit + 1).all()
+        has_more = len(companions) > limit
+        companions = companions[:limit]
+        
+        next_cursor = None
+        if has_more:
+            last = companions[-1]
+            last_value = getattr(last, sort_column.key)
+            if isinstance(last_value, datetime):
+                last_value = last_value.isoformat()
+            next_cursor = encode_cursor([sort, last_value, last.id])
+        
+        return jsonify({
+            'companions': [companion.to_dict(fields) for companion in companions],
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@companion_bp.route('/cities', methods=['GET'])
+@conditional_response()
+@cached_response(LOCATION_FACETS_TAG)
+def get_companion_cities():
+    """Get available companion counts by state and district (public endpoint).
+
+    Counts come from the location_facets summary table, which companion
+    writes keep current, so this never groups over users. Responses carry
+    an ETag; send it back as If-None-Match to get a 304 when unchanged.
+    """
+    try:
+        states = location_facets()
+        return jsonify({
+            'states': states,
+            'total': sum(state['count'] for state in states)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@companion_bp.route('/recommended', methods=['GET'])
+@jwt_required()
+def get_recommended_companions():
+    """Get the available companions that best match the caller.
+
+    Available companions are ranked in memory on interest overlap
+    with the caller, overlap with companions they booked before, rating
+    and location. Each result carries its score, the parts behind it
+    and the interests it shares with the caller. ?limit= (default 20).
+    """
+    try:
+        try:
+            limit = parse_limit(request.args, default=RECOMMENDED_PAGE_SIZE, maximum=RECOMMENDED_MAX_PAGE_SIZE)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        principal = current_principal()
+        user = principal.user
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        interest_ids, history_ids = caller_profile(user)
+        own = principal.companion_id
+        ranked = recommendation_index.recommend(
+            interest_ids, history_ids, user.state, user.district, limit,
+            exclude=(own,) if own else ()
+        )
+        
+        companions = {
+            companion.id: companion
+            for companion in Companion.with_relations().filter(Companion.id.in_([entry.companion_id for _, _, _, entry in ranked]))
+        } if ranked else {}
+        names = interest_names(interest_ids)
+        results = []
+        for score, parts, shared, entry in ranked:
+            companion = companions.get(entry.companion_id)
+            if companion is None:
+                continue
+            data = companion.to_dict()
+            data['score'] = round(score, 4)
+            data['score_parts'] = {name: round(value, 4) for name, value in parts.items()}
+            data['shared_interests'] = sorted(names[i] for i in shared if i in names)
+            results.append(data)
+        
+        return jsonify({'companions': results}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@companion_bp.route('/search', methods=['GET'])
+def search():
+    """Full-text search over available companions (public endpoint).
+
+    ?q= matches every word as a prefix against name, interests, location
+    and bio, best match first (name weighs most, bio least). Pass the
+    returned next_cursor back as ?cursor= to get the following page.
+    """
     try:
-        interests = request.args.get('interests', '')
-        
-        companions = Companion.query.filter_by(availability=True).all()
-        
-        # Filter by interests if provided
-        if interests:
-            interest_list = [i.strip().lower() for i in interests.split(',')]
-            filtered_companions = []
-            for companion in companions:
-                if companion.user and companion.user.interests:
-                    companion_interests = [i.strip().lower() for i in companion.user.interests.split(',')]
-                    # Check if any interest matches
-                    if any(interest in companion_interests for interest in interest_list):
-                        filtered_companions.append(companion)
-            companions = filtered_companions
+        try:
+            limit = parse_limit(request.args, default=CATALOG_PAGE_SIZE, maximum=CATALOG_MAX_PAGE_SIZE)
+            fields = parse_fields(request.args, Companion)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        terms = search_terms(request.args.get('q', ''))
+        if not terms:
+            return jsonify({'error': 'q is required'}), 400
+        
+        offset = 0
+        cursor = request.args.get('cursor')
+        if cursor:
+            # Cursors are only valid for the query that produced them
+            try:
+                cursor_terms, offset = decode_cursor(cursor)
+                if cursor_terms != terms or not 0 <= int(offset) <= SEARCH_MAX_OFFSET:
+                    raise ValueError
+                offset = int(offset)
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+        
+        # Fetch one extra match to learn whether another page exists
+        matches = search_companions(terms, limit + 1, offset)
+        has_more = len(matches) > limit and offset + limit <= SEARCH_MAX_OFFSET
+        matches = matches[:limit]
+        
+        # Only the columns (and related rows) behind the requested fields
+        query = Companion.with_relations() if fields is None else Companion.query.options(*load_fields(Companion, fields))
+        companions = {
+            companion.id: companion
+            for companion in query.filter(Companion.id.in_([cid for cid, _ in matches]))
+        } if matches else {}
+        results = []
+        for companion_id, score in matches:
+            if companion_id in companions:
+                data = companions[companion_id].to_dict(fields)
+                data['score'] = score
+                results.append(data)
         
         return jsonify({
-            'companions': [companion.to_dict() for companion in companions]
+            'companions': results,
+            'next_cursor': encode_cursor([terms, offset + limit]) if has_more else None,
+            'has_more': has_more
         }), 200
         
     except Exception as e:
@@ -36,10 +284,11 @@ def get_companions():
 
 
 @companion_bp.route('/<int:companion_id>', methods=['GET'])
+@cached_response('companions:detail', tags=lambda view_args, payload: [companion_tag(view_args['companion_id'])])
 def get_companion(companion_id):
     """Get companion details by ID"""
     try:
-        companion = Companion.query.get(companion_id)
+        companion = Companion.with_relations().filter_by(id=companion_id).first()
         
         if not companion:
             return jsonify({'error': 'Companion not found'}), 404
@@ -50,13 +299,124 @@ def get_companion(companion_id):
         return jsonify({'error': str(e)}), 500
 
 
+REVIEWS_PAGE_SIZE = 20
+
+
+@companion_bp.route('/<int:companion_id>/reviews', methods=['GET'])
+@cached_response('companions:reviews', tags=lambda view_args, payload: [companion_tag(view_args['companion_id'])])
+def get_companion_reviews(companion_id):
+    """Get a page of a companion's reviews, newest first (public endpoint).
+
+    Pass the returned next_cursor back as ?cursor= to get older reviews.
+    The rating and rating_count come from the companion row, not from
+    aggregating reviews.
+    """
+    try:
+        try:
+            limit = parse_limit(request.args, default=REVIEWS_PAGE_SIZE)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        companion = Companion.query.get(companion_id)
+        if not companion:
+            return jsonify({'error': 'Companion not found'}), 404
+        
+        query = Review.with_relations().filter(Review.companion_id == companion_id)
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                (before_id,) = decode_cursor(cursor)
+                before_id = int(before_id)
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(Review.id < before_id)
+        
+        # Fetch one extra row to learn whether another page exists
+        reviews = query.order_by(Review.id.desc()).limit(limit + 1).all()
+        has_more = len(reviews) > limit
+        reviews = reviews[:limit]
+        
+        return jsonify({
+            'companion_id': companion_id,
+            'rating': companion.rating,
+            'rating_count': companion.rating_count,
+            'reviews': [review.to_dict() for review in reviews],
+            'next_cursor': encode_cursor([reviews[-1].id]) if has_more else None,
+            'has_more': has_more
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+SLOT_MAX_RANGE = timedelta(days=7)
+
+
+@companion_bp.route('/<int:companion_id>/slots', methods=['GET'])
+def get_companion_slots(companion_id):
+    """Get free 15-minute slots for a companion (public endpoint).
+
+    ?from= and ?to= are ISO datetimes (UTC when no offset is given),
+    defaulting to the next 24 hours and capped at 7 days. Slots sit on a
+    15-minute grid and are computed from one range query over bookings.
+    """
+    try:
+        now = datetime.utcnow()
+        try:
+            range_start = parse_utc_datetime(request.args['from']) if request.args.get('from') else now
+            range_end = parse_utc_datetime(request.args['to']) if request.args.get('to') else range_start + timedelta(days=1)
+        except ValueError:
+            return jsonify({'error': 'Invalid from/to. Use ISO format'}), 400
+        
+        if range_end <= range_start:
+            return jsonify({'error': 'to must be after from'}), 400
+        if range_end - range_start > SLOT_MAX_RANGE:
+            return jsonify({'error': 'Range cannot exceed 7 days'}), 400
+        
+        companion = Companion.query.get(companion_id)
+        if not companion:
+            return jsonify({'error': 'Companion not found'}), 404
+        
+        slot = timedelta(minutes=SESSION_MINUTES)
+        # Align to the grid, and never offer slots that have already started
+        first_slot = next_slot_start(max(range_start, now), slot)
+        
+        slots = []
+        if companion.availability and first_slot < range_end:
+            taken = set()
+            for (booking_date,) in Booking.active_between(companion_id, first_slot, range_end).with_entities(Booking.date):
+                # Mark every grid slot the booking overlaps
+                index = max(0, (booking_date - first_slot) // slot)
+                while first_slot + index * slot < booking_date + slot:
+                    taken.add(index)
+                    index += 1
+            
+            index = 0
+            while first_slot + index * slot + slot <= range_end:
+                if index not in taken:
+                    start = first_slot + index * slot
+                    slots.append({'start': start.isoformat(), 'end': (start + slot).isoformat()})
+                index += 1
+        
+        return jsonify({
+            'companion_id': companion_id,
+            'availability': companion.availability,
+            'slot_minutes': SESSION_MINUTES,
+            'from': range_start.isoformat(),
+            'to': range_end.isoformat(),
+            'slots': slots
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @companion_bp.route('/my-profile', methods=['GET'])
 @jwt_required()
 def get_my_companion_profile():
     """Get current user's companion profile"""
     try:
-        user_id = get_current_user_id()
-        companion = Companion.query.filter_by(user_id=user_id).first()
+        companion = current_principal().companion
         
         if not companion:
             return jsonify({'error': 'Companion profile not found'}), 404
@@ -72,38 +432,44 @@ def get_my_companion_profile():
 def create_companion():
     """Create companion profile (companion role only)"""
     try:
-        user_id = get_current_user_id()
-        claims = get_jwt()
+        principal = current_principal()
         
         # Check if user has companion role
-        if claims.get('role') != 'companion':
+        if principal.role != 'companion':
             return jsonify({'error': 'Only companions can create profiles'}), 403
         
         # Check if companion profile already exists
-        if Companion.query.filter_by(user_id=user_id).first():
+        if principal.companion:
             return jsonify({'error': 'Companion profile already exists'}), 400
         
         data = request.get_json()
         
-        # Validate required fields
-        if 'price_per_hour' not in data:
-            return jsonify({'error': 'price_per_hour is required'}), 400
-        
-        # Create companion profile
+        # Create companion profile (sessions default to the standard ₹299)
         new_companion = Companion(
-            user_id=user_id,
+            user_id=principal.user_id,
             bio=data.get('bio', ''),
-            price_per_hour=data['price_per_hour'],
+            price_per_hour=data.get('price_per_hour', 299),
             image_url=data.get('image_url'),
             availability=data.get('availability', True)
         )
         
         db.session.add(new_companion)
+        db.session.flush()
+        sync_companion_search(new_companion.id)
+        if new_companion.availability:
+            adjust_location_facet(principal.user, 1)
         db.session.commit()
         
+        invalidate_companion(new_companion.id, listing_changed=new_companion.availability)
+        recommendation_index.invalidate(new_companion.id)
+        if new_companion.availability:
+            invalidate_location_facets()
+        
+        # Re-issue the token so it carries the new companion_id claim
         return jsonify({
             'message': 'Companion profile created successfully',
-            'companion': new_companion.to_dict()
+            'companion': new_companion.to_dict(),
+            'token': generate_token(principal.user_id, principal.role, new_companion.id)
         }), 201
         
     except Exception as e:
@@ -128,18 +494,36 @@ def update_companion(companion_id):
         
         data = request.get_json()
         
+        # Availability and price decide which catalog pages list the companion
+        listing_changed = (
+            ('availability' in data and data['availability'] != companion.availability) or
+            ('price_per_hour' in data and data['price_per_hour'] != companion.price_per_hour)
+        )
+        
         # Update allowed fields
         if 'bio' in data:
             companion.bio = data['bio']
         if 'price_per_hour' in data:
             companion.price_per_hour = data['price_per_hour']
-        if 'image_url' in data:
+        if 'image_url' in data and data['image_url'] != companion.image_url:
+            # An external URL replaces any uploaded image and its thumbnail
             companion.image_url = data['image_url']
+            companion.thumbnail_url = None
+        was_available = bool(companion.availability)
         if 'availability' in data:
             companion.availability = data['availability']
+        availability_delta = int(bool(companion.availability)) - int(was_available)
         
+        if 'bio' in data:
+            sync_companion_search(companion.id)
+        adjust_location_facet(companion.user, availability_delta)
         db.session.commit()
         
+        invalidate_companion(companion.id, listing_changed=listing_changed)
+        recommendation_index.invalidate(companion.id)
+        if availability_delta:
+            invalidate_location_facets()
+        
         return jsonify({
             'message': 'Companion profile updated successfully',
             'companion': companion.to_dict()
@@ -150,6 +534,59 @@ def update_companion(companion_id):
         return jsonify({'error': str(e)}), 500
 
 
+@companion_bp.route('/<int:companion_id>/image', methods=['POST'])
+@jwt_required()
+def upload_companion_image(companion_id):
+    """Upload a profile picture (multipart field `image`).
+
+    Stores the original and its resized variants once, content-addressed,
+    and points image_url at the card variant and thumbnail_url at the
+    thumbnail.
+    """
+    try:
+        user_id = get_current_user_id()
+        companion = Companion.query.get(companion_id)
+        
+        if not companion:
+            return jsonify({'error': 'Companion not found'}), 404
+        
+        # Check if user owns this companion profile
+        if companion.user_id != user_id:
+            return jsonify({'error': 'Unauthorized to update this profile'}), 403
+        
+        max_bytes = current_app.config.get('IMAGE_MAX_BYTES', 5 * 1024 * 1024)
+        if request.content_length and request.content_length > max_bytes + 64 * 1024:
+            return jsonify({'error': f'Image must be at most {max_bytes // (1024 * 1024)} MB'}), 413
+        
+        upload = request.files.get('image')
+        if upload is None:
+            return jsonify({'error': 'image file is required'}), 400
+        data = upload.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            return jsonify({'error': f'Image must be at most {max_bytes // (1024 * 1024)} MB'}), 413
+        
+        try:
+            urls = store_image(data)
+        except ImageError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        companion.image_url = urls['card']
+        companion.thumbnail_url = urls['thumb']
+        db.session.commit()
+        
+        invalidate_companion(companion.id)
+        
+        return jsonify({
+            'message': 'Image uploaded successfully',
+            'image': urls,
+            'companion': companion.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @companion_bp.route('/<int:companion_id>', methods=['DELETE'])
 @jwt_required()
 def delete_companion(companion_id):
@@ -165,10 +602,22 @@ def delete_companion(companion_id):
         if companion.user_id != user_id:
             return jsonify({'error': 'Unauthorized to delete this profile'}), 403
         
+        was_available = bool(companion.availability)
+        if was_available:
+            adjust_location_facet(companion.user, -1)
         db.session.delete(companion)
+        sync_companion_search(companion_id)
         db.session.commit()
         
-        return jsonify({'message': 'Companion profile deleted successfully'}), 200
+        invalidate_companion(companion_id)
+        recommendation_index.invalidate(companion_id)
+        if was_available:
+            invalidate_location_facets()
+        
+        return jsonify({
+            'message': 'Companion profile deleted successfully',
+            'token': generate_token(user_id, get_jwt().get('role'))
+        }), 200
         
     except Exception as e:
         db.session.rollback()
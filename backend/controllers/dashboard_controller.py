@@ -0,0 +1,86 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func
+from database import db
+from models import Booking
+from utils.principal import current_principal
+from utils.pagination import parse_limit, encode_cursor
+from datetime import datetime
+
+dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
+
+BOOKING_STATUSES = ('pending', 'approved', 'rejected', 'completed')
+# Live chats listed for admins, who can see every booking
+ADMIN_ACTIVE_CHATS_LIMIT = 200
+
+
+def _status_counts(rows):
+    counts = dict.fromkeys(BOOKING_STATUSES, 0)
+    for status, count in rows:
+        counts[status] = count
+    return counts
+
+
+@dashboard_bp.route('', methods=['GET'])
+@jwt_required()
+def get_dashboard():
+    """Everything the dashboard and chat list need on load, in one response.
+
+    Returns the caller's profile, their companion profile (companions),
+    bookings newest first with counts by status, and the bookings whose
+    chat is open. Users and companions get all their bookings; admins get
+    the first page of all bookings (?limit=, default 50) with next_cursor
+    for GET /api/bookings/all.
+    """
+    try:
+        principal = current_principal()
+        user = principal.user
+
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        data = {'user': user.to_dict(), 'companion': None, 'next_cursor': None, 'has_more': False}
+
+        if principal.is_admin:
+            try:
+                limit = parse_limit(request.args)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+            # Fetch one extra row to learn whether another page exists
+            bookings = Booking.with_relations().order_by(Booking.id.desc()).limit(limit + 1).all()
+            data['has_more'] = len(bookings) > limit
+            bookings = bookings[:limit]
+            if data['has_more']:
+                data['next_cursor'] = encode_cursor([bookings[-1].id])
+
+            counts = _status_counts(db.session.query(Booking.status, func.count(Booking.id)).group_by(Booking.status))
+            active = (
+                Booking.with_relations()
+                .filter(Booking.status == 'approved', Booking.chat_enabled == True, Booking.ends_at > datetime.utcnow())
+                .order_by(Booking.id.desc())
+                .limit(ADMIN_ACTIVE_CHATS_LIMIT)
+                .all()
+            )
+        else:
+            query = Booking.with_relations()
+            if principal.role == 'companion':
+                companion = principal.companion
+                data['companion'] = companion.to_dict() if companion else None
+                bookings = query.filter_by(companion_id=companion.id).order_by(Booking.id.desc()).all() if companion else []
+            else:
+                bookings = query.filter_by(user_id=principal.user_id).order_by(Booking.id.desc()).all()
+
+            # The caller's own bookings are all loaded, so count and filter them here
+            counts = _status_counts(
+                (status, sum(1 for booking in bookings if booking.status == status)) for status in BOOKING_STATUSES
+            )
+            active = [booking for booking in bookings if booking.chat_live]
+
+        data['bookings'] = [booking.to_dict() for booking in bookings]
+        data['counts'] = counts
+        data['active_chats'] = [booking.to_dict() for booking in active]
+        return jsonify(data), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
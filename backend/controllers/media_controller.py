@@ -0,0 +1,28 @@
+import mimetypes
+from flask import Blueprint, jsonify, send_file
+from utils.storage import get_storage, KEY_PATTERN
+
+# Registered under the path of MEDIA_URL (see create_app)
+media_bp = Blueprint('media', __name__)
+
+# Keys name their content, so a stored file never changes
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+@media_bp.route('/<key>', methods=['GET'])
+def get_media(key):
+    """Serve a stored upload with a year-long immutable cache lifetime"""
+    storage = get_storage()
+    if not KEY_PATTERN.match(key) or not storage.exists(key):
+        return jsonify({'error': 'Not found'}), 404
+
+    response = send_file(
+        storage.open(key),
+        mimetype=mimetypes.guess_type(key)[0] or 'application/octet-stream',
+        max_age=IMMUTABLE_MAX_AGE,
+        conditional=True,
+        etag=key.split('.')[0]
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
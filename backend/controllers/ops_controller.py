@@ -0,0 +1,117 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt
+from database import pool_status
+from utils.cache import response_cache
+from utils.session_scheduler import session_scheduler
+from utils.rate_limit import rate_limiter
+from utils.recommendations import recommendation_index
+from utils.chat_hub import chat_hub
+
+ops_bp = Blueprint('ops', __name__, url_prefix='/api/ops')
+
+
+@ops_bp.route('/cache', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Get response cache hit/miss counters (admin only)"""
+    try:
+        claims = get_jwt()
+        
+        # Check if user is admin
+        if claims.get('role') != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        return jsonify({'cache': response_cache.stats()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@ops_bp.route('/pool', methods=['GET'])
+@jwt_required()
+def get_pool_stats():
+    """Get database connection pool usage and checkout wait times (admin only)"""
+    try:
+        claims = get_jwt()
+        
+        # Check if user is admin
+        if claims.get('role') != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        return jsonify({'pool': pool_status()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+
+@ops_bp.route('/sessions', methods=['GET'])
+@jwt_required()
+def get_session_scheduler_stats():
+    """Get session expiry scheduler state for this process (admin only)"""
+    try:
+        claims = get_jwt()
+        
+        # Check if user is admin
+        if claims.get('role') != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        return jsonify({'sessions': session_scheduler.stats()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@ops_bp.route('/rate-limits', methods=['GET'])
+@jwt_required()
+def get_rate_limit_stats():
+    """Get rate-limit policies and allowed/limited counters (admin only)"""
+    try:
+        claims = get_jwt()
+        
+        # Check if user is admin
+        if claims.get('role') != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        return jsonify({'rate_limits': rate_limiter.stats()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@ops_bp.route('/recommendations', methods=['GET'])
+@jwt_required()
+def get_recommendation_index_stats():
+    """Get recommendation index size, age and rebuild counters for this process (admin only)"""
+    try:
+        claims = get_jwt()
+        
+        # Check if user is admin
+        if claims.get('role') != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        return jsonify({'recommendations': recommendation_index.stats()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@ops_bp.route('/chat', methods=['GET'])
+@jwt_required()
+def get_chat_stats():
+    """Get open chat streams and pub/sub relay counters of this process (admin only)"""
+    try:
+        claims = get_jwt()
+        
+        # Check if user is admin
+        if claims.get('role') != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        return jsonify({'chat': {
+            'streams': chat_hub.subscriber_count(),
+            'max_streams': chat_hub.max_subscribers,
+            'pubsub': chat_hub.broker.stats() if chat_hub.broker else {'backend': 'local'}
+        }}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from database import db
-from models import User
-from utils.jwt_handler import get_current_user_id
+from utils.principal import current_principal
+from utils.interests import set_user_interests
+from utils.cache import invalidate_companion
+from utils.search import sync_companion_search
+from utils.recommendations import recommendation_index
 
 user_bp = Blueprint('user', __name__, url_prefix='/api/users')
 
@@ -11,8 +14,7 @@ user_bp = Blueprint('user', __name__, url_prefix='/api/users')
 def get_profile():
     """Get current user profile"""
     try:
-        user_id = get_current_user_id()
-        user = User.query.get(user_id)
+        user = current_principal().user
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -28,8 +30,7 @@ def get_profile():
 def update_profile():
     """Update current user profile"""
     try:
-        user_id = get_current_user_id()
-        user = User.query.get(user_id)
+        user = current_principal().user
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -43,9 +44,20 @@ def update_profile():
             user.city = data['city']
         if 'age' in data:
             user.age = data['age']
+        if 'interests' in data:
+            set_user_interests(user, data['interests'])
         
+        # Companion search documents include the name, city and interests
+        if user.companion_profile and any(name in data for name in ('name', 'city', 'interests')):
+            sync_companion_search(user.companion_profile.id)
         db.session.commit()
         
+        # Companion cards embed the user's profile fields
+        if user.companion_profile:
+            invalidate_companion(user.companion_profile.id, listing_changed='interests' in data)
+            if 'interests' in data:
+                recommendation_index.invalidate(user.companion_profile.id)
+        
         return jsonify({
             'message': 'Profile updated successfully',
             'user': user.to_dict()
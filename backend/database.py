@@ -1,9 +1,115 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+import os
+import threading
+import time
+
 db = SQLAlchemy()
 
+
+class PoolMetrics:
+    """Connection pool counters, shared by every engine in the process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_checkout(self, wait_seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_avg': round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                'wait_seconds_max': round(self.wait_seconds_max, 6)
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+@event.listens_for(Engine, 'connect')
+def _sqlite_foreign_keys(dbapi_connection, connection_record):
+    """Enforce foreign keys on SQLite so ON DELETE CASCADE works as on Postgres"""
+    if type(dbapi_connection).__module__.startswith('sqlite3'):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+
+def engine_options_from_env(database_uri):
+    """SQLAlchemy engine options from DB_POOL_* environment variables.
+
+    Size the pool so that server workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    stays below the database's max_connections. SQLite keeps its defaults.
+    """
+    if database_uri.startswith('sqlite'):
+        return {}
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', '1') == '1',
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+    }
+
+
+def pool_status():
+    """Live pool occupancy plus checkout/wait counters (needs an app context)"""
+    pool = db.engine.pool
+    status = {'class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': pool.overflow()
+        })
+    status.update(pool_metrics.snapshot())
+    return status
+
+
 def init_db(app):
+    """Bind the database to the app.
+
+    With DB_AUTO_CREATE enabled (development default) missing tables are
+    created on boot. Otherwise no schema work happens at all: run
+    `alembic upgrade head` when deploying instead.
+    """
     db.init_app(app)
-    with app.app_context():
-        db.create_all()
-        print("Database tables created successfully!")
+    if app.config.get('DB_AUTO_CREATE', True):
+        with app.app_context():
+            db.create_all()
+            print("Database tables created successfully!")
     return db
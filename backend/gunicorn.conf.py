@@ -0,0 +1,69 @@
+"""Gunicorn settings for serving the API in production.
+
+Every value can be overridden from the environment. Sizing notes:
+
+- Each worker process has its own SQLAlchemy pool, so the database sees
+  up to workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections. Keep that
+  below Postgres' max_connections, leaving room for migrations and psql.
+- Threaded workers (gthread) let one process serve many requests while
+  others wait on the database. A thread only holds a pooled connection
+  while it is querying, so DB_POOL_SIZE can be smaller than the thread
+  count.
+- Chat streams (Server-Sent Events) hold a thread for the whole session.
+  CHAT_MAX_STREAMS (default: half of GUNICORN_THREADS) caps them per
+  worker so REST requests always have threads left; refused clients fall
+  back to polling. For many concurrent chats, route /api/chat/*/stream to
+  a separate gunicorn instance with an async worker class instead.
+- Chat events reach streams on other workers only through a shared
+  pub/sub (CHAT_PUBSUB=postgres, the default on Postgres). With
+  CHAT_PUBSUB=local the default is a single worker.
+- Password hashing runs in a process pool per worker (BCRYPT_WORKERS).
+  Unless set, it defaults to the cores divided among the workers, so
+  workers x BCRYPT_WORKERS stays close to the number of CPU cores.
+"""
+import multiprocessing
+import os
+from dotenv import load_dotenv
+from utils.chat_pubsub import pubsub_backend
+
+load_dotenv()
+
+# Same default database as app.py
+shared_chat = pubsub_backend(
+    os.getenv('DATABASE_URL', 'postgresql://'), os.getenv('CHAT_PUBSUB')
+) != 'local'
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1 if shared_chat else 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+# Workers inherit this, so app.py reads it as their stream cap
+os.environ.setdefault('CHAT_MAX_STREAMS', str(max(1, threads // 2)))
+# ... and this as their bcrypt pool size
+os.environ.setdefault('BCRYPT_WORKERS', str(max(1, multiprocessing.cpu_count() // workers)))
+
+# Streams send a keep-alive every 15s, well inside the worker timeout
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '5000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '500'))
+
+# Build the app (and its connection pool) inside each worker, never in the
+# master, so no pooled connection is shared across a fork
+preload_app = False
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '-')
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    if workers > 1 and not shared_chat:
+        server.log.warning(
+            'CHAT_PUBSUB=local with %s workers: chat messages are only pushed to streams '
+            'on the worker that received them; clients fall back to polling', workers
+        )
@@ -0,0 +1,73 @@
+import os
+from logging.config import fileConfig
+from alembic import context
+
+# Migrations own the schema here, so skip create_all when building the app
+os.environ['DB_AUTO_CREATE'] = '0'
+os.environ['SESSION_SCHEDULER'] = 'off'
+# Nothing here publishes chat events, so don't start the pub/sub listener
+os.environ['CHAT_PUBSUB'] = 'local'
+
+from app import create_app
+from database import db
+import models  # noqa: F401  (registers every table on db.metadata)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+app = create_app()
+target_metadata = db.metadata
+
+# Tables managed with raw DDL outside the models (see utils.search): the
+# companion search table and, on SQLite, the FTS5 shadow tables behind it
+UNMODELED_TABLES = ('companion_search',)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep autogenerate and `alembic check` from reporting unmodeled tables as drift"""
+    if type_ == 'table':
+        return not any(name == table or name.startswith(f'{table}_') for table in UNMODELED_TABLES)
+    if type_ == 'index' and object.table is not None:
+        return include_object(object.table, object.table.name, 'table', reflected, None)
+    return True
+
+
+def run_migrations_offline():
+    """Emit SQL to stdout instead of running it (alembic upgrade --sql)"""
+    url = app.config['SQLALCHEMY_DATABASE_URI']
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        include_object=include_object,
+        render_as_batch=url.startswith('sqlite')
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with app.app_context():
+        engine = db.engine
+        with engine.connect() as connection:
+            if engine.dialect.name == 'sqlite':
+                # Batch mode drops and recreates tables; with foreign keys
+                # enforced that would cascade into (or fail on) child rows
+                connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+                connection.commit()
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                include_object=include_object,
+                # SQLite can't ALTER most things in place; batch mode rebuilds the table
+                render_as_batch=engine.dialect.name == 'sqlite'
+            )
+            with context.begin_transaction():
+                context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,74 @@
+"""Baseline schema: users, companions, bookings, chat_messages
+
+Matches what db.create_all() produced before migrations were introduced.
+Databases created that way should run `alembic stamp 0001` once, then
+`alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('email', sa.String(120), nullable=False),
+        sa.Column('password', sa.String(255), nullable=False),
+        sa.Column('role', sa.Enum('user', 'companion', 'admin', name='user_roles'), nullable=False),
+        sa.Column('state', sa.String(100)),
+        sa.Column('district', sa.String(100)),
+        sa.Column('age', sa.Integer()),
+        sa.Column('interests', sa.Text()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.UniqueConstraint('email')
+    )
+    op.create_table(
+        'companions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('bio', sa.Text()),
+        sa.Column('rating', sa.Float()),
+        sa.Column('image_url', sa.String(500)),
+        sa.Column('availability', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.UniqueConstraint('user_id')
+    )
+    op.create_table(
+        'bookings',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('companion_id', sa.Integer(), sa.ForeignKey('companions.id'), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.Column('duration', sa.Integer(), nullable=False),
+        sa.Column('price', sa.Integer(), nullable=False),
+        sa.Column('status', sa.Enum('pending', 'approved', 'rejected', 'completed', name='booking_status'), nullable=False),
+        sa.Column('chat_enabled', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime())
+    )
+    op.create_table(
+        'chat_messages',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('booking_id', sa.Integer(), sa.ForeignKey('bookings.id'), nullable=False),
+        sa.Column('sender_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime())
+    )
+
+
+def downgrade():
+    op.drop_table('chat_messages')
+    op.drop_table('bookings')
+    op.drop_table('companions')
+    op.drop_table('users')
+    sa.Enum(name='booking_status').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='user_roles').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,47 @@
+"""Add columns the code already uses, plus catalog and chat indexes
+
+- companions.price_per_hour (default 299) and a NOT NULL rating
+- users.city
+- (booking_id, id) index for chat message cursors
+- catalog keyset indexes and a lower(state), lower(district) index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("UPDATE companions SET rating = 0 WHERE rating IS NULL")
+    with op.batch_alter_table('companions') as batch:
+        batch.add_column(sa.Column('price_per_hour', sa.Integer(), nullable=False, server_default='299'))
+        batch.alter_column('rating', existing_type=sa.Float(), nullable=False)
+
+    with op.batch_alter_table('users') as batch:
+        batch.add_column(sa.Column('city', sa.String(100)))
+
+    op.create_index('ix_chat_messages_booking_id_id', 'chat_messages', ['booking_id', 'id'])
+    op.create_index('ix_companions_availability_rating_id', 'companions', ['availability', 'rating', 'id'])
+    op.create_index('ix_companions_availability_created_at_id', 'companions', ['availability', 'created_at', 'id'])
+    op.create_index('ix_users_state_district_lower', 'users', [sa.text('lower(state)'), sa.text('lower(district)')])
+
+
+def downgrade():
+    op.drop_index('ix_users_state_district_lower', table_name='users')
+    op.drop_index('ix_companions_availability_created_at_id', table_name='companions')
+    op.drop_index('ix_companions_availability_rating_id', table_name='companions')
+    op.drop_index('ix_chat_messages_booking_id_id', table_name='chat_messages')
+
+    with op.batch_alter_table('users') as batch:
+        batch.drop_column('city')
+
+    with op.batch_alter_table('companions') as batch:
+        batch.alter_column('rating', existing_type=sa.Float(), nullable=True)
+        batch.drop_column('price_per_hour')
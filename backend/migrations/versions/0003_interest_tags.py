@@ -0,0 +1,79 @@
+"""Normalized interest tags, backfilled from users.interests
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+users = sa.table('users', sa.column('id', sa.Integer), sa.column('interests', sa.Text))
+interests = sa.table('interests', sa.column('id', sa.Integer), sa.column('name', sa.String))
+user_interests = sa.table('user_interests', sa.column('user_id', sa.Integer), sa.column('interest_id', sa.Integer))
+
+
+def _parse(raw):
+    # Same normalization as utils.interests.parse_interests, frozen here so
+    # the migration doesn't change if the app code does
+    names = []
+    for part in (raw or '').split(','):
+        name = part.strip().lower()[:100]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def upgrade():
+    op.create_table(
+        'interests',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(100), nullable=False)
+    )
+    op.create_index('ix_interests_name', 'interests', ['name'], unique=True)
+    op.create_table(
+        'user_interests',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('interest_id', sa.Integer(), sa.ForeignKey('interests.id', ondelete='CASCADE'), primary_key=True)
+    )
+    op.create_index('ix_user_interests_interest_id_user_id', 'user_interests', ['interest_id', 'user_id'])
+
+    # Backfill in batches of users
+    bind = op.get_bind()
+    tag_ids = {}
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(users.c.id, users.c.interests)
+            .where(users.c.id > last_id, users.c.interests.isnot(None))
+            .order_by(users.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        links = []
+        for user_id, raw in rows:
+            for name in _parse(raw):
+                if name not in tag_ids:
+                    bind.execute(interests.insert().values(name=name))
+                    tag_ids[name] = bind.execute(
+                        sa.select(interests.c.id).where(interests.c.name == name)
+                    ).scalar_one()
+                links.append({'user_id': user_id, 'interest_id': tag_ids[name]})
+        if links:
+            bind.execute(user_interests.insert(), links)
+        last_id = rows[-1][0]
+
+
+def downgrade():
+    op.drop_index('ix_user_interests_interest_id_user_id', table_name='user_interests')
+    op.drop_table('user_interests')
+    op.drop_index('ix_interests_name', table_name='interests')
+    op.drop_table('interests')
@@ -0,0 +1,22 @@
+"""Indexes for the paginated admin booking listing and export
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_bookings_status_id', 'bookings', ['status', 'id'])
+    op.create_index('ix_bookings_date', 'bookings', ['date'])
+
+
+def downgrade():
+    op.drop_index('ix_bookings_date', table_name='bookings')
+    op.drop_index('ix_bookings_status_id', table_name='bookings')
@@ -0,0 +1,20 @@
+"""Index bookings by (companion_id, date) for overlap checks and free slots
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_bookings_companion_id_date', 'bookings', ['companion_id', 'date'])
+
+
+def downgrade():
+    op.drop_index('ix_bookings_companion_id_date', table_name='bookings')
@@ -0,0 +1,33 @@
+"""Store each booking's session end for the expiry scheduler
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('bookings', sa.Column('ends_at', sa.DateTime(), nullable=True))
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        op.execute("UPDATE bookings SET ends_at = datetime(date, '+' || duration || ' minutes')")
+    else:
+        op.execute("UPDATE bookings SET ends_at = date + duration * interval '1 minute'")
+
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.alter_column('ends_at', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_bookings_status_ends_at', 'bookings', ['status', 'ends_at'])
+
+
+def downgrade():
+    op.drop_index('ix_bookings_status_ends_at', table_name='bookings')
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.drop_column('ends_at')
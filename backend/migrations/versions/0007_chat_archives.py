@@ -0,0 +1,41 @@
+"""Archive table for old chat transcripts; cascade booking deletes in the database
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def _recreate_booking_fk(ondelete):
+    bind = op.get_bind()
+    # SQLite's reflected constraint is unnamed; the naming convention names it for batch mode
+    name = 'fk_chat_messages_booking_id_bookings' if bind.dialect.name == 'sqlite' else 'chat_messages_booking_id_fkey'
+    naming_convention = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+    with op.batch_alter_table('chat_messages', naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint(name, type_='foreignkey')
+        batch_op.create_foreign_key(name, 'bookings', ['booking_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    op.create_table(
+        'chat_archives',
+        sa.Column('booking_id', sa.Integer(), sa.ForeignKey('bookings.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('message_count', sa.Integer(), nullable=False),
+        sa.Column('first_message_id', sa.Integer(), nullable=False),
+        sa.Column('last_message_id', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False)
+    )
+    _recreate_booking_fk('CASCADE')
+
+
+def downgrade():
+    _recreate_booking_fk(None)
+    op.drop_table('chat_archives')
@@ -0,0 +1,114 @@
+"""Optionally range-partition chat_messages by month (Postgres)
+
+Only runs when asked for, on Postgres:
+
+    alembic -x chat_partitions=month upgrade head
+
+It rebuilds chat_messages as a table partitioned on created_at, with one
+partition per month of existing data, three months ahead and a default
+partition, then copies the rows across. The primary key becomes
+(id, created_at) because Postgres requires the partition key in it.
+Without the option, or on SQLite, this revision changes nothing.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from datetime import datetime
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'id, booking_id, sender_id, message, created_at'
+# Partitions are created for this many months past the current one
+MONTHS_AHEAD = 3
+
+# Frozen copies of the helpers in utils.chat_archive, so this revision
+# keeps doing what it did when it was written
+
+
+def _is_partitioned(bind):
+    return bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('chat_messages')"
+    )).first() is not None
+
+
+def _next_month(month):
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _create_month_partitions(bind, start, end):
+    """Monthly partitions named chat_messages_yYYYYmMM covering [start, end)"""
+    month = datetime(start.year, start.month, 1)
+    while month < end:
+        upper = _next_month(month)
+        bind.execute(sa.text(
+            f"CREATE TABLE IF NOT EXISTS chat_messages_y{month.year:04d}m{month.month:02d} PARTITION OF chat_messages "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        month = upper
+
+
+def _wanted():
+    return context.get_x_argument(as_dictionary=True).get('chat_partitions') == 'month'
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not _wanted() or _is_partitioned(bind):
+        return
+
+    op.execute("UPDATE chat_messages SET created_at = now() AT TIME ZONE 'utc' WHERE created_at IS NULL")
+    op.execute('ALTER TABLE chat_messages RENAME TO chat_messages_unpartitioned')
+    op.execute('ALTER TABLE chat_messages_unpartitioned RENAME CONSTRAINT chat_messages_pkey TO chat_messages_unpartitioned_pkey')
+    op.execute('ALTER INDEX ix_chat_messages_booking_id_id RENAME TO ix_chat_messages_unpartitioned_booking_id_id')
+    op.execute("""
+        CREATE TABLE chat_messages (
+            id integer NOT NULL DEFAULT nextval('chat_messages_id_seq'),
+            booking_id integer NOT NULL REFERENCES bookings (id) ON DELETE CASCADE,
+            sender_id integer NOT NULL REFERENCES users (id),
+            message text NOT NULL,
+            created_at timestamp without time zone NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute('CREATE TABLE chat_messages_default PARTITION OF chat_messages DEFAULT')
+    op.create_index('ix_chat_messages_booking_id_id', 'chat_messages', ['booking_id', 'id'])
+
+    now = datetime.utcnow()
+    end = datetime(now.year, now.month, 1)
+    for _ in range(MONTHS_AHEAD + 1):
+        end = _next_month(end)
+    oldest = bind.execute(sa.text('SELECT min(created_at) FROM chat_messages_unpartitioned')).scalar()
+    _create_month_partitions(bind, min(oldest or now, now), end)
+
+    op.execute(f'INSERT INTO chat_messages ({COLUMNS}) SELECT {COLUMNS} FROM chat_messages_unpartitioned')
+    op.execute('ALTER SEQUENCE chat_messages_id_seq OWNED BY chat_messages.id')
+    op.execute('DROP TABLE chat_messages_unpartitioned')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not _is_partitioned(bind):
+        return
+
+    op.execute('ALTER TABLE chat_messages RENAME TO chat_messages_partitioned')
+    op.execute('ALTER TABLE chat_messages_partitioned RENAME CONSTRAINT chat_messages_pkey TO chat_messages_partitioned_pkey')
+    op.execute('ALTER INDEX ix_chat_messages_booking_id_id RENAME TO ix_chat_messages_partitioned_booking_id_id')
+    op.execute("""
+        CREATE TABLE chat_messages (
+            id integer PRIMARY KEY DEFAULT nextval('chat_messages_id_seq'),
+            booking_id integer NOT NULL REFERENCES bookings (id) ON DELETE CASCADE,
+            sender_id integer NOT NULL REFERENCES users (id),
+            message text NOT NULL,
+            created_at timestamp without time zone
+        )
+    """)
+    op.create_index('ix_chat_messages_booking_id_id', 'chat_messages', ['booking_id', 'id'])
+    op.execute(f'INSERT INTO chat_messages ({COLUMNS}) SELECT {COLUMNS} FROM chat_messages_partitioned')
+    op.execute('ALTER SEQUENCE chat_messages_id_seq OWNED BY chat_messages.id')
+    op.execute('DROP TABLE chat_messages_partitioned')
@@ -0,0 +1,61 @@
+"""Full-text search index over companion profiles
+
+A GIN-indexed tsvector table on Postgres, an FTS5 table on SQLite. The
+DDL and the indexing query are frozen here rather than imported from
+utils.search, so later changes to the app don't change this revision.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+# One document per companion: name, interests, location and bio
+SOURCE = """
+    SELECT c.id, coalesce(u.name, ''), coalesce(u.interests, ''),
+           trim(coalesce(u.state, '') || ' ' || coalesce(u.district, '') || ' ' || coalesce(u.city, '')),
+           coalesce(c.bio, '')
+    FROM companions c JOIN users u ON u.id = c.user_id
+"""
+
+POSTGRES_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS companion_search (
+        companion_id integer PRIMARY KEY REFERENCES companions (id) ON DELETE CASCADE,
+        name text NOT NULL,
+        interests text NOT NULL,
+        location text NOT NULL,
+        bio text NOT NULL,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', name), 'A') ||
+            setweight(to_tsvector('simple', interests), 'B') ||
+            setweight(to_tsvector('simple', location), 'C') ||
+            setweight(to_tsvector('simple', bio), 'D')
+        ) STORED
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS ix_companion_search_document ON companion_search USING gin (document)',
+]
+
+SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS companion_search USING fts5(name, interests, location, bio, tokenize='unicode61')",
+]
+
+
+def upgrade():
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for statement in SQLITE_SCHEMA if sqlite else POSTGRES_SCHEMA:
+        op.execute(sa.text(statement))
+    key = 'rowid' if sqlite else 'companion_id'
+    op.execute(sa.text('DELETE FROM companion_search'))
+    op.execute(sa.text(f'INSERT INTO companion_search ({key}, name, interests, location, bio) {SOURCE}'))
+
+
+def downgrade():
+    op.execute(sa.text('DROP TABLE IF EXISTS companion_search'))
@@ -0,0 +1,34 @@
+"""Summary table of available companions per state and district
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'location_facets',
+        sa.Column('state', sa.String(100), primary_key=True),
+        sa.Column('district', sa.String(100), primary_key=True),
+        sa.Column('available_count', sa.Integer(), nullable=False)
+    )
+    # Same counts as utils.facets.rebuild_location_facets, frozen here
+    op.execute("""
+        INSERT INTO location_facets (state, district, available_count)
+        SELECT u.state, coalesce(u.district, ''), count(*)
+        FROM companions c JOIN users u ON u.id = c.user_id
+        WHERE c.availability AND u.state IS NOT NULL AND u.state <> ''
+        GROUP BY u.state, coalesce(u.district, '')
+    """)
+
+
+def downgrade():
+    op.drop_table('location_facets')
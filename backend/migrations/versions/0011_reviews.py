@@ -0,0 +1,45 @@
+"""Booking reviews and denormalized companion rating aggregates
+
+Nothing wrote companions.rating before, so it restarts at 0 alongside
+rating_sum and rating_count.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'reviews',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('booking_id', sa.Integer(), sa.ForeignKey('bookings.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('companion_id', sa.Integer(), sa.ForeignKey('companions.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('comment', sa.Text()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.UniqueConstraint('booking_id'),
+        sa.CheckConstraint('rating BETWEEN 1 AND 5', name='ck_reviews_rating')
+    )
+    op.create_index('ix_reviews_companion_id_id', 'reviews', ['companion_id', 'id'])
+
+    with op.batch_alter_table('companions') as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute('UPDATE companions SET rating = 0')
+
+
+def downgrade():
+    with op.batch_alter_table('companions') as batch_op:
+        batch_op.drop_column('rating_count')
+        batch_op.drop_column('rating_sum')
+    op.drop_index('ix_reviews_companion_id_id', table_name='reviews')
+    op.drop_table('reviews')
@@ -0,0 +1,23 @@
+"""Thumbnail URL for uploaded companion images
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('companions') as batch_op:
+        batch_op.add_column(sa.Column('thumbnail_url', sa.String(500)))
+
+
+def downgrade():
+    with op.batch_alter_table('companions') as batch_op:
+        batch_op.drop_column('thumbnail_url')
@@ -0,0 +1,56 @@
+"""Key location facets by normalized state and district
+
+The catalog filters on lower(state) and lower(district), so facets
+differing only in case or surrounding spaces were counted apart but
+listed the same companions. The table is rebuilt keyed by
+lower(trim(...)), keeping a display spelling.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_table('location_facets')
+    op.create_table(
+        'location_facets',
+        sa.Column('state_key', sa.String(100), primary_key=True),
+        sa.Column('district_key', sa.String(100), primary_key=True),
+        sa.Column('state', sa.String(100), nullable=False),
+        sa.Column('district', sa.String(100), nullable=False),
+        sa.Column('available_count', sa.Integer(), nullable=False)
+    )
+    # Same counts as utils.facets.rebuild_location_facets, frozen here
+    op.execute("""
+        INSERT INTO location_facets (state_key, district_key, state, district, available_count)
+        SELECT lower(trim(u.state)), lower(trim(coalesce(u.district, ''))),
+               min(trim(u.state)), min(trim(coalesce(u.district, ''))), count(*)
+        FROM companions c JOIN users u ON u.id = c.user_id
+        WHERE c.availability AND u.state IS NOT NULL AND trim(u.state) <> ''
+        GROUP BY lower(trim(u.state)), lower(trim(coalesce(u.district, '')))
+    """)
+
+
+def downgrade():
+    op.drop_table('location_facets')
+    op.create_table(
+        'location_facets',
+        sa.Column('state', sa.String(100), primary_key=True),
+        sa.Column('district', sa.String(100), primary_key=True),
+        sa.Column('available_count', sa.Integer(), nullable=False)
+    )
+    op.execute("""
+        INSERT INTO location_facets (state, district, available_count)
+        SELECT u.state, coalesce(u.district, ''), count(*)
+        FROM companions c JOIN users u ON u.id = c.user_id
+        WHERE c.availability AND u.state IS NOT NULL AND u.state <> ''
+        GROUP BY u.state, coalesce(u.district, '')
+    """)
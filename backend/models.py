@@ -1,5 +1,49 @@
 from database import db
-from datetime import datetime
+from datetime import datetime, timedelta
+import gzip
+import json
+from sqlalchemy.orm import joinedload
+
+# Every session is a fixed 15 minutes at ₹299
+SESSION_MINUTES = 15
+SESSION_PRICE = 299
+# Bookings in these states hold their time slot
+ACTIVE_BOOKING_STATUSES = ('pending', 'approved')
+
+
+def _project(obj, fields):
+    """Serialize only the given fields by following each one's FIELDS path"""
+    data = {}
+    for name in fields:
+        value = obj
+        for attr in obj.FIELDS[name]:
+            value = getattr(value, attr) if value is not None else None
+        data[name] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+
+# Many-to-many link between users and normalized interest tags
+user_interests = db.Table(
+    'user_interests',
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('interest_id', db.Integer, db.ForeignKey('interests.id', ondelete='CASCADE'), primary_key=True),
+    # Tag lookups go interest -> users, the reverse of the primary key order
+    db.Index('ix_user_interests_interest_id_user_id', 'interest_id', 'user_id')
+)
+
+
+class Interest(db.Model):
+    __tablename__ = 'interests'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name
+        }
+
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -11,6 +55,7 @@ class User(db.Model):
     role = db.Column(db.Enum('user', 'companion', 'admin', name='user_roles'), default='user', nullable=False)
     state = db.Column(db.String(100))
     district = db.Column(db.String(100))
+    city = db.Column(db.String(100))
     age = db.Column(db.Integer)
     interests = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -19,6 +64,7 @@ class User(db.Model):
     companion_profile = db.relationship('Companion', backref='user', uselist=False, cascade='all, delete-orphan')
     bookings = db.relationship('Booking', foreign_keys='Booking.user_id', backref='user', cascade='all, delete-orphan')
     sent_messages = db.relationship('ChatMessage', foreign_keys='ChatMessage.sender_id', backref='sender', cascade='all, delete-orphan')
+    interest_tags = db.relationship('Interest', secondary=user_interests, backref='users')
     
     def to_dict(self):
         return {
@@ -28,27 +74,69 @@ class User(db.Model):
             'role': self.role,
             'state': self.state,
             'district': self.district,
+            'city': self.city,
             'age': self.age,
             'interests': self.interests,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
 
+# Case-insensitive location filters in the companion catalog
+db.Index('ix_users_state_district_lower', db.func.lower(User.state), db.func.lower(User.district))
+
+
 class Companion(db.Model):
     __tablename__ = 'companions'
+    __table_args__ = (
+        # Keyset pagination of the available catalog for each sort order
+        db.Index('ix_companions_availability_rating_id', 'availability', 'rating', 'id'),
+        db.Index('ix_companions_availability_created_at_id', 'availability', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
     bio = db.Column(db.Text)
-    rating = db.Column(db.Float, default=0.0)
+    price_per_hour = db.Column(db.Integer, default=SESSION_PRICE, nullable=False)
+    # Average review rating, kept equal to rating_sum / rating_count by utils.ratings
+    rating = db.Column(db.Float, default=0.0, nullable=False)
+    rating_sum = db.Column(db.Integer, default=0, nullable=False)
+    rating_count = db.Column(db.Integer, default=0, nullable=False)
     image_url = db.Column(db.String(500))
+    # Small variant of an uploaded image_url, for catalog cards; None for external URLs
+    thumbnail_url = db.Column(db.String(500))
     availability = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     bookings = db.relationship('Booking', foreign_keys='Booking.companion_id', backref='companion', cascade='all, delete-orphan')
     
-    def to_dict(self):
+    @classmethod
+    def with_relations(cls):
+        """Query that loads the owning user in the same statement"""
+        return cls.query.options(joinedload(cls.user))
+    
+    # Serialized field -> attribute path it reads, for ?fields= projections
+    FIELDS = {
+        'id': ('id',),
+        'user_id': ('user_id',),
+        'name': ('user', 'name'),
+        'state': ('user', 'state'),
+        'district': ('user', 'district'),
+        'age': ('user', 'age'),
+        'interests': ('user', 'interests'),
+        'bio': ('bio',),
+        'price_per_hour': ('price_per_hour',),
+        'rating': ('rating',),
+        'rating_count': ('rating_count',),
+        'image_url': ('image_url',),
+        'thumbnail_url': ('thumbnail_url',),
+        'availability': ('availability',),
+        'created_at': ('created_at',),
+    }
+    
+    def to_dict(self, fields=None):
+        if fields is not None:
+            return _project(self, fields)
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -58,30 +146,121 @@ class Companion(db.Model):
             'age': self.user.age if self.user else None,
             'interests': self.user.interests if self.user else None,
             'bio': self.bio,
+            'price_per_hour': self.price_per_hour,
             'rating': self.rating,
+            'rating_count': self.rating_count,
             'image_url': self.image_url,
+            'thumbnail_url': self.thumbnail_url,
             'availability': self.availability,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
 
+class LocationFacet(db.Model):
+    """Available companions per state and district, kept current on every write.
+
+    Keyed by the trimmed, lowercased names, the way the catalog filter
+    compares them, so "Kerala" and "kerala" are one facet. state and
+    district keep the spelling first seen, for display.
+    """
+    __tablename__ = 'location_facets'
+    
+    state_key = db.Column(db.String(100), primary_key=True)
+    district_key = db.Column(db.String(100), primary_key=True)  # '' when the profile has none
+    state = db.Column(db.String(100), nullable=False)
+    district = db.Column(db.String(100), nullable=False)
+    available_count = db.Column(db.Integer, default=0, nullable=False)
+
+
+def _session_end(context):
+    """Default for Booking.ends_at: start plus the session length"""
+    params = context.get_current_parameters()
+    return params['date'] + timedelta(minutes=params.get('duration') or SESSION_MINUTES)
+
+
 class Booking(db.Model):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # Admin listing: newest first within a status, and date-range filters
+        db.Index('ix_bookings_status_id', 'status', 'id'),
+        db.Index('ix_bookings_date', 'date'),
+        # Overlap checks and free-slot lookups for one companion
+        db.Index('ix_bookings_companion_id_date', 'companion_id', 'date'),
+        # Session expiry sweep: approved bookings whose end has passed
+        db.Index('ix_bookings_status_ends_at', 'status', 'ends_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     companion_id = db.Column(db.Integer, db.ForeignKey('companions.id'), nullable=False)
     date = db.Column(db.DateTime, nullable=False)
-    duration = db.Column(db.Integer, default=15, nullable=False)  # Fixed 15 minutes
-    price = db.Column(db.Integer, default=299, nullable=False)  # Fixed ₹299
+    duration = db.Column(db.Integer, default=SESSION_MINUTES, nullable=False)  # Fixed 15 minutes
+    price = db.Column(db.Integer, default=SESSION_PRICE, nullable=False)  # Fixed ₹299
     status = db.Column(db.Enum('pending', 'approved', 'rejected', 'completed', name='booking_status'), default='pending', nullable=False)
     chat_enabled = db.Column(db.Boolean, default=False)
+    ends_at = db.Column(db.DateTime, default=_session_end, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Relationships
-    messages = db.relationship('ChatMessage', backref='booking', cascade='all, delete-orphan')
+    # Relationships; the database cascades deletes, so they never load the transcript
+    messages = db.relationship('ChatMessage', backref='booking', cascade='all, delete-orphan', passive_deletes=True)
+    archive = db.relationship('ChatArchive', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
     
-    def to_dict(self):
+    @classmethod
+    def with_relations(cls):
+        """Query that loads the user, companion and companion's user in the same statement"""
+        return cls.query.options(
+            joinedload(cls.user),
+            joinedload(cls.companion).joinedload(Companion.user)
+        )
+    
+    @classmethod
+    def active_between(cls, companion_id, start, end):
+        """Slot-holding bookings of a companion that overlap [start, end).
+
+        Sessions are all SESSION_MINUTES long, so an overlap is a booking
+        starting less than one session before end-of-range, which keeps
+        this a plain range scan on the (companion_id, date) index.
+        """
+        return cls.query.filter(
+            cls.companion_id == companion_id,
+            cls.status.in_(ACTIVE_BOOKING_STATUSES),
+            cls.date > start - timedelta(minutes=SESSION_MINUTES),
+            cls.date < end
+        )
+    
+    @property
+    def chat_live(self):
+        """Chat is open: approved and not yet expired.
+
+        The session scheduler clears chat_enabled once a session ends; the
+        end time is still checked so chat closes on time if it runs late.
+        """
+        return bool(self.chat_enabled) and self.status == 'approved' and datetime.utcnow() < self.ends_at
+    
+    @property
+    def time_remaining(self):
+        """Whole seconds until the session ends"""
+        return max(0, int((self.ends_at - datetime.utcnow()).total_seconds()))
+    
+    # Serialized field -> attribute path it reads, for ?fields= projections
+    FIELDS = {
+        'id': ('id',),
+        'user_id': ('user_id',),
+        'user_name': ('user', 'name'),
+        'companion_id': ('companion_id',),
+        'companion_name': ('companion', 'user', 'name'),
+        'date': ('date',),
+        'duration': ('duration',),
+        'price': ('price',),
+        'status': ('status',),
+        'chat_enabled': ('chat_enabled',),
+        'ends_at': ('ends_at',),
+        'created_at': ('created_at',),
+    }
+    
+    def to_dict(self, fields=None):
+        if fields is not None:
+            return _project(self, fields)
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -93,20 +272,79 @@ class Booking(db.Model):
             'price': self.price,
             'status': self.status,
             'chat_enabled': self.chat_enabled,
+            'ends_at': self.ends_at.isoformat() if self.ends_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class Review(db.Model):
+    __tablename__ = 'reviews'
+    __table_args__ = (
+        db.CheckConstraint('rating BETWEEN 1 AND 5', name='ck_reviews_rating'),
+        # A companion's reviews, newest first
+        db.Index('ix_reviews_companion_id_id', 'companion_id', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # One review per booking
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id', ondelete='CASCADE'), nullable=False, unique=True)
+    companion_id = db.Column(db.Integer, db.ForeignKey('companions.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    rating = db.Column(db.Integer, nullable=False)
+    comment = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    user = db.relationship('User')
+    
+    @classmethod
+    def with_relations(cls):
+        """Query that loads the reviewer in the same statement"""
+        return cls.query.options(joinedload(cls.user))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'booking_id': self.booking_id,
+            'companion_id': self.companion_id,
+            'user_id': self.user_id,
+            'user_name': self.user.name if self.user else None,
+            'rating': self.rating,
+            'comment': self.comment,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
 
 class ChatMessage(db.Model):
     __tablename__ = 'chat_messages'
+    __table_args__ = (
+        # Keyset cursors page through one booking's messages by id
+        db.Index('ix_chat_messages_booking_id_id', 'booking_id', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=False)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id', ondelete='CASCADE'), nullable=False)
     sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     message = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
+    @classmethod
+    def with_relations(cls):
+        """Query that loads the sender in the same statement"""
+        return cls.query.options(joinedload(cls.sender))
+    
+    # Serialized field -> attribute path it reads, for ?fields= projections
+    FIELDS = {
+        'id': ('id',),
+        'booking_id': ('booking_id',),
+        'sender_id': ('sender_id',),
+        'sender_name': ('sender', 'name'),
+        'message': ('message',),
+        'created_at': ('created_at',),
+    }
+    
+    def to_dict(self, fields=None):
+        if fields is not None:
+            return _project(self, fields)
         return {
             'id': self.id,
             'booking_id': self.booking_id,
@@ -114,4 +352,31 @@ class ChatMessage(db.Model):
             'sender_name': self.sender.name if self.sender else None,
             'message': self.message,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+
+class ChatArchive(db.Model):
+    """Transcript of a completed booking, moved out of chat_messages.
+
+    The messages are stored as gzip-compressed JSON lines in their
+    serialized form, so reading them back needs no joins.
+    """
+    __tablename__ = 'chat_archives'
+    
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id', ondelete='CASCADE'), primary_key=True)
+    message_count = db.Column(db.Integer, nullable=False)
+    first_message_id = db.Column(db.Integer, nullable=False)
+    last_message_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.LargeBinary, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    @staticmethod
+    def pack(messages):
+        """Compress serialized messages (oldest first) into a payload"""
+        lines = '\n'.join(json.dumps(msg, separators=(',', ':')) for msg in messages)
+        return gzip.compress(lines.encode('utf-8'))
+    
+    def messages(self):
+        """Archived messages as ChatMessage.to_dict() rows, oldest first"""
+        lines = gzip.decompress(self.payload).decode('utf-8')
+        return [json.loads(line) for line in lines.split('\n') if line]
@@ -0,0 +1,47 @@
+"""Archive chat transcripts of completed bookings past the retention period.
+
+Run from the backend directory, e.g. daily from cron:
+
+    python -m scripts.archive_chats [--days 90] [--batch-size 500]
+
+Messages of bookings completed more than --days ago (CHAT_RETENTION_DAYS)
+move from chat_messages into compressed chat_archives rows; the chat
+history endpoint keeps serving them. When chat_messages is partitioned
+(migration 0008) this also creates upcoming monthly partitions and drops
+old ones that archiving has emptied.
+"""
+import argparse
+import os
+
+# One-off job: no background session scheduler or chat event listener
+os.environ.setdefault('SESSION_SCHEDULER', 'off')
+os.environ.setdefault('CHAT_PUBSUB', 'local')
+
+from datetime import datetime, timedelta
+from app import create_app
+from database import db
+from utils.chat_archive import archive_completed_chats, maintain_partitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=None, help='retention period (default CHAT_RETENTION_DAYS)')
+    parser.add_argument('--batch-size', type=int, default=None, help='bookings per transaction (default CHAT_ARCHIVE_BATCH)')
+    args = parser.parse_args()
+
+    app = create_app()
+    days = args.days if args.days is not None else app.config['CHAT_RETENTION_DAYS']
+    batch_size = args.batch_size or app.config['CHAT_ARCHIVE_BATCH']
+
+    with app.app_context():
+        totals = archive_completed_chats(days, batch_size)
+        print(f"Archived {totals['messages']} messages of {totals['bookings']} bookings")
+
+        with db.engine.begin() as connection:
+            partitions = maintain_partitions(connection, drop_before=datetime.utcnow() - timedelta(days=days))
+        if partitions is not None:
+            print(f"Partitions ready: {len(partitions['created'])}, dropped: {', '.join(partitions['dropped']) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Backfill normalized interest tags from the legacy User.interests strings.
+
+Run from the backend directory:
+
+    python -m scripts.backfill_interests [--batch-size 500]
+
+Safe to re-run: each user's tags are rebuilt from their interests string.
+"""
+import argparse
+import os
+
+# One-off job: no background session scheduler or chat event listener
+os.environ.setdefault('SESSION_SCHEDULER', 'off')
+os.environ.setdefault('CHAT_PUBSUB', 'local')
+
+from app import create_app
+from database import db
+from models import User
+from utils.interests import set_user_interests
+
+
+def backfill_interests(batch_size=500):
+    """Rebuild interest tags for every user, committing once per batch"""
+    last_id = 0
+    processed = 0
+    while True:
+        users = (
+            User.query
+            .filter(User.id > last_id)
+            .order_by(User.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not users:
+            break
+
+        for user in users:
+            set_user_interests(user, user.interests)
+        db.session.commit()
+
+        processed += len(users)
+        last_id = users[-1].id
+        print(f"Backfilled interests for {processed} users")
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        backfill_interests(args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
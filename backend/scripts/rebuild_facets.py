@@ -0,0 +1,34 @@
+"""Recount the location facets summary table from companions and users.
+
+Run from the backend directory:
+
+    python -m scripts.rebuild_facets
+
+Companion writes keep the counts current; run this after bulk imports,
+direct SQL changes, or to fix drift.
+"""
+import argparse
+import os
+
+# One-off job: no background session scheduler or chat event listener
+os.environ.setdefault('SESSION_SCHEDULER', 'off')
+os.environ.setdefault('CHAT_PUBSUB', 'local')
+
+from app import create_app
+from database import db
+from utils.facets import rebuild_location_facets, location_facets
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args()
+
+    app = create_app()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            rebuild_location_facets(connection)
+        states = location_facets()
+    print(f"Counted {sum(state['count'] for state in states)} available companions in {len(states)} states")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""Rebuild the companion full-text search index from scratch.
+
+Run from the backend directory:
+
+    python -m scripts.rebuild_search
+
+Profile writes keep the index current; run this after bulk imports or
+direct SQL changes to companions or users.
+"""
+import argparse
+import os
+
+# One-off job: no background session scheduler or chat event listener
+os.environ.setdefault('SESSION_SCHEDULER', 'off')
+os.environ.setdefault('CHAT_PUBSUB', 'local')
+
+from sqlalchemy import text
+from app import create_app
+from database import db
+from utils.search import create_search_schema, reindex_companions
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args()
+
+    app = create_app()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            create_search_schema(connection)
+            reindex_companions(connection)
+            count = connection.execute(text('SELECT count(*) FROM companion_search')).scalar()
+    print(f"Indexed {count} companions")
+
+
+if __name__ == '__main__':
+    main()
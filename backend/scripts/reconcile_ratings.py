@@ -0,0 +1,33 @@
+"""Recompute companion rating aggregates from the reviews table.
+
+Run from the backend directory, e.g. nightly from cron:
+
+    python -m scripts.reconcile_ratings [--batch-size 1000]
+
+Reviews keep rating_sum, rating_count and rating current as they are
+written; this fixes any drift left by direct SQL changes or bulk imports.
+"""
+import argparse
+import os
+
+# One-off job: no background session scheduler or chat event listener
+os.environ.setdefault('SESSION_SCHEDULER', 'off')
+os.environ.setdefault('CHAT_PUBSUB', 'local')
+
+from app import create_app
+from utils.ratings import reconcile_ratings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=1000, help='companions per UPDATE')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        fixed = reconcile_ratings(args.batch_size)
+    print(f"Corrected the rating aggregates of {fixed} companions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Run the booking session scheduler as its own process.
+
+Run from the backend directory:
+
+    python -m scripts.session_worker [--sweep-seconds 30] [--once]
+
+Use this with SESSION_SCHEDULER=off on the web servers so only one
+process completes ended sessions.
+"""
+import argparse
+import os
+
+# This process owns the scheduler, so don't also start the in-app thread
+os.environ['SESSION_SCHEDULER'] = 'off'
+
+from app import create_app
+from utils.session_scheduler import session_scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sweep-seconds', type=int, default=None)
+    parser.add_argument('--once', action='store_true', help='complete ended sessions once and exit')
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.sweep_seconds:
+        session_scheduler.sweep_interval = args.sweep_seconds
+
+    if args.once:
+        with app.app_context():
+            expired = session_scheduler.expire_due()
+        print(f"Completed {len(expired)} ended sessions")
+        return
+
+    try:
+        session_scheduler.run_forever(app)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
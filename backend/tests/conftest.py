@@ -0,0 +1,126 @@
+import os
+import sys
+from datetime import datetime, timedelta
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from database import db
+from models import Booking, ChatMessage, Companion, User, SESSION_MINUTES
+from utils.time_utils import next_slot_start
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The app on a fresh SQLite file, without background threads or rate limits"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('DB_AUTO_CREATE', '1')
+    monkeypatch.setenv('SESSION_SCHEDULER', 'off')
+    monkeypatch.setenv('CHAT_PUBSUB', 'local')
+    monkeypatch.setenv('RATE_LIMIT_ENABLED', '0')
+    monkeypatch.setenv('BCRYPT_WORKERS', '0')
+    monkeypatch.setenv('MEDIA_ROOT', str(tmp_path / 'media'))
+    app = create_app()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+class Factory:
+    """Creates rows directly and mints tokens.
+
+    Each call opens its own app context, so requests made afterwards
+    through the test client resolve their caller from scratch.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.users = 0
+
+    def user(self, role='user', **fields):
+        self.users += 1
+        with self.app.app_context():
+            user = User(
+                name=fields.pop('name', f'User {self.users}'),
+                email=f'user{self.users}@example.com',
+                password='not-a-real-hash',
+                role=role,
+                **fields
+            )
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+
+    def companion(self, rating=0.0, created_at=None, availability=True, **user_fields):
+        """(user id, companion id) of a new companion"""
+        user_id = self.user(role='companion', **user_fields)
+        with self.app.app_context():
+            companion = Companion(
+                user_id=user_id, bio='', rating=rating, availability=availability,
+                created_at=created_at or datetime.utcnow()
+            )
+            db.session.add(companion)
+            db.session.commit()
+            return user_id, companion.id
+
+    def booking(self, user_id, companion_id, date=None, status='pending'):
+        with self.app.app_context():
+            booking = Booking(
+                user_id=user_id, companion_id=companion_id, date=date or slot(1),
+                status=status, chat_enabled=status == 'approved'
+            )
+            db.session.add(booking)
+            db.session.commit()
+            return booking.id
+
+    def messages(self, booking_id, sender_id, count):
+        with self.app.app_context():
+            db.session.add_all([
+                ChatMessage(booking_id=booking_id, sender_id=sender_id, message=f'message {n}')
+                for n in range(count)
+            ])
+            db.session.commit()
+
+    def headers(self, user_id, role='user', companion_id=None):
+        with self.app.app_context():
+            claims = {'role': role}
+            if companion_id is not None:
+                claims['companion_id'] = companion_id
+            token = create_access_token(identity=str(user_id), additional_claims=claims)
+        return {'Authorization': f'Bearer {token}'}
+
+    def admin_headers(self):
+        return self.headers(self.user(role='admin'), role='admin')
+
+
+@pytest.fixture
+def factory(app):
+    return Factory(app)
+
+
+def slot(days=1, index=0):
+    """Start of a bookable slot: on the grid, days from now"""
+    step = timedelta(minutes=SESSION_MINUTES)
+    return next_slot_start(datetime.utcnow() + timedelta(days=days), step) + index * step
+
+
+def follow(client, path, key, headers=None, **params):
+    """Every item of a cursor-paged list endpoint, page by page"""
+    items, cursor = [], None
+    while True:
+        query = dict(params, **({'cursor': cursor} if cursor else {}))
+        response = client.get(path, query_string=query, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        items.extend(body[key])
+        cursor = body['next_cursor']
+        if not cursor:
+            return items
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+import pytest
+from database import db
+from models import Booking
+from conftest import slot
+
+
+def test_overlapping_booking_is_rejected(client, factory):
+    _, companion_id = factory.companion()
+    first, second = factory.user(), factory.user()
+    start = slot()
+
+    response = client.post('/api/bookings', json={'companion_id': companion_id, 'date': start.isoformat()},
+                           headers=factory.headers(first))
+    assert response.status_code == 201
+
+    response = client.post('/api/bookings', json={'companion_id': companion_id, 'date': start.isoformat()},
+                           headers=factory.headers(second))
+    assert response.status_code == 409
+
+    # The next slot doesn't overlap
+    response = client.post('/api/bookings', json={'companion_id': companion_id, 'date': slot(index=1).isoformat()},
+                           headers=factory.headers(second))
+    assert response.status_code == 201
+
+
+def test_rejected_booking_frees_its_slot(client, factory):
+    _, companion_id = factory.companion()
+    start = slot()
+    factory.booking(factory.user(), companion_id, start, status='rejected')
+
+    response = client.post('/api/bookings', json={'companion_id': companion_id, 'date': start.isoformat()},
+                           headers=factory.headers(factory.user()))
+    assert response.status_code == 201
+
+
+@pytest.mark.parametrize('date', [
+    (datetime.utcnow() - timedelta(days=1)).replace(minute=0, second=0, microsecond=0),
+    slot() + timedelta(minutes=7),
+    slot() + timedelta(seconds=30),
+])
+def test_booking_must_start_a_future_slot(client, factory, date):
+    _, companion_id = factory.companion()
+    response = client.post('/api/bookings', json={'companion_id': companion_id, 'date': date.isoformat()},
+                           headers=factory.headers(factory.user()))
+    assert response.status_code == 400
+
+
+def test_batch_moderation_reports_each_id(app, client, factory):
+    user_id = factory.user()
+    _, companion_id = factory.companion()
+    pending = factory.booking(user_id, companion_id, slot(index=0))
+    approved = factory.booking(user_id, companion_id, slot(index=1), status='approved')
+    completed = factory.booking(user_id, companion_id, slot(index=2), status='completed')
+    ids = [pending, approved, completed, 999999, pending]
+
+    response = client.put('/api/bookings/batch', json={'action': 'approve', 'ids': ids},
+                          headers=factory.admin_headers())
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['updated'] == 1
+    assert body['results'] == [
+        {'id': pending, 'result': 'approved'},
+        {'id': approved, 'result': 'skipped', 'status': 'approved'},
+        {'id': completed, 'result': 'skipped', 'status': 'completed'},
+        {'id': 999999, 'result': 'not_found'},
+    ]
+    with app.app_context():
+        booking = db.session.get(Booking, pending)
+        assert booking.status == 'approved' and booking.chat_enabled
+
+    response = client.put('/api/bookings/batch', json={'action': 'reject', 'ids': [pending, approved, completed]},
+                          headers=factory.admin_headers())
+    assert [result['result'] for result in response.get_json()['results']] == ['rejected', 'rejected', 'skipped']
+
+
+def test_batch_moderation_needs_admin(client, factory):
+    user_id = factory.user()
+    response = client.put('/api/bookings/batch', json={'action': 'approve', 'ids': [1]},
+                          headers=factory.headers(user_id))
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize('status, allowed', [
+    ('pending', True), ('approved', True), ('completed', False), ('rejected', False),
+])
+def test_single_and_batch_reject_agree(client, factory, status, allowed):
+    user_id = factory.user()
+    _, companion_id = factory.companion()
+    single = factory.booking(user_id, companion_id, slot(index=0), status=status)
+    batched = factory.booking(user_id, companion_id, slot(index=1), status=status)
+    headers = factory.admin_headers()
+
+    response = client.put(f'/api/bookings/{single}/reject', headers=headers)
+    assert response.status_code == (200 if allowed else 409)
+
+    response = client.put('/api/bookings/batch', json={'action': 'reject', 'ids': [batched]}, headers=headers)
+    assert response.get_json()['results'][0]['result'] == ('rejected' if allowed else 'skipped')
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+import pytest
+from database import db
+from models import ChatArchive
+from utils.chat_archive import archive_completed_chats
+
+MESSAGES = 7
+PAGE = 3
+
+
+@pytest.fixture
+def transcript(app, factory):
+    """(booking id, headers) of a completed booking with MESSAGES messages, ended long ago"""
+    user_id = factory.user()
+    _, companion_id = factory.companion()
+    booking_id = factory.booking(user_id, companion_id, datetime.utcnow() - timedelta(days=200), status='completed')
+    factory.messages(booking_id, user_id, MESSAGES)
+    return booking_id, factory.headers(user_id)
+
+
+def page(client, booking_id, headers, **cursor):
+    response = client.get(f'/api/chat/bookings/{booking_id}/messages',
+                          query_string=dict(limit=PAGE, **cursor), headers=headers)
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    return [msg['id'] for msg in body['messages']], body['has_more']
+
+
+def walk(client, booking_id, headers):
+    """Pages seen going back with before_id from the latest, then forward with after_id from the oldest"""
+    backwards = [page(client, booking_id, headers)]
+    while backwards[-1][1]:
+        backwards.append(page(client, booking_id, headers, before_id=backwards[-1][0][0]))
+    forwards = [page(client, booking_id, headers, after_id=backwards[-1][0][0] - 1)]
+    while forwards[-1][1]:
+        forwards.append(page(client, booking_id, headers, after_id=forwards[-1][0][-1]))
+    return backwards, forwards
+
+
+def test_pages_cover_the_transcript_in_order(client, transcript):
+    booking_id, headers = transcript
+    backwards, forwards = walk(client, booking_id, headers)
+
+    ids = [msg_id for ids, _ in reversed(backwards) for msg_id in ids]
+    assert len(ids) == MESSAGES and ids == sorted(ids)
+    assert [len(ids) for ids, _ in backwards] == [3, 3, 1]
+    assert [msg_id for ids, _ in forwards for msg_id in ids] == ids
+
+
+def test_archived_transcript_pages_like_the_live_one(app, client, transcript):
+    booking_id, headers = transcript
+    live = walk(client, booking_id, headers)
+
+    with app.app_context():
+        moved = archive_completed_chats(retention_days=90)
+        assert moved == {'bookings': 1, 'messages': MESSAGES}
+        assert db.session.get(ChatArchive, booking_id) is not None
+
+    assert walk(client, booking_id, headers) == live
+
+
+def test_after_id_and_before_id_together_are_refused(client, transcript):
+    booking_id, headers = transcript
+    response = client.get(f'/api/chat/bookings/{booking_id}/messages',
+                          query_string={'after_id': 1, 'before_id': 5}, headers=headers)
+    assert response.status_code == 400
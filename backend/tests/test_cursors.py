@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+import pytest
+from conftest import follow, slot
+
+
+@pytest.fixture
+def catalog(factory):
+    """Companions with tied ratings and creation times, plus one unavailable"""
+    created = datetime(2026, 1, 1)
+    ratings = [4.5, 4.5, 3.0, 5.0, 3.0, 4.5, 0.0]
+    companions = [
+        factory.companion(rating=rating, created_at=created + timedelta(days=index // 2))[1]
+        for index, rating in enumerate(ratings)
+    ]
+    factory.companion(rating=5.0, availability=False)
+    return companions
+
+
+@pytest.mark.parametrize('sort', ['rating', 'newest'])
+def test_catalog_cursor_round_trip(client, catalog, sort):
+    everything = client.get('/api/companions', query_string={'sort': sort, 'limit': 100}).get_json()['companions']
+
+    paged = follow(client, '/api/companions', 'companions', sort=sort, limit=2)
+
+    assert [c['id'] for c in paged] == [c['id'] for c in everything]
+    assert sorted(c['id'] for c in paged) == sorted(catalog)
+    key = 'rating' if sort == 'rating' else 'created_at'
+    assert [(c[key], c['id']) for c in paged] == sorted(((c[key], c['id']) for c in paged), reverse=True)
+
+
+def test_catalog_cursor_is_tied_to_its_sort(client, catalog):
+    cursor = client.get('/api/companions', query_string={'sort': 'rating', 'limit': 2}).get_json()['next_cursor']
+
+    response = client.get('/api/companions', query_string={'sort': 'newest', 'cursor': cursor})
+    assert response.status_code == 400
+    response = client.get('/api/companions', query_string={'cursor': 'not-a-cursor'})
+    assert response.status_code == 400
+
+
+def test_admin_bookings_cursor_round_trip(client, factory):
+    user_id = factory.user()
+    _, companion_id = factory.companion()
+    statuses = ['pending', 'approved', 'rejected', 'pending', 'completed', 'pending']
+    ids = [factory.booking(user_id, companion_id, slot(index=n), status=status) for n, status in enumerate(statuses)]
+    headers = factory.admin_headers()
+
+    paged = follow(client, '/api/bookings/all', 'bookings', headers=headers, limit=2)
+    assert [b['id'] for b in paged] == sorted(ids, reverse=True)
+
+    pending = follow(client, '/api/bookings/all', 'bookings', headers=headers, limit=2, status='pending')
+    assert [b['id'] for b in pending] == sorted(
+        (booking_id for booking_id, status in zip(ids, statuses) if status == 'pending'), reverse=True
+    )
+
+
+def test_admin_bookings_rejects_bad_cursor(client, factory):
+    response = client.get('/api/bookings/all', query_string={'cursor': 'garbage'}, headers=factory.admin_headers())
+    assert response.status_code == 400
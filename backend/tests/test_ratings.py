@@ -0,0 +1,75 @@
+from database import db
+from models import Companion
+
+
+def aggregates(app, companion_id):
+    with app.app_context():
+        companion = db.session.get(Companion, companion_id)
+        return companion.rating_sum, companion.rating_count, companion.rating
+
+
+def test_reviews_update_rating_aggregates(app, client, factory):
+    _, companion_id = factory.companion()
+    first, second = factory.user(), factory.user()
+    first_booking = factory.booking(first, companion_id, status='completed')
+    second_booking = factory.booking(second, companion_id, status='completed')
+
+    response = client.post(f'/api/bookings/{first_booking}/review', json={'rating': 5},
+                           headers=factory.headers(first))
+    assert response.status_code == 201
+    assert aggregates(app, companion_id) == (5, 1, 5.0)
+
+    client.post(f'/api/bookings/{second_booking}/review', json={'rating': 2, 'comment': 'late'},
+                headers=factory.headers(second))
+    assert aggregates(app, companion_id) == (7, 2, 3.5)
+
+
+def test_second_review_of_a_booking_is_refused(app, client, factory):
+    _, companion_id = factory.companion()
+    user_id = factory.user()
+    booking_id = factory.booking(user_id, companion_id, status='completed')
+    headers = factory.headers(user_id)
+
+    client.post(f'/api/bookings/{booking_id}/review', json={'rating': 4}, headers=headers)
+    response = client.post(f'/api/bookings/{booking_id}/review', json={'rating': 1}, headers=headers)
+
+    assert response.status_code == 409
+    assert aggregates(app, companion_id) == (4, 1, 4.0)
+
+
+def test_only_completed_bookings_can_be_reviewed(app, client, factory):
+    _, companion_id = factory.companion()
+    user_id = factory.user()
+    booking_id = factory.booking(user_id, companion_id, status='approved')
+
+    response = client.post(f'/api/bookings/{booking_id}/review', json={'rating': 4},
+                           headers=factory.headers(user_id))
+
+    assert response.status_code == 400
+    assert aggregates(app, companion_id) == (0, 0, 0.0)
+
+
+def test_deleting_a_reviewed_booking_takes_its_rating_out(app, client, factory):
+    _, companion_id = factory.companion()
+    first, second = factory.user(), factory.user()
+    kept = factory.booking(first, companion_id, status='completed')
+    deleted = factory.booking(second, companion_id, status='completed')
+    client.post(f'/api/bookings/{kept}/review', json={'rating': 4}, headers=factory.headers(first))
+    client.post(f'/api/bookings/{deleted}/review', json={'rating': 1}, headers=factory.headers(second))
+
+    response = client.delete(f'/api/bookings/{deleted}', headers=factory.headers(second))
+
+    assert response.status_code == 200
+    assert aggregates(app, companion_id) == (4, 1, 4.0)
+
+
+def test_deleting_an_unreviewed_booking_leaves_the_rating(app, client, factory):
+    _, companion_id = factory.companion()
+    first, second = factory.user(), factory.user()
+    reviewed = factory.booking(first, companion_id, status='completed')
+    unreviewed = factory.booking(second, companion_id, status='completed')
+    client.post(f'/api/bookings/{reviewed}/review', json={'rating': 3}, headers=factory.headers(first))
+
+    client.delete(f'/api/bookings/{unreviewed}', headers=factory.headers(second))
+
+    assert aggregates(app, companion_id) == (3, 1, 3.0)
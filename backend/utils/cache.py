@@ -0,0 +1,246 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request
+
+# Tag carried by every cached companion catalog page
+COMPANION_LIST_TAG = 'companions:list'
+
+
+def companion_tag(companion_id):
+    """Tag carried by every cached response that includes a companion"""
+    return f'companion:{companion_id}'
+
+
+class CacheBackend:
+    """Storage interface for the response cache.
+
+    Entries carry tags so writes can invalidate exactly the responses they
+    affect. Implement this to move the cache into a shared store (e.g.
+    Redis, with tags kept as sets) and pass it to init_cache().
+    """
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl, tags=()):
+        """Store a value for ttl seconds under the given tags"""
+        raise NotImplementedError
+
+    def invalidate_tags(self, tags):
+        """Drop every entry carrying any of the tags; return how many were dropped"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Drop every entry"""
+        raise NotImplementedError
+
+    def stats(self):
+        """Backend-specific counters"""
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Bounded in-process LRU with per-entry TTL"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tag_index = {}           # tag -> set of keys
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, tags=()):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, frozenset(tags))
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tag_index.get(tag, set())
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tag_index.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+
+class ResponseCache:
+    """Caches serialized JSON responses and counts hits and misses"""
+
+    def __init__(self, backend=None, default_ttl=60):
+        self.backend = backend or MemoryCacheBackend()
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def make_key(self, namespace, view_args, query_args, normalize=None):
+        """Build a cache key that ignores parameter order and blank values"""
+        params = {}
+        for name in query_args.keys():
+            values = sorted(v.strip() for v in query_args.getlist(name) if v and v.strip())
+            if values:
+                params[name] = values
+        if normalize:
+            params = normalize(params)
+        parts = [f'{name}={value}' for name, value in sorted(view_args.items())]
+        parts += [f'{name}={",".join(values)}' for name, values in sorted(params.items())]
+        return f'{namespace}?{"&".join(parts)}'
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None, tags=()):
+        self.backend.set(key, value, ttl or self.default_ttl, tags)
+
+    def invalidate(self, *tags):
+        dropped = self.backend.invalidate_tags(tags)
+        with self._lock:
+            self.invalidations += dropped
+        return dropped
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
+        stats.update(self.backend.stats())
+        return stats
+
+
+response_cache = ResponseCache()
+
+
+def init_cache(app, backend=None):
+    """Configure the response cache from CACHE_DEFAULT_TTL / CACHE_MAX_ENTRIES"""
+    response_cache.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 60)
+    response_cache.backend = backend or MemoryCacheBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+
+
+def cached_response(namespace, tags=None, ttl=None, normalize=None):
+    """Cache successful JSON responses of a public GET view.
+
+    tags(view_args, payload) returns the extra tags for an entry; every
+    entry is also tagged with its namespace. normalize(params) may rewrite
+    the parsed query parameters so equivalent requests share a key.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = response_cache.make_key(namespace, kwargs, request.args, normalize)
+            entry = response_cache.get(key)
+            if entry is not None:
+                body, status = entry
+                response = current_app.response_class(body, status=status, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = current_app.make_response(fn(*args, **kwargs))
+            if response.status_code == 200:
+                entry_tags = {namespace}
+                if tags:
+                    entry_tags.update(tags(kwargs, response.get_json()))
+                response_cache.set(key, (response.get_data(), response.status_code), ttl, entry_tags)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_response(max_age=None):
+    """Give successful responses an ETag and answer If-None-Match with 304.
+
+    Without max_age clients must revalidate on every use, which costs a
+    304 with no body when nothing changed. Put it above cached_response so
+    cache hits are tagged too.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            response = current_app.make_response(fn(*args, **kwargs))
+            if response.status_code == 200:
+                response.add_etag()
+                response.cache_control.public = True
+                if max_age is None:
+                    response.cache_control.no_cache = True
+                else:
+                    response.cache_control.max_age = max_age
+                response.make_conditional(request)
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate_companion(companion_id, listing_changed=False):
+    """Drop cached responses affected by a change to one companion.
+
+    The companion's detail entry and every catalog page that contains it
+    are always dropped. Pass listing_changed=True when the change can move
+    the companion into pages it wasn't on (created, availability, price,
+    location or interests changed) and all catalog pages must go.
+    """
+    tags = [companion_tag(companion_id)]
+    if listing_changed:
+        tags.append(COMPANION_LIST_TAG)
+    return response_cache.invalidate(*tags)
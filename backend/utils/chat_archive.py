@@ -0,0 +1,176 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import delete, text
+from database import db
+from models import Booking, ChatArchive, ChatMessage
+
+logger = logging.getLogger(__name__)
+
+# Monthly partitions of chat_messages are named like chat_messages_y2026m10
+PARTITION_PREFIX = 'chat_messages_y'
+
+
+def archive_completed_chats(retention_days, batch_size=500, now=None):
+    """Move messages of completed bookings that ended over retention_days ago into chat_archives.
+
+    Bookings are handled batch_size at a time, in booking id order, with one
+    commit per batch: each batch reads its messages in one query, writes one
+    compressed archive row per booking and deletes the moved rows with a
+    single DELETE. Returns {'bookings': n, 'messages': n}.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=retention_days)
+    has_messages = db.session.query(ChatMessage.id).filter(ChatMessage.booking_id == Booking.id).exists()
+    totals = {'bookings': 0, 'messages': 0}
+    last_id = 0
+
+    while True:
+        booking_ids = [
+            booking_id for (booking_id,) in db.session.query(Booking.id)
+            .filter(Booking.status == 'completed', Booking.ends_at < cutoff, Booking.id > last_id, has_messages)
+            .order_by(Booking.id)
+            .limit(batch_size)
+            .all()
+        ]
+        if not booking_ids:
+            break
+        last_id = booking_ids[-1]
+
+        by_booking = defaultdict(list)
+        for message in (ChatMessage.with_relations()
+                        .filter(ChatMessage.booking_id.in_(booking_ids))
+                        .order_by(ChatMessage.booking_id, ChatMessage.id)):
+            by_booking[message.booking_id].append(message.to_dict())
+
+        # A booking archived before may have gained rows since (e.g. a late insert)
+        existing = {
+            archive.booking_id: archive
+            for archive in ChatArchive.query.filter(ChatArchive.booking_id.in_(list(by_booking)))
+        }
+        for booking_id, messages in by_booking.items():
+            archive = existing.get(booking_id)
+            if archive is not None:
+                seen = {msg['id'] for msg in messages}
+                messages = sorted(
+                    [msg for msg in archive.messages() if msg['id'] not in seen] + messages,
+                    key=lambda msg: msg['id']
+                )
+            else:
+                archive = ChatArchive(booking_id=booking_id)
+                db.session.add(archive)
+            archive.payload = ChatArchive.pack(messages)
+            archive.message_count = len(messages)
+            archive.first_message_id = messages[0]['id']
+            archive.last_message_id = messages[-1]['id']
+            archive.archived_at = now
+
+        # Completed bookings take no new messages, so everything up to the
+        # newest row read here is exactly what was archived
+        moved = sum(len(messages) for messages in by_booking.values())
+        newest_id = max(messages[-1]['id'] for messages in by_booking.values())
+        db.session.execute(
+            delete(ChatMessage)
+            .where(ChatMessage.booking_id.in_(list(by_booking)), ChatMessage.id <= newest_id)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        totals['bookings'] += len(by_booking)
+        totals['messages'] += moved
+        logger.info('Archived %s messages of %s bookings', moved, len(by_booking))
+
+    return totals
+
+
+def transcript(booking, hot_query):
+    """Every message of a booking, archived and live, oldest first, as dicts.
+
+    Archives only exist for completed bookings, so other bookings skip the
+    lookup. hot_query selects the booking's rows still in chat_messages.
+    Returns None when the booking has no archive, so callers can page the
+    live table with SQL as usual.
+    """
+    if booking.status != 'completed':
+        return None
+    archive = db.session.get(ChatArchive, booking.id)
+    if archive is None:
+        return None
+    messages = archive.messages()
+    archived_ids = {msg['id'] for msg in messages}
+    messages.extend(msg.to_dict() for msg in hot_query.order_by(ChatMessage.id) if msg.id not in archived_ids)
+    messages.sort(key=lambda msg: msg['id'])
+    return messages
+
+
+# --- Optional monthly range partitioning of chat_messages (Postgres only) ---
+
+def _month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def _next_month(month):
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{PARTITION_PREFIX}{month.year:04d}m{month.month:02d}'
+
+
+def is_partitioned(connection):
+    """Whether chat_messages is a partitioned table (see migration 0008)"""
+    if connection.dialect.name != 'postgresql':
+        return False
+    return connection.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('chat_messages')"
+    )).first() is not None
+
+
+def create_month_partitions(connection, start, end):
+    """Create the monthly partitions covering [start, end); existing ones are kept"""
+    month = _month_start(start)
+    created = []
+    while month < end:
+        upper = _next_month(month)
+        name = partition_name(month)
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF chat_messages "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        created.append(name)
+        month = upper
+    return created
+
+
+def maintain_partitions(connection, months_ahead=3, drop_before=None):
+    """Keep partitions ready for the coming months and drop empty old ones.
+
+    New messages land in the default partition if their month is missing,
+    so run this regularly (the archive job does). Partitions entirely
+    older than drop_before are dropped once archiving has emptied them.
+    Returns {'created': [...], 'dropped': [...]}, or None when the table
+    isn't partitioned.
+    """
+    if not is_partitioned(connection):
+        return None
+    now = datetime.utcnow()
+    end = _month_start(now)
+    for _ in range(months_ahead + 1):
+        end = _next_month(end)
+    created = create_month_partitions(connection, now, end)
+
+    dropped = []
+    if drop_before is not None:
+        names = connection.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass('chat_messages') AND c.relname LIKE :prefix ORDER BY c.relname"
+        ), {'prefix': PARTITION_PREFIX + '%'}).scalars().all()
+        limit = partition_name(_month_start(drop_before))
+        for name in names:
+            # Names sort chronologically; only months that ended before drop_before
+            if name >= limit:
+                break
+            if connection.execute(text(f'SELECT 1 FROM {name} LIMIT 1')).first() is None:
+                connection.execute(text(f'DROP TABLE {name}'))
+                dropped.append(name)
+    return {'created': created, 'dropped': dropped}
@@ -0,0 +1,101 @@
+import json
+import queue
+import threading
+from collections import defaultdict
+
+
+class ChatHubFull(Exception):
+    """This process already serves its maximum number of chat streams"""
+
+
+class ChatHub:
+    """Pub/sub hub for booking chat events.
+
+    Each streaming client subscribes to a booking channel and receives its
+    own bounded queue. Publishers never block: a subscriber that falls too
+    far behind is dropped and reconnects using its last event id.
+
+    Subscribers only live in this process. With a broker set (see
+    utils.chat_pubsub), publish() goes through it and every process's
+    listener calls deliver(), so streams on other workers get the event
+    too; without one, events reach this process's streams only.
+    """
+
+    def __init__(self, max_queue_size=100, max_subscribers=0):
+        self.max_queue_size = max_queue_size
+        # Each stream holds a server thread, so cap them (0 = no cap)
+        self.max_subscribers = max_subscribers
+        self.broker = None
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, booking_id):
+        """Register a new subscriber queue for a booking (ChatHubFull when at the cap)"""
+        subscriber = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            if self.max_subscribers and sum(len(s) for s in self._channels.values()) >= self.max_subscribers:
+                raise ChatHubFull()
+            self._channels[booking_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, booking_id, subscriber):
+        """Remove a subscriber queue from a booking"""
+        with self._lock:
+            subscribers = self._channels.get(booking_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._channels[booking_id]
+
+    def publish(self, booking_id, event, data, event_id=None):
+        """Send an event to the booking's subscribers in every process that has a broker"""
+        if self.broker is not None:
+            self.broker.publish(booking_id, event, data, event_id)
+        else:
+            self.deliver(booking_id, event, data, event_id)
+
+    def deliver(self, booking_id, event, data, event_id=None):
+        """Push an event to this process's subscribers of a booking"""
+        with self._lock:
+            subscribers = list(self._channels.get(booking_id, ()))
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event, data, event_id))
+            except queue.Full:
+                # Slow consumer: close its stream so it resyncs on reconnect
+                self.unsubscribe(booking_id, subscriber)
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                subscriber.put_nowait(('reconnect', {}, None))
+        return len(subscribers)
+
+    def deliver_all(self, event, data):
+        """Push an event to every subscriber in this process"""
+        with self._lock:
+            booking_ids = list(self._channels)
+        for booking_id in booking_ids:
+            self.deliver(booking_id, event, data)
+
+    def subscriber_count(self, booking_id=None):
+        """Number of open subscriptions, overall or for one booking"""
+        with self._lock:
+            if booking_id is not None:
+                return len(self._channels.get(booking_id, ()))
+            return sum(len(s) for s in self._channels.values())
+
+
+def format_sse(event, data, event_id=None):
+    """Serialize an event in text/event-stream format"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+chat_hub = ChatHub()
@@ -0,0 +1,136 @@
+import json
+import logging
+import select
+import threading
+from sqlalchemy import text
+from database import db
+from utils.chat_hub import chat_hub
+
+logger = logging.getLogger(__name__)
+
+# Postgres NOTIFY channel every process listens on
+CHANNEL = 'chat_events'
+# NOTIFY payloads must stay under 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+# Seconds between reconnect attempts of a dropped listener
+RECONNECT_SECONDS = 2
+
+
+def pubsub_backend(database_uri, configured=None):
+    """Chat pub/sub in use: CHAT_PUBSUB when set, else 'postgres' on Postgres and 'local' otherwise"""
+    if configured:
+        return configured
+    return 'postgres' if database_uri.startswith('postgres') else 'local'
+
+
+class PostgresChatBroker:
+    """Fans chat events out to every process through Postgres LISTEN/NOTIFY.
+
+    publish() sends one NOTIFY; a listener thread in each process receives
+    it and delivers it to that process's streams. Events too large for a
+    NOTIFY payload go out as 'reconnect', so those streams replay the
+    message from the database. After the listener loses its connection it
+    sends 'reconnect' to all local streams, since it may have missed events.
+    """
+
+    def __init__(self, engine, hub, channel=CHANNEL):
+        self.engine = engine
+        self.hub = hub
+        self.channel = channel
+        self._thread = None
+        self._stopped = threading.Event()
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+
+    def publish(self, booking_id, event, data, event_id=None):
+        payload = json.dumps({'booking_id': booking_id, 'event': event, 'data': data, 'id': event_id})
+        if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+            payload = json.dumps({'booking_id': booking_id, 'event': 'reconnect', 'data': {}, 'id': None})
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(text('SELECT pg_notify(:channel, :payload)'), {'channel': self.channel, 'payload': payload})
+        except Exception:
+            # The caller's write already committed; reach at least this process's streams
+            logger.exception('Could not relay chat event')
+            self.hub.deliver(booking_id, event, data, event_id)
+            return
+        self.published += 1
+
+    def _dispatch(self, payload):
+        message = json.loads(payload)
+        self.received += 1
+        self.hub.deliver(message['booking_id'], message['event'], message['data'], message['id'])
+
+    def _listen(self):
+        # A dedicated connection, detached so it doesn't hold a pool slot
+        connection = self.engine.raw_connection()
+        connection.detach()
+        try:
+            dbapi_connection = connection.dbapi_connection
+            dbapi_connection.autocommit = True
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f'LISTEN {self.channel}')
+            cursor.close()
+            if self.reconnects:
+                self.hub.deliver_all('reconnect', {})
+            while not self._stopped.is_set():
+                if not select.select([dbapi_connection], [], [], 5)[0]:
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    notify = dbapi_connection.notifies.pop(0)
+                    try:
+                        self._dispatch(notify.payload)
+                    except Exception:
+                        logger.exception('Bad chat event payload')
+        finally:
+            connection.close()
+
+    def listen_forever(self):
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception('Chat event listener lost its connection')
+                self.reconnects += 1
+                self._stopped.wait(RECONNECT_SECONDS)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self.listen_forever, name='chat-listener', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def stats(self):
+        return {
+            'backend': 'postgres',
+            'listening': self._thread is not None and self._thread.is_alive(),
+            'published': self.published,
+            'received': self.received,
+            'reconnects': self.reconnects
+        }
+
+
+def init_chat_pubsub(app):
+    """Connect the chat hub to a shared pub/sub and cap streams per process.
+
+    CHAT_PUBSUB=postgres (the default on Postgres) relays events through
+    LISTEN/NOTIFY, so any number of workers can serve chat streams;
+    'local' keeps them in-process, which only works with one worker.
+    CHAT_MAX_STREAMS caps open streams per process (0 = no cap).
+    """
+    chat_hub.max_subscribers = app.config.get('CHAT_MAX_STREAMS', 0)
+    backend = pubsub_backend(app.config['SQLALCHEMY_DATABASE_URI'], app.config.get('CHAT_PUBSUB'))
+    if backend == 'postgres':
+        with app.app_context():
+            chat_hub.broker = PostgresChatBroker(db.engine, chat_hub)
+        chat_hub.broker.start()
+    elif backend == 'local':
+        chat_hub.broker = None
+    else:
+        raise ValueError(f'Unknown CHAT_PUBSUB backend: {backend}')
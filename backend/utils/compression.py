@@ -0,0 +1,44 @@
+import gzip
+from flask import request
+
+# Bodies smaller than this gain little from gzip and cost CPU to compress
+DEFAULT_MIN_BYTES = 1024
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/csv', 'text/plain', 'application/x-ndjson')
+
+
+def _accepts_gzip():
+    return request.accept_encodings.quality('gzip') > 0
+
+
+def init_compression(app):
+    """Gzip JSON/text responses when the client accepts it.
+
+    Only buffered bodies of at least COMPRESS_MIN_BYTES are compressed;
+    streamed responses (chat streams, exports) pass through untouched so
+    they keep flushing as they go. COMPRESS_LEVEL sets the gzip level.
+    """
+    min_bytes = app.config.get('COMPRESS_MIN_BYTES', DEFAULT_MIN_BYTES)
+    level = app.config.get('COMPRESS_LEVEL', 6)
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES or response.is_streamed:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code < 200 or response.status_code >= 300
+                or 'Content-Encoding' in response.headers
+                or not _accepts_gzip()):
+            return response
+
+        body = response.get_data()
+        if len(body) < min_bytes:
+            return response
+
+        response.set_data(gzip.compress(body, compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        # The compressed bytes differ, so a strong ETag no longer describes them
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
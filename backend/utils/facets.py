@@ -0,0 +1,77 @@
+from sqlalchemy import text
+from database import db
+from models import LocationFacet
+from utils.cache import response_cache
+
+# Cache namespace of the facets endpoint, also the tag writes invalidate
+LOCATION_FACETS_TAG = 'companions:facets'
+
+# Works on Postgres and SQLite (3.24+); concurrent writers serialize on the row.
+# Keys are normalized in SQL, exactly as in _REBUILD.
+_ADJUST = text("""
+    INSERT INTO location_facets (state_key, district_key, state, district, available_count)
+    VALUES (lower(trim(:state)), lower(trim(:district)), trim(:state), trim(:district), :delta)
+    ON CONFLICT (state_key, district_key)
+    DO UPDATE SET available_count = location_facets.available_count + excluded.available_count
+""")
+
+_REBUILD = text("""
+    INSERT INTO location_facets (state_key, district_key, state, district, available_count)
+    SELECT lower(trim(u.state)), lower(trim(coalesce(u.district, ''))),
+           min(trim(u.state)), min(trim(coalesce(u.district, ''))), count(*)
+    FROM companions c JOIN users u ON u.id = c.user_id
+    WHERE c.availability AND u.state IS NOT NULL AND trim(u.state) <> ''
+    GROUP BY lower(trim(u.state)), lower(trim(coalesce(u.district, '')))
+""")
+
+
+def adjust_location_facet(user, delta):
+    """Add delta to the available count of the user's state and district.
+
+    Call it in the transaction that lists (+1) or unlists (-1) the user's
+    companion profile. Names are matched case-insensitively, ignoring
+    surrounding spaces. Profiles without a state aren't counted.
+    """
+    if not delta or not user or not user.state or not user.state.strip():
+        return
+    db.session.execute(_ADJUST, {'state': user.state, 'district': user.district or '', 'delta': delta})
+
+
+def rebuild_location_facets(connection):
+    """Recount every state and district from scratch (fixes drift)"""
+    connection.execute(text('DELETE FROM location_facets'))
+    connection.execute(_REBUILD)
+
+
+def location_facets():
+    """State -> district -> available companion counts, ordered by name ignoring case"""
+    states = {}
+    largest = {}  # state key -> count of the row whose spelling is shown
+    rows = (
+        LocationFacet.query
+        .filter(LocationFacet.available_count > 0)
+        .order_by(LocationFacet.state_key, LocationFacet.district_key)
+    )
+    for facet in rows:
+        state = states.setdefault(facet.state_key, {'state': facet.state, 'count': 0, 'districts': []})
+        # District rows may spell the state differently; show the most common spelling
+        if facet.available_count > largest.get(facet.state_key, 0):
+            largest[facet.state_key] = facet.available_count
+            state['state'] = facet.state
+        state['count'] += facet.available_count
+        if facet.district:
+            state['districts'].append({'district': facet.district, 'count': facet.available_count})
+    return list(states.values())
+
+
+def invalidate_location_facets():
+    return response_cache.invalidate(LOCATION_FACETS_TAG)
+
+
+def init_facets(app):
+    """Fill an empty summary table on boot when DB_AUTO_CREATE creates tables"""
+    if app.config.get('DB_AUTO_CREATE', True):
+        with app.app_context():
+            if LocationFacet.query.first() is None:
+                with db.engine.begin() as connection:
+                    rebuild_location_facets(connection)
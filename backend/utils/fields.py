@@ -0,0 +1,64 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only
+
+
+def parse_fields(args, model):
+    """Parse ?fields=a,b into the list of serialized fields to return.
+
+    Returns None when the parameter is absent, meaning the full payload.
+    'id' is always included. Raises ValueError on unknown names.
+    """
+    raw = args.get('fields', '').strip()
+    if not raw:
+        return None
+    fields = ['id']
+    for name in raw.split(','):
+        name = name.strip()
+        if name and name not in fields:
+            fields.append(name)
+    unknown = [name for name in fields if name not in model.FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(model.FIELDS)}")
+    return fields
+
+
+def _column_tree(model, fields, always):
+    # relationship path -> column names read on that entity
+    tree = {(): set(always)}
+    for name in fields:
+        path = model.FIELDS[name]
+        for depth in range(len(path)):
+            tree.setdefault(path[:depth], set())
+        tree[path[:-1]].add(path[-1])
+    return tree
+
+
+def _load_only(cls, columns):
+    # The primary key is always loaded so rows keep their identity
+    attrs = [getattr(cls, name) for name in sorted(columns)]
+    attrs += [getattr(cls, col.key) for col in inspect(cls).primary_key if col.key not in columns]
+    return load_only(*attrs)
+
+
+def _relationship_options(cls, path, tree, loader):
+    options = []
+    for child_path in tree:
+        if len(child_path) != len(path) + 1 or child_path[:len(path)] != path:
+            continue
+        attr = getattr(cls, child_path[-1])
+        target = attr.property.mapper.class_
+        nested = _relationship_options(target, child_path, tree, joinedload)
+        options.append(loader(attr).options(_load_only(target, tree[child_path]), *nested))
+    return options
+
+
+def load_fields(model, fields, always=(), loader=joinedload):
+    """Loader options that SELECT only the columns behind the given fields.
+
+    Related rows are fetched only when a field reads them, using loader
+    for the first hop (pass contains_eager when the query already joins
+    them) and joinedload below. always lists extra columns of model the
+    caller needs, such as the sort key for a cursor.
+    """
+    tree = _column_tree(model, fields, always)
+    return [_load_only(model, tree[()])] + _relationship_options(model, (), tree, loader)
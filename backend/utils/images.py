@@ -0,0 +1,68 @@
+import io
+from PIL import Image, ImageOps, UnidentifiedImageError
+from utils.storage import get_storage
+
+# Variant name -> (width, height); each is cropped to fill the box
+IMAGE_VARIANTS = {
+    'thumb': (160, 160),    # catalog cards
+    'card': (480, 480),     # profile and booking pages
+}
+# Longest side of the stored original
+ORIGINAL_MAX_SIZE = 1600
+JPEG_QUALITY = 82
+# Refuse to decode anything larger (decompression bombs)
+MAX_IMAGE_PIXELS = 40_000_000
+ACCEPTED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+
+class ImageError(ValueError):
+    """The upload isn't an image we accept"""
+
+
+def _encode(image):
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _open(data):
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.format not in ACCEPTED_FORMATS:
+            raise ImageError('Unsupported image format')
+        if image.width * image.height > MAX_IMAGE_PIXELS:
+            raise ImageError('Image dimensions are too large')
+        # JPEGs can decode straight at a reduced scale, much faster than full size
+        image.draft('RGB', (ORIGINAL_MAX_SIZE, ORIGINAL_MAX_SIZE))
+        image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise ImageError('File is not a valid image')
+
+    # Apply the EXIF orientation; re-encoding below drops the rest of the metadata (GPS etc.)
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+
+def store_image(data):
+    """Decode an upload once and store the original and every variant.
+
+    Returns {'original': url, 'thumb': url, 'card': url}. All are JPEGs
+    named by their content hash, so uploading the same picture again
+    reuses the stored files.
+    """
+    storage = get_storage()
+    image = _open(data)
+    original = image.copy()
+    original.thumbnail((ORIGINAL_MAX_SIZE, ORIGINAL_MAX_SIZE), Image.LANCZOS)
+    urls = {'original': storage.url(storage.save(_encode(original), 'jpg'))}
+    for name, size in IMAGE_VARIANTS.items():
+        variant = ImageOps.fit(original, size, Image.LANCZOS)
+        urls[name] = storage.url(storage.save(_encode(variant), 'jpg'))
+    return urls
@@ -0,0 +1,55 @@
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models import Interest, user_interests
+
+
+def parse_interests(raw):
+    """Split a comma-separated interests string into unique, normalized tag names"""
+    if not raw:
+        return []
+    names = []
+    for part in raw.split(','):
+        name = part.strip().lower()[:100]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_or_create_interests(names):
+    """Return Interest rows for the given names, creating any that are missing"""
+    if not names:
+        return []
+
+    existing = {tag.name: tag for tag in Interest.query.filter(Interest.name.in_(names)).all()}
+    for name in names:
+        if name in existing:
+            continue
+        # Another request may insert the same tag concurrently
+        try:
+            with db.session.begin_nested():
+                tag = Interest(name=name)
+                db.session.add(tag)
+            existing[name] = tag
+        except IntegrityError:
+            existing[name] = Interest.query.filter_by(name=name).one()
+    return [existing[name] for name in names]
+
+
+def set_user_interests(user, raw):
+    """Store the display string and sync the normalized tags for a user"""
+    user.interests = raw or ''
+    user.interest_tags = get_or_create_interests(parse_interests(raw))
+
+
+def users_with_interests(names):
+    """Subquery of user ids tagged with any of the given names (indexed lookup)"""
+    return (
+        db.select(user_interests.c.user_id)
+        .join(Interest, Interest.id == user_interests.c.interest_id)
+        .where(Interest.name.in_(names))
+    )
+
+
+def has_interests(user_id):
+    """EXISTS clause: the user (an id column) has at least one interest tag"""
+    return db.select(user_interests.c.user_id).where(user_interests.c.user_id == user_id).exists()
@@ -1,9 +1,20 @@
+from flask import current_app
 from flask_jwt_extended import create_access_token, get_jwt_identity
+from itsdangerous import URLSafeTimedSerializer, BadSignature
 from datetime import timedelta
 
-def generate_token(user_id, role):
-    """Generate JWT token with user identity"""
+# Chat stream tokens are signed apart from JWTs, so they can't authenticate anything else
+STREAM_TOKEN_SALT = 'chat-stream'
+
+def generate_token(user_id, role, companion_id=None):
+    """Generate JWT token with user identity.
+
+    Companion users also carry their companion profile id (None until the
+    profile exists) so requests don't have to look it up again.
+    """
     additional_claims = {"role": role}
+    if role == 'companion':
+        additional_claims["companion_id"] = companion_id
     access_token = create_access_token(
         identity=str(user_id),
         additional_claims=additional_claims,
@@ -14,3 +25,29 @@ def generate_token(user_id, role):
 def get_current_user_id():
     """Get current user ID from JWT token"""
     return int(get_jwt_identity())   # convert back to int
+
+
+def _stream_serializer():
+    return URLSafeTimedSerializer(current_app.config['JWT_SECRET_KEY'], salt=STREAM_TOKEN_SALT)
+
+
+def generate_stream_token(user_id, role, companion_id, booking_id):
+    """Short-lived token that opens one booking's chat stream.
+
+    EventSource can't send an Authorization header, so the stream takes
+    its credentials in the URL, where they end up in access logs. This
+    token only opens the given stream and expires after
+    CHAT_STREAM_TOKEN_SECONDS, unlike the 7-day access token.
+    """
+    return _stream_serializer().dumps({'u': user_id, 'r': role, 'c': companion_id, 'b': booking_id})
+
+
+def load_stream_token(token, booking_id):
+    """(user_id, role, companion_id) from a stream token for this booking, or None"""
+    try:
+        data = _stream_serializer().loads(token, max_age=current_app.config.get('CHAT_STREAM_TOKEN_SECONDS', 60))
+    except BadSignature:
+        return None
+    if data.get('b') != booking_id:
+        return None
+    return data['u'], data['r'], data['c']
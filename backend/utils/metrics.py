@@ -0,0 +1,211 @@
+import bisect
+import threading
+import time
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from database import db, pool_status
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# Statements kept per request for the slow-request log
+SLOW_LOG_MAX_STATEMENTS = 20
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f'{self.name}{_format_labels(self.labels, k)} {v}' for k, v in items]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *label_values, value):
+        with self._lock:
+            counts, total = self._values.get(label_values, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[label_values] = (counts, total + value)
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, (list(c), t)) for k, (c, t) in self._values.items())
+        lines = self.header()
+        for label_values, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                labels = _format_labels(self.labels + ('le',), label_values + (bound,))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {round(total, 6)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """The process's request, SQL and pool metrics"""
+
+    def __init__(self):
+        endpoint = ('blueprint', 'endpoint', 'method')
+        self.requests = Counter('http_requests_total', 'Requests by endpoint and status code', endpoint + ('status',))
+        self.latency = Histogram('http_request_duration_seconds', 'Request latency', endpoint)
+        self.in_flight = Gauge('http_requests_in_flight', 'Requests currently being handled')
+        self.sql_statements = Histogram('http_request_sql_statements', 'SQL statements per request', endpoint, SQL_COUNT_BUCKETS)
+        self.sql_seconds = Histogram('http_request_sql_seconds', 'Time spent in SQL per request', endpoint)
+        self.slow_requests = Counter('http_slow_requests_total', 'Requests slower than the slow-request threshold', endpoint)
+
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.latency, self.in_flight, self.sql_statements, self.sql_seconds, self.slow_requests):
+            lines += metric.render()
+        lines += _pool_lines()
+        return '\n'.join(lines) + '\n'
+
+
+def _pool_lines():
+    # Read at scrape time from the pool and database.pool_metrics
+    status = pool_status()
+    gauges = [
+        ('db_pool_size', 'Persistent connections in the pool', status.get('size')),
+        ('db_pool_checked_out', 'Connections currently checked out', status.get('checked_out')),
+        ('db_pool_overflow', 'Overflow connections currently open', status.get('overflow')),
+    ]
+    counters = [
+        ('db_pool_checkouts_total', 'Connection checkouts', status['checkouts']),
+        ('db_pool_timeouts_total', 'Checkouts that timed out waiting for a connection', status['timeouts']),
+        ('db_pool_wait_seconds_total', 'Time spent waiting for a connection', status['wait_seconds_total']),
+    ]
+    lines = []
+    for kind, entries in (('gauge', gauges), ('counter', counters)):
+        for name, help_text, value in entries:
+            if value is None:
+                continue
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {value}']
+    return lines
+
+
+metrics = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_query_start'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('metrics_query_start', None)
+    if started is None or not has_request_context() or 'metrics_started' not in g:
+        return
+    elapsed = time.perf_counter() - started
+    g.metrics_sql_count += 1
+    g.metrics_sql_seconds += elapsed
+    if len(g.metrics_sql_statements) < SLOW_LOG_MAX_STATEMENTS:
+        g.metrics_sql_statements.append((elapsed, statement))
+
+
+def _endpoint_labels():
+    # Route names, not raw paths, so label cardinality stays bounded
+    endpoint = request.endpoint or 'unmatched'
+    return (request.blueprint or '', endpoint, request.method)
+
+
+def init_metrics(app):
+    """Instrument every request and expose the results at GET /metrics.
+
+    Records per-endpoint latency, status codes, SQL statements and SQL
+    time, in-flight requests and pool usage. Requests slower than
+    METRICS_SLOW_REQUEST_MS are logged with their SQL. Set METRICS_TOKEN
+    to require `Authorization: Bearer <token>` on /metrics. Metrics are
+    per process: scrape each worker, or aggregate by instance.
+    """
+    slow_seconds = app.config.get('METRICS_SLOW_REQUEST_MS', 500) / 1000
+    token = app.config.get('METRICS_TOKEN')
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_count = 0
+        g.metrics_sql_seconds = 0.0
+        g.metrics_sql_statements = []
+        # Flagged on the request, not g: batch sub-requests share the outer request's g
+        request.environ['metrics.in_flight'] = True
+        metrics.in_flight.inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get('metrics_started')
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        labels = _endpoint_labels()
+        metrics.requests.inc(*labels, response.status_code)
+        metrics.latency.observe(*labels, value=elapsed)
+        metrics.sql_statements.observe(*labels, value=g.metrics_sql_count)
+        metrics.sql_seconds.observe(*labels, value=g.metrics_sql_seconds)
+
+        if elapsed >= slow_seconds:
+            metrics.slow_requests.inc(*labels)
+            statements = ''.join(
+                f'\n  [{duration * 1000:.1f} ms] {" ".join(statement.split())}'
+                for duration, statement in sorted(g.metrics_sql_statements, reverse=True)
+            )
+            current_app.logger.warning(
+                'Slow request: %s %s -> %s in %.1f ms (%s SQL statements, %.1f ms in SQL)%s',
+                request.method, request.path, response.status_code, elapsed * 1000,
+                g.metrics_sql_count, g.metrics_sql_seconds * 1000, statements
+            )
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(error=None):
+        if request.environ.pop('metrics.in_flight', False):
+            metrics.in_flight.inc(amount=-1)
+
+    @app.route('/metrics')
+    def get_metrics():
+        """Prometheus text exposition of this process's metrics"""
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -1,11 +1,126 @@
 import bcrypt
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_ROUNDS = 12
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+_settings = {
+    'rounds': DEFAULT_ROUNDS,
+    'workers': 0,        # 0 hashes inline on the calling thread
+    'timeout': 10,
+}
+_slots = threading.BoundedSemaphore(64)
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashing jobs are already waiting for a worker"""
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(password, hashed_password):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def _pool_context():
+    # Server workers already run threads (chat listener, scheduler, requests);
+    # forking them could copy a held lock into a pool process and deadlock it
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def _get_executor():
+    """Process pool, created lazily so each forked server worker gets its own"""
+    global _executor, _executor_pid
+    if _settings['workers'] <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(max_workers=_settings['workers'], mp_context=_pool_context())
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _run(fn, *args):
+    # Fail fast instead of letting a login burst queue up behind the pool
+    if not _slots.acquire(blocking=False):
+        raise PasswordHasherBusy('Too many password operations in progress, try again shortly')
+    try:
+        executor = _get_executor()
+        if executor is None:
+            return fn(*args)
+        return executor.submit(fn, *args).result(timeout=_settings['timeout'])
+    finally:
+        _slots.release()
+
+
+def calibrate_rounds(target_ms, minimum=MIN_ROUNDS, maximum=MAX_ROUNDS):
+    """Pick the highest bcrypt cost whose hash time stays within target_ms.
+
+    Each extra round doubles the work, so one timed hash at the minimum
+    cost is enough to extrapolate the rest.
+    """
+    started = time.perf_counter()
+    _hash('calibration-password', minimum)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    rounds = minimum
+    while rounds < maximum and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+
+def init_password_hashing(app):
+    """Configure cost factor and worker pool from the app config.
+
+    BCRYPT_ROUNDS fixes the cost; otherwise BCRYPT_TARGET_MS calibrates it
+    at startup. BCRYPT_WORKERS sizes this process's pool (default 1, 0
+    hashes inline); every server worker has its own, so gunicorn.conf.py
+    divides the cores among them. BCRYPT_MAX_PENDING caps how many
+    operations may wait for it.
+    """
+    global _slots
+    rounds = app.config.get('BCRYPT_ROUNDS')
+    target_ms = app.config.get('BCRYPT_TARGET_MS')
+    if rounds is None:
+        rounds = calibrate_rounds(target_ms) if target_ms else DEFAULT_ROUNDS
+
+    _settings['rounds'] = rounds
+    _settings['workers'] = app.config.get('BCRYPT_WORKERS', 1)
+    _settings['timeout'] = app.config.get('BCRYPT_TIMEOUT', 10)
+    max_pending = app.config.get('BCRYPT_MAX_PENDING') or max(1, _settings['workers']) * 4
+    _slots = threading.BoundedSemaphore(max_pending)
+    app.logger.info('Password hashing: bcrypt cost %s, %s workers', rounds, _settings['workers'])
+
 
 def hash_password(password):
     """Hash a password using bcrypt"""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+    return _run(_hash, password, _settings['rounds'])
+
 
 def verify_password(password, hashed_password):
     """Verify a password against its hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
\ No newline at end of file
+    return _run(_check, password, hashed_password)
+
+
+def needs_rehash(hashed_password):
+    """Whether a stored hash is weaker than the configured cost.
+
+    Only upgrades: workers whose calibration lands a round lower must not
+    keep rewriting hashes made by their neighbours.
+    """
+    try:
+        return int(hashed_password.split('$')[2]) < _settings['rounds']
+    except (IndexError, ValueError):
+        return True
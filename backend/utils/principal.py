@@ -0,0 +1,76 @@
+from flask import g
+from flask_jwt_extended import get_jwt
+from models import User, Companion
+from utils.jwt_handler import get_current_user_id
+
+_UNRESOLVED = object()
+
+
+class Principal:
+    """The authenticated caller, resolved at most once per request.
+
+    Identity and role come straight from the JWT. The User and Companion
+    rows are loaded lazily on first access and then reused by every
+    controller and helper in the same request.
+    """
+
+    def __init__(self, user_id, role, companion_id=_UNRESOLVED):
+        self.user_id = user_id
+        self.role = role
+        self._companion_id = companion_id
+        self._user = _UNRESOLVED
+        self._companion = _UNRESOLVED
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    @property
+    def user(self):
+        if self._user is _UNRESOLVED:
+            self._user = User.query.get(self.user_id)
+        return self._user
+
+    @property
+    def companion(self):
+        if self._companion is _UNRESOLVED:
+            query = Companion.with_relations()
+            if self._companion_id is _UNRESOLVED:
+                self._companion = query.filter_by(user_id=self.user_id).first()
+            else:
+                self._companion = query.filter_by(id=self._companion_id).first()
+            self._companion_id = self._companion.id if self._companion else None
+        return self._companion
+
+    @property
+    def companion_id(self):
+        """Companion profile id, from the token claim when present"""
+        if self.role != 'companion':
+            return None
+        if self._companion_id is _UNRESOLVED:
+            return self.companion.id if self.companion else None
+        return self._companion_id
+
+    def owns_booking(self, booking):
+        """Whether the caller is the booking's user or its companion"""
+        if booking.user_id == self.user_id:
+            return True
+        companion_id = self.companion_id
+        return companion_id is not None and booking.companion_id == companion_id
+
+
+def current_principal():
+    """Principal for the current request's JWT (requires @jwt_required)"""
+    principal = g.get('principal')
+    if principal is None:
+        claims = get_jwt()
+        # A missing or empty claim may be stale (profile created after the
+        # token was issued), so only a concrete id skips the lookup
+        companion_id = claims.get('companion_id')
+        principal = Principal(
+            get_current_user_id(),
+            claims.get('role'),
+            _UNRESOLVED if companion_id is None else companion_id
+        )
+        g.principal = principal
+    return principal
@@ -0,0 +1,32 @@
+from flask import g, has_request_context
+from sqlalchemy import event
+from database import db
+
+QUERY_COUNT_HEADER = 'X-SQL-Query-Count'
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.sql_query_count = g.get('sql_query_count', 0) + 1
+
+
+def init_query_counter(app):
+    """Count SQL statements per request and report them in a response header.
+
+    Enabled with SQL_QUERY_COUNT=1. Meant for development, so N+1 query
+    regressions show up in the browser's network tab.
+    """
+    if not app.config.get('SQL_QUERY_COUNT'):
+        return
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _count_query)
+
+    @app.before_request
+    def reset_query_count():
+        g.sql_query_count = 0
+
+    @app.after_request
+    def add_query_count_header(response):
+        response.headers[QUERY_COUNT_HEADER] = str(g.get('sql_query_count', 0))
+        return response
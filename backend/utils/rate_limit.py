@@ -0,0 +1,251 @@
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+
+RateLimitResult = namedtuple('RateLimitResult', ['allowed', 'remaining', 'retry_after'])
+
+
+class RateLimitBackend:
+    """Storage interface for rate-limit state.
+
+    Each method atomically records one request against key and reports
+    whether it is allowed. Implement this to share limits across server
+    processes (e.g. Redis, with each check as one Lua script) and pass it
+    to init_rate_limiter().
+    """
+
+    def token_bucket(self, key, capacity, refill_per_second):
+        """Take a token from a bucket of capacity refilled at a steady rate"""
+        raise NotImplementedError
+
+    def sliding_window(self, key, limit, window):
+        """Count a request in a sliding window of window seconds"""
+        raise NotImplementedError
+
+    def reset(self):
+        """Forget every key"""
+        raise NotImplementedError
+
+    def stats(self):
+        """Backend-specific counters"""
+        return {}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process state, bounded by evicting the least recently seen keys.
+
+    Limits apply per server process, so with N workers a client can get up
+    to N times the configured rate.
+    """
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._state = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def token_bucket(self, key, capacity, refill_per_second):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            if tokens >= 1:
+                self._put(key, (tokens - 1, now))
+                return RateLimitResult(True, int(tokens - 1), 0)
+            self._put(key, (tokens, now))
+            return RateLimitResult(False, 0, (1 - tokens) / refill_per_second)
+
+    def sliding_window(self, key, limit, window):
+        # Sliding window counter: the previous fixed window's count is
+        # weighted by how much of it still overlaps the sliding window
+        now = time.monotonic()
+        index, offset = divmod(now, window)
+        with self._lock:
+            start, current, previous = self._get(key, (index, 0, 0))
+            if start != index:
+                previous = current if index - start == 1 else 0
+                current = 0
+            estimate = previous * (1 - offset / window) + current
+            if estimate + 1 <= limit:
+                self._put(key, (index, current + 1, previous))
+                return RateLimitResult(True, int(limit - estimate - 1), 0)
+            self._put(key, (index, current, previous))
+            if current + 1 > limit or not previous:
+                retry_after = window - offset
+            else:
+                # Wait until the previous window's share has decayed enough
+                retry_after = window * (1 - (limit - current - 1) / previous) - offset
+            return RateLimitResult(False, 0, max(retry_after, 0))
+
+    def reset(self):
+        with self._lock:
+            self._state.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'keys': len(self._state), 'max_keys': self.max_keys, 'evictions': self.evictions}
+
+    def _get(self, key, default):
+        value = self._state.get(key)
+        if value is None:
+            return default
+        self._state.move_to_end(key)
+        return value
+
+    def _put(self, key, value):
+        self._state[key] = value
+        self._state.move_to_end(key)
+        while len(self._state) > self.max_keys:
+            self._state.popitem(last=False)
+            self.evictions += 1
+
+
+def _client_ip():
+    if current_app.config.get('RATE_LIMIT_TRUST_PROXY'):
+        return request.access_route[0] if request.access_route else request.remote_addr
+    return request.remote_addr
+
+
+# Request attributes a policy can be keyed by
+KEY_FUNCTIONS = {
+    'ip': _client_ip,
+    'user': get_jwt_identity,
+    'booking': lambda: (request.view_args or {}).get('booking_id'),
+}
+ALGORITHMS = ('token_bucket', 'sliding_window')
+
+
+class RateLimitPolicy:
+    """Allow limit requests per period seconds for each combination of keys.
+
+    token_bucket allows bursts of up to limit and refills steadily;
+    sliding_window allows at most limit in any period-long window.
+    """
+
+    def __init__(self, name, limit, period, keys=('ip',), algorithm='token_bucket'):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f'Unknown rate-limit algorithm: {algorithm}')
+        for key in keys:
+            if key not in KEY_FUNCTIONS:
+                raise ValueError(f'Unknown rate-limit key: {key}')
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.keys = tuple(keys)
+        self.algorithm = algorithm
+
+    def bucket_key(self):
+        parts = [f'{key}={KEY_FUNCTIONS[key]()}' for key in self.keys]
+        return f'{self.name}:{":".join(parts)}'
+
+    def describe(self):
+        return {'limit': self.limit, 'period': self.period, 'keys': list(self.keys), 'algorithm': self.algorithm}
+
+
+DEFAULT_POLICIES = {
+    # Each attempt costs a full bcrypt verify
+    'login': RateLimitPolicy('login', 10, 60, keys=('ip',)),
+    'signup': RateLimitPolicy('signup', 20, 3600, keys=('ip',), algorithm='sliding_window'),
+    # Every message is a committed row and a fan-out to chat streams
+    'chat_send': RateLimitPolicy('chat_send', 30, 60, keys=('user', 'booking')),
+}
+
+
+class RateLimiter:
+    """Applies named policies against a backend and counts the outcomes"""
+
+    def __init__(self, backend=None, policies=None):
+        self.backend = backend or MemoryRateLimitBackend()
+        self.policies = dict(policies or DEFAULT_POLICIES)
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def check(self, name):
+        """Record one request under a policy; return a RateLimitResult"""
+        policy = self.policies[name]
+        key = policy.bucket_key()
+        if policy.algorithm == 'token_bucket':
+            result = self.backend.token_bucket(key, policy.limit, policy.limit / policy.period)
+        else:
+            result = self.backend.sliding_window(key, policy.limit, policy.period)
+        with self._lock:
+            counters = self._counters.setdefault(name, {'allowed': 0, 'limited': 0})
+            counters['allowed' if result.allowed else 'limited'] += 1
+        return result
+
+    def reset(self):
+        self.backend.reset()
+        with self._lock:
+            self._counters.clear()
+
+    def stats(self):
+        with self._lock:
+            policies = {
+                name: dict(policy.describe(), **self._counters.get(name, {'allowed': 0, 'limited': 0}))
+                for name, policy in self.policies.items()
+            }
+        return {'enabled': self.enabled, 'policies': policies, 'backend': self.backend.stats()}
+
+
+rate_limiter = RateLimiter()
+
+
+def parse_rate(value):
+    """Parse 'limit/seconds', e.g. '10/60'"""
+    limit, _, period = value.partition('/')
+    return int(limit), int(period)
+
+
+def parse_rate_limits(value):
+    """Parse 'name=limit/seconds,...' into a dict of policy overrides"""
+    overrides = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, _, rate = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_POLICIES:
+            raise ValueError(f'Unknown rate-limit policy: {name}')
+        parse_rate(rate)
+        overrides[name] = rate.strip()
+    return overrides
+
+
+def init_rate_limiter(app, backend=None):
+    """Configure limits from the app config.
+
+    RATE_LIMIT_ENABLED switches limiting off entirely. RATE_LIMITS maps a
+    policy name to 'limit/seconds' to override its default rate.
+    """
+    rate_limiter.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+    rate_limiter.backend = backend or MemoryRateLimitBackend(app.config.get('RATE_LIMIT_MAX_KEYS', 10000))
+    rate_limiter.policies = dict(DEFAULT_POLICIES)
+    for name, rate in (app.config.get('RATE_LIMITS') or {}).items():
+        default = DEFAULT_POLICIES[name]
+        limit, period = parse_rate(rate)
+        rate_limiter.policies[name] = RateLimitPolicy(name, limit, period, default.keys, default.algorithm)
+
+
+def rate_limited(policy_name):
+    """Answer 429 with Retry-After once a caller exceeds the named policy.
+
+    Policies keyed by 'user' read the JWT, so place this below
+    @jwt_required().
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if rate_limiter.enabled and request.method != 'OPTIONS':
+                result = rate_limiter.check(policy_name)
+                if not result.allowed:
+                    response = jsonify({'error': 'Too many requests, please try again later'})
+                    response.headers['Retry-After'] = str(max(1, math.ceil(result.retry_after)))
+                    return response, 429
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,97 @@
+from sqlalchemy import Float, case, cast, func, or_, select, update
+from database import db
+from models import Companion, Review
+
+
+def _apply(companion_id, rating_delta, count_delta):
+    """Shift a companion's rating aggregates with one UPDATE.
+
+    The new values are computed from the row's current ones inside the
+    statement, so concurrent reviews of the same companion can't lose
+    updates, and the change commits with the caller's transaction.
+    """
+    new_sum = Companion.rating_sum + rating_delta
+    new_count = Companion.rating_count + count_delta
+    db.session.execute(
+        update(Companion)
+        .where(Companion.id == companion_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=case((new_count > 0, cast(new_sum, Float) / new_count), else_=0.0)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def add_review(booking, rating, comment=None):
+    """Add a review of a booking and fold it into the companion's rating.
+
+    Flushes the insert first, so a second review of the same booking
+    raises IntegrityError before the aggregates are touched.
+    """
+    review = Review(
+        booking_id=booking.id,
+        companion_id=booking.companion_id,
+        user_id=booking.user_id,
+        rating=rating,
+        comment=comment
+    )
+    db.session.add(review)
+    db.session.flush()
+    _apply(booking.companion_id, rating, 1)
+    return review
+
+
+def remove_booking_review(booking_id):
+    """Take a booking's review (if any) out of its companion's rating.
+
+    Call before deleting the booking; the review row itself goes with the
+    booking through ON DELETE CASCADE.
+    """
+    review = Review.query.filter_by(booking_id=booking_id).first()
+    if review is not None:
+        _apply(review.companion_id, -review.rating, -1)
+    return review
+
+
+def reconcile_ratings(batch_size=1000):
+    """Recompute every companion's rating aggregates from reviews; return how many were off.
+
+    Runs one UPDATE per window of batch_size companion ids, committing
+    each, and only writes rows whose stored values differ.
+    """
+    sums = (
+        select(func.coalesce(func.sum(Review.rating), 0))
+        .where(Review.companion_id == Companion.id)
+        .scalar_subquery()
+    )
+    counts = (
+        select(func.count(Review.id))
+        .where(Review.companion_id == Companion.id)
+        .scalar_subquery()
+    )
+    average = case((counts > 0, cast(sums, Float) / counts), else_=0.0)
+
+    fixed = 0
+    last_id = 0
+    max_id = db.session.query(func.max(Companion.id)).scalar() or 0
+    while last_id < max_id:
+        result = db.session.execute(
+            update(Companion)
+            .where(
+                Companion.id > last_id,
+                Companion.id <= last_id + batch_size,
+                or_(
+                    Companion.rating_sum != sums,
+                    Companion.rating_count != counts,
+                    func.abs(Companion.rating - average) > 1e-9
+                )
+            )
+            .values(rating_sum=sums, rating_count=counts, rating=average)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        fixed += result.rowcount
+        last_id += batch_size
+    return fixed
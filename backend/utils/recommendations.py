@@ -0,0 +1,394 @@
+import bisect
+import heapq
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import func
+from database import db
+from models import Booking, Companion, Interest, User, user_interests
+
+# Score = weighted sum of these parts, each in [0, 1]
+WEIGHTS = {
+    'interests': 0.55,  # Jaccard overlap with the caller's interests
+    'history': 0.15,    # Jaccard overlap with interests of companions they booked
+    'rating': 0.15,     # rating / 5
+    'location': 0.15,   # same district 1.0, same state 0.5
+}
+MAX_RATING = 5.0
+
+# One available companion, with its interest tags as a bitset over the index's bit positions
+IndexEntry = namedtuple('IndexEntry', ['companion_id', 'bits', 'rating', 'state', 'district'])
+# Everything one lookup reads, replaced as a whole on refresh:
+# entries         companion_id -> IndexEntry
+# positions       interest_id -> bit position, interest_ids the reverse
+# groups          bitset -> its companions, best rated first
+# postings        bit position -> bitsets with that bit set
+# by_rating, by_state, by_district   companions best rated first, overall / per state / per (state, district)
+Snapshot = namedtuple('Snapshot', [
+    'entries', 'positions', 'interest_ids', 'groups', 'postings', 'by_rating', 'by_state', 'by_district'
+])
+
+
+def _jaccard(a, b, missing=0):
+    union = (a | b).bit_count() + missing
+    return (a & b).bit_count() / union if union else 0.0
+
+
+def _bits(interest_ids, positions):
+    """(bitset, missing) for interest ids: missing counts ids no companion carries"""
+    bits = missing = 0
+    for interest_id in interest_ids:
+        position = positions.get(interest_id)
+        if position is None:
+            missing += 1
+        else:
+            bits |= 1 << position
+    return bits, missing
+
+
+def _rating_key(entry):
+    return -entry.rating
+
+
+def _by_rating(entries):
+    return sorted(entries, key=_rating_key)
+
+
+def _arrange(entries, interest_ids):
+    """Snapshot of some entries with the lookup structures recommend() walks"""
+    groups, by_state, by_district = {}, {}, {}
+    for entry in entries.values():
+        groups.setdefault(entry.bits, []).append(entry)
+        if entry.state:
+            by_state.setdefault(entry.state, []).append(entry)
+            by_district.setdefault((entry.state, entry.district), []).append(entry)
+    postings = [set() for _ in interest_ids]
+    for bits in groups:
+        for position in _positions_of(bits):
+            postings[position].add(bits)
+    return Snapshot(
+        entries=entries,
+        positions={interest_id: position for position, interest_id in enumerate(interest_ids)},
+        interest_ids=interest_ids,
+        groups={bits: _by_rating(members) for bits, members in groups.items()},
+        postings=postings,
+        by_rating=_by_rating(entries.values()),
+        by_state={key: _by_rating(members) for key, members in by_state.items()},
+        by_district={key: _by_rating(members) for key, members in by_district.items()},
+    )
+
+
+def _update(snapshot, dirty, fresh, interest_ids):
+    """Snapshot with the dirty companions replaced by their fresh entries.
+
+    Only the lists and postings those companions are in get copied, so a
+    refresh after a write costs far less than a full _arrange().
+    """
+    entries = dict(snapshot.entries)
+    groups, by_state, by_district = dict(snapshot.groups), dict(snapshot.by_state), dict(snapshot.by_district)
+    by_rating = list(snapshot.by_rating)
+    postings = snapshot.postings + [set() for _ in range(len(interest_ids) - len(snapshot.interest_ids))]
+    copied = set()
+
+    def change(index, key, entry, add):
+        ranked = list(index.get(key, ()))
+        if add:
+            bisect.insort(ranked, entry, key=_rating_key)
+        else:
+            ranked.remove(entry)
+        if ranked:
+            index[key] = ranked
+        else:
+            del index[key]
+
+    for companion_id in dirty:
+        changes = [(entries.pop(companion_id, None), False), (fresh.get(companion_id), True)]
+        for entry, add in changes:
+            if entry is None:
+                continue
+            if add:
+                entries[companion_id] = entry
+                bisect.insort(by_rating, entry, key=_rating_key)
+            else:
+                by_rating.remove(entry)
+            existed = entry.bits in groups
+            change(groups, entry.bits, entry, add)
+            if entry.state:
+                change(by_state, entry.state, entry, add)
+                change(by_district, (entry.state, entry.district), entry, add)
+            if (entry.bits in groups) == existed:
+                continue
+            # A combination appeared or disappeared: fix the postings of its bits
+            for position in _positions_of(entry.bits):
+                if position not in copied:
+                    postings[position] = set(postings[position])
+                    copied.add(position)
+                if add:
+                    postings[position].add(entry.bits)
+                else:
+                    postings[position].discard(entry.bits)
+
+    return Snapshot(
+        entries=entries,
+        positions={interest_id: position for position, interest_id in enumerate(interest_ids)},
+        interest_ids=interest_ids,
+        groups=groups,
+        postings=postings,
+        by_rating=by_rating,
+        by_state=by_state,
+        by_district=by_district,
+    )
+
+
+def _positions_of(bits):
+    positions = []
+    while bits:
+        low = bits & -bits
+        positions.append(low.bit_length() - 1)
+        bits ^= low
+    return positions
+
+
+class RecommendationIndex:
+    """In-memory interest bitsets of every available companion.
+
+    Each interest companions carry gets a dense bit position when the
+    index is built, so bitsets stay as wide as the tags actually in use
+    and overlap with a caller is an AND plus a popcount per distinct
+    combination of interests.
+    Caller interests no companion carries have no position; they only
+    widen the union. Writes mark companions dirty and the next lookup
+    reloads just those in one query, giving any new interests the next
+    free positions; the whole index is rebuilt (and positions compacted)
+    after max_age seconds to pick up changes made by other processes.
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._snapshot = None
+        self._built_at = None
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.refreshes = 0
+
+    def invalidate(self, *companion_ids):
+        """Reload these companions on the next lookup (after a profile write)"""
+        with self._lock:
+            self._dirty.update(companion_ids)
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+            self._built_at = None
+            self._dirty = set()
+
+    def _load(self, companion_ids=None, interest_ids=()):
+        """(entries, bit position -> interest id) for available companions, all or only the given ids.
+
+        Positions already in interest_ids are kept; interests not in it are
+        appended in id order.
+        """
+        query = (
+            db.session.query(Companion.id, Companion.rating, User.state, User.district)
+            .join(User, User.id == Companion.user_id)
+            .filter(Companion.availability == True)
+        )
+        tags = db.session.query(Companion.id, user_interests.c.interest_id).join(
+            user_interests, user_interests.c.user_id == Companion.user_id
+        ).filter(Companion.availability == True)
+        if companion_ids is not None:
+            query = query.filter(Companion.id.in_(companion_ids))
+            tags = tags.filter(Companion.id.in_(companion_ids))
+
+        tags = tags.all()
+        interest_ids = list(interest_ids)
+        positions = {interest_id: position for position, interest_id in enumerate(interest_ids)}
+        for interest_id in sorted({interest_id for _, interest_id in tags} - positions.keys()):
+            positions[interest_id] = len(interest_ids)
+            interest_ids.append(interest_id)
+
+        bits = {}
+        for companion_id, interest_id in tags:
+            bits[companion_id] = bits.get(companion_id, 0) | (1 << positions[interest_id])
+        entries = {
+            companion_id: IndexEntry(
+                companion_id, bits.get(companion_id, 0), rating or 0.0,
+                (state or '').lower(), (district or '').lower()
+            )
+            for companion_id, rating, state, district in query
+        }
+        return entries, interest_ids
+
+    def snapshot(self):
+        """Current Snapshot, rebuilding or refreshing first when needed.
+
+        A refresh or rebuild replaces the snapshot rather than changing it
+        in place, so a lookup already holding one isn't disturbed.
+        """
+        with self._lock:
+            if self._snapshot is None or time.monotonic() - self._built_at > self.max_age:
+                entries, interest_ids = self._load()
+                self._snapshot = _arrange(entries, interest_ids)
+                self._built_at = time.monotonic()
+                self._dirty.clear()
+                self.builds += 1
+            elif self._dirty:
+                dirty, self._dirty = list(self._dirty), set()
+                fresh, interest_ids = self._load(dirty, self._snapshot.interest_ids)
+                self._snapshot = _update(self._snapshot, dirty, fresh, interest_ids)
+                self.refreshes += 1
+            return self._snapshot
+
+    def entries(self):
+        """Current entries, rebuilding or refreshing first when needed"""
+        return self.snapshot().entries
+
+    def _parts(self, entry, interest_bits, interest_missing, history_bits, history_missing, state, district):
+        return {
+            'interests': _jaccard(interest_bits, entry.bits, interest_missing),
+            'history': _jaccard(history_bits, entry.bits, history_missing),
+            'rating': min(entry.rating, MAX_RATING) / MAX_RATING,
+            'location': (1.0 if district and entry.district == district else 0.5)
+            if state and entry.state == state else 0.0,
+        }
+
+    def recommend(self, interest_ids, history_ids=(), state=None, district=None, limit=20, exclude=()):
+        """Top `limit` (score, parts, shared interest ids, entry) for a caller, best first.
+
+        Exact, without scoring every companion. Overlap is only computed
+        for the interest combinations sharing a tag with the caller, found
+        through the tag postings. Each combination's companions are walked
+        best rated first and dropped once even a same-district match could
+        not beat the current top `limit`. Companions sharing no tag score
+        on rating and location alone, so they come from the rating-ordered
+        district, state and catalog lists under the same cut-off. See
+        bench/recommendations.py for the cost at catalog sizes.
+        """
+        if limit <= 0:
+            return []
+        snapshot = self.snapshot()
+        interest_bits, interest_missing = _bits(interest_ids, snapshot.positions)
+        history_bits, history_missing = _bits(history_ids, snapshot.positions)
+        caller_bits = interest_bits | history_bits
+        state = (state or '').lower()
+        district = (district or '').lower()
+        w_interests, w_history = WEIGHTS['interests'], WEIGHTS['history']
+        w_rating, w_location = WEIGHTS['rating'] / MAX_RATING, WEIGHTS['location']
+
+        # Min-heap of the best (score, companion_id, entry) so far; ties go to the higher id
+        top = []
+
+        def floor():
+            return top[0][0] if len(top) == limit else -1.0
+
+        def offer(score, entry):
+            if entry.companion_id in exclude:
+                return
+            item = (score, entry.companion_id, entry)
+            if len(top) < limit:
+                heapq.heappush(top, item)
+            elif item[:2] > top[0][:2]:
+                heapq.heapreplace(top, item)
+
+        def location(entry):
+            if state and entry.state == state:
+                return w_location if district and entry.district == district else w_location / 2
+            return 0.0
+
+        groups = []
+        for bits in set().union(*(snapshot.postings[position] for position in _positions_of(caller_bits))):
+            overlap = 0.0
+            union = (interest_bits | bits).bit_count() + interest_missing
+            if union:
+                overlap += w_interests * (interest_bits & bits).bit_count() / union
+            union = (history_bits | bits).bit_count() + history_missing
+            if union:
+                overlap += w_history * (history_bits & bits).bit_count() / union
+            members = snapshot.groups[bits]
+            groups.append((overlap + w_rating * min(members[0].rating, MAX_RATING), overlap, members))
+        groups.sort(key=lambda group: group[0], reverse=True)
+
+        for best, overlap, members in groups:
+            if best + w_location < floor():
+                break
+            for entry in members:
+                score = overlap + w_rating * min(entry.rating, MAX_RATING)
+                if score + w_location < floor():
+                    break
+                offer(score + location(entry), entry)
+
+        # Companions sharing no tag: same district, rest of the state, rest of the catalog
+        tiers = []
+        if state and district:
+            tiers.append((snapshot.by_district.get((state, district), ()), w_location, lambda entry: False))
+        if state:
+            tiers.append((snapshot.by_state.get(state, ()), w_location / 2, lambda entry: district and entry.district == district))
+        tiers.append((snapshot.by_rating, 0.0, lambda entry: state and entry.state == state))
+        for ranked, bonus, seen in tiers:
+            for entry in ranked:
+                score = w_rating * min(entry.rating, MAX_RATING)
+                if score + bonus < floor():
+                    break
+                if entry.bits & caller_bits or seen(entry):
+                    continue
+                offer(score + bonus, entry)
+
+        return [
+            (
+                score,
+                self._parts(entry, interest_bits, interest_missing, history_bits, history_missing, state, district),
+                [snapshot.interest_ids[position] for position in _positions_of(interest_bits & entry.bits)],
+                entry
+            )
+            for score, _, entry in sorted(top, key=lambda item: item[:2], reverse=True)
+        ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'companions': len(self._snapshot.entries) if self._snapshot else 0,
+                'interests': len(self._snapshot.interest_ids) if self._snapshot else 0,
+                'combinations': len(self._snapshot.groups) if self._snapshot else 0,
+                'dirty': len(self._dirty),
+                'age_seconds': round(time.monotonic() - self._built_at, 1) if self._built_at else None,
+                'max_age': self.max_age,
+                'builds': self.builds,
+                'refreshes': self.refreshes
+            }
+
+
+recommendation_index = RecommendationIndex()
+
+
+def caller_profile(user):
+    """(interest ids, history interest ids) for a user, in two queries.
+
+    History covers the interests of companions the user has had
+    approved or completed sessions with.
+    """
+    interest_ids = {
+        interest_id for (interest_id,) in
+        db.session.query(user_interests.c.interest_id).filter(user_interests.c.user_id == user.id)
+    }
+    history_ids = {
+        interest_id for (interest_id,) in
+        db.session.query(func.distinct(user_interests.c.interest_id))
+        .join(Companion, Companion.user_id == user_interests.c.user_id)
+        .join(Booking, Booking.companion_id == Companion.id)
+        .filter(Booking.user_id == user.id, Booking.status.in_(('approved', 'completed')))
+    }
+    return interest_ids, history_ids
+
+
+def interest_names(interest_ids):
+    """{interest id: name} for some interest ids, in one query"""
+    if not interest_ids:
+        return {}
+    return dict(db.session.query(Interest.id, Interest.name).filter(Interest.id.in_(interest_ids)))
+
+
+def init_recommendations(app):
+    """Set the index rebuild age from RECOMMEND_INDEX_MAX_AGE"""
+    recommendation_index.max_age = app.config.get('RECOMMEND_INDEX_MAX_AGE', 300)
+    recommendation_index.clear()
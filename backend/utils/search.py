@@ -0,0 +1,131 @@
+import re
+from sqlalchemy import bindparam, inspect, text
+from database import db
+
+# Search terms beyond this many are ignored
+MAX_SEARCH_TERMS = 8
+
+# One indexed document per companion: its user's name, interests and
+# location plus the bio. Read from the live tables, so reindexing a
+# companion is a delete and an INSERT ... SELECT in the caller's transaction.
+_SOURCE = """
+    SELECT c.id, coalesce(u.name, ''), coalesce(u.interests, ''),
+           trim(coalesce(u.state, '') || ' ' || coalesce(u.district, '') || ' ' || coalesce(u.city, '')),
+           coalesce(c.bio, '')
+    FROM companions c JOIN users u ON u.id = c.user_id
+"""
+
+# Postgres: tsvector generated from the weighted fields (name > interests >
+# location > bio), GIN-indexed. The 'simple' configuration doesn't stem, so
+# prefix queries match what users type.
+_POSTGRES_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS companion_search (
+        companion_id integer PRIMARY KEY REFERENCES companions (id) ON DELETE CASCADE,
+        name text NOT NULL,
+        interests text NOT NULL,
+        location text NOT NULL,
+        bio text NOT NULL,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', name), 'A') ||
+            setweight(to_tsvector('simple', interests), 'B') ||
+            setweight(to_tsvector('simple', location), 'C') ||
+            setweight(to_tsvector('simple', bio), 'D')
+        ) STORED
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS ix_companion_search_document ON companion_search USING gin (document)',
+]
+
+# SQLite: an FTS5 table keyed by rowid = companion id, ranked with bm25
+_SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS companion_search USING fts5(name, interests, location, bio, tokenize='unicode61')",
+]
+# bm25 column weights, in the column order above
+_SQLITE_WEIGHTS = '10.0, 5.0, 3.0, 1.0'
+
+
+def _is_sqlite(connection):
+    return connection.dialect.name == 'sqlite'
+
+
+def create_search_schema(connection):
+    """Create the companion search index if it doesn't exist"""
+    for statement in _SQLITE_SCHEMA if _is_sqlite(connection) else _POSTGRES_SCHEMA:
+        connection.execute(text(statement))
+
+
+def drop_search_schema(connection):
+    connection.execute(text('DROP TABLE IF EXISTS companion_search'))
+
+
+def reindex_companions(connection, companion_ids=None):
+    """Rebuild the search documents of the given companions (all when None).
+
+    Deleted companions simply drop out. Call it inside the transaction
+    that changed the profile, after a flush, so the index commits with it.
+    """
+    key = 'rowid' if _is_sqlite(connection) else 'companion_id'
+    columns = f'{key}, name, interests, location, bio'
+    if companion_ids is None:
+        connection.execute(text('DELETE FROM companion_search'))
+        connection.execute(text(f'INSERT INTO companion_search ({columns}) {_SOURCE}'))
+        return
+    companion_ids = list(companion_ids)
+    if not companion_ids:
+        return
+    ids = bindparam('ids', companion_ids, expanding=True)
+    connection.execute(text(f'DELETE FROM companion_search WHERE {key} IN :ids').bindparams(ids))
+    connection.execute(text(f'INSERT INTO companion_search ({columns}) {_SOURCE} WHERE c.id IN :ids').bindparams(ids))
+
+
+def sync_companion_search(*companion_ids):
+    """Reindex companions as part of the current session's transaction"""
+    db.session.flush()
+    reindex_companions(db.session.connection(), companion_ids)
+
+
+def search_terms(query):
+    """Lowercased word tokens of a search query"""
+    return re.findall(r'\w+', query.lower())[:MAX_SEARCH_TERMS]
+
+
+def search_companions(terms, limit, offset=0):
+    """Ids and scores of available companions matching every term as a prefix.
+
+    Returns [(companion_id, score)], best match first; higher scores are
+    better. The match and the ranking both run on the text index.
+    """
+    connection = db.session.connection()
+    params = {'limit': limit, 'offset': offset}
+    if _is_sqlite(connection):
+        params['query'] = ' '.join(f'"{term}"*' for term in terms)
+        statement = f"""
+            SELECT companion_search.rowid, -bm25(companion_search, {_SQLITE_WEIGHTS}) AS score
+            FROM companion_search JOIN companions c ON c.id = companion_search.rowid
+            WHERE companion_search MATCH :query AND c.availability
+            ORDER BY score DESC, companion_search.rowid DESC
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        params['query'] = ' & '.join(f'{term}:*' for term in terms)
+        statement = """
+            SELECT s.companion_id, ts_rank_cd(s.document, q.query) AS score
+            FROM companion_search s
+            JOIN companions c ON c.id = s.companion_id,
+            to_tsquery('simple', :query) AS q(query)
+            WHERE s.document @@ q.query AND c.availability
+            ORDER BY score DESC, s.companion_id DESC
+            LIMIT :limit OFFSET :offset
+        """
+    return [(companion_id, float(score)) for companion_id, score in connection.execute(text(statement), params)]
+
+
+def init_search(app):
+    """Create and fill the search index on boot when DB_AUTO_CREATE creates tables"""
+    if app.config.get('DB_AUTO_CREATE', True):
+        with app.app_context():
+            with db.engine.begin() as connection:
+                if not inspect(connection).has_table('companion_search'):
+                    create_search_schema(connection)
+                    reindex_companions(connection)
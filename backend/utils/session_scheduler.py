@@ -0,0 +1,186 @@
+import heapq
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import update
+from database import db
+from models import Booking
+from utils.chat_hub import chat_hub
+
+logger = logging.getLogger(__name__)
+
+
+class SessionScheduler:
+    """Moves approved bookings to 'completed' once their session ends.
+
+    End times of sessions known to this process sit in a min-heap, so the
+    thread wakes exactly when the next one finishes. A periodic sweep
+    catches bookings approved by other processes. Expiry is a single
+    set-based UPDATE, so several schedulers running at once is harmless.
+    """
+
+    def __init__(self, sweep_interval=30):
+        self.sweep_interval = sweep_interval
+        self._heap = []  # (ends_at, booking_id)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.expired_total = 0
+        self.last_run = None
+        self.mode = None
+        self._lock_file = None
+
+    def schedule(self, booking_id, ends_at):
+        """Wake up when a newly approved session ends.
+
+        A no-op unless the scheduler runs in this process; the process that
+        runs it picks the booking up on its next sweep.
+        """
+        if self._thread is None:
+            return
+        with self._cond:
+            heapq.heappush(self._heap, (ends_at, booking_id))
+            self._cond.notify()
+
+    def load_pending(self):
+        """Seed the heap with approved sessions that haven't ended yet"""
+        rows = (
+            db.session.query(Booking.ends_at, Booking.id)
+            .filter(Booking.status == 'approved', Booking.ends_at > datetime.utcnow())
+            .all()
+        )
+        with self._cond:
+            self._heap = [tuple(row) for row in rows]
+            heapq.heapify(self._heap)
+            self._cond.notify()
+        return len(rows)
+
+    def expire_due(self, now=None):
+        """Complete every approved booking whose session has ended; return their ids"""
+        now = now or datetime.utcnow()
+        result = db.session.execute(
+            update(Booking)
+            .where(Booking.status == 'approved', Booking.ends_at <= now)
+            .values(status='completed', chat_enabled=False)
+            .returning(Booking.id)
+            .execution_options(synchronize_session=False)
+        )
+        expired = result.scalars().all()
+        db.session.commit()
+
+        # Close the open chat streams; the chat broker relays this to every process
+        for booking_id in expired:
+            chat_hub.publish(booking_id, 'session_end', {'chat_enabled': False, 'time_remaining': 0})
+
+        self.expired_total += len(expired)
+        self.last_run = now
+        return expired
+
+    def pending(self):
+        """Number of session ends waiting in the heap"""
+        with self._cond:
+            return len(self._heap)
+
+    def run_forever(self, app):
+        """Expire sessions as they end until stop() is called"""
+        with app.app_context():
+            try:
+                self.load_pending()
+            except Exception:
+                logger.exception('Could not load pending sessions')
+                db.session.rollback()
+
+        next_sweep = 0
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    wait = next_sweep - time.monotonic()
+                    if self._heap:
+                        wait = min(wait, (self._heap[0][0] - datetime.utcnow()).total_seconds())
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if self._stopped:
+                    return
+                now = datetime.utcnow()
+                while self._heap and self._heap[0][0] <= now:
+                    heapq.heappop(self._heap)
+
+            with app.app_context():
+                try:
+                    expired = self.expire_due(now)
+                    if expired:
+                        logger.info('Completed %s ended sessions', len(expired))
+                except Exception:
+                    logger.exception('Session expiry failed')
+                    db.session.rollback()
+            next_sweep = time.monotonic() + self.sweep_interval
+
+    def start(self, app):
+        """Run the scheduler on a daemon thread of this process"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self.run_forever, args=(app,), name='session-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def acquire_process_lock(self, path):
+        """Take an exclusive lock on path, held until this process exits.
+
+        Returns False when another process holds it. The OS drops the lock
+        when its holder dies, so a replacement worker can take over.
+        """
+        import fcntl
+        lock_file = open(path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'pending': self.pending(),
+            'sweep_interval': self.sweep_interval,
+            'expired_total': self.expired_total,
+            'last_run': self.last_run.isoformat() if self.last_run else None
+        }
+
+
+session_scheduler = SessionScheduler()
+
+
+def init_session_scheduler(app):
+    """Start the in-process scheduler as SESSION_SCHEDULER says.
+
+    - thread (default for `python app.py`): run it in this process
+    - single (default under wsgi.py/gunicorn): run it only in the one
+      process per host holding SESSION_SCHEDULER_LOCK; a worker booted
+      after the holder exits takes over
+    - off: don't run it, when `python -m scripts.session_worker` does
+    """
+    session_scheduler.sweep_interval = app.config.get('SESSION_SWEEP_SECONDS', 30)
+    mode = app.config.get('SESSION_SCHEDULER', 'thread')
+    session_scheduler.mode = mode
+    if mode == 'thread':
+        session_scheduler.start(app)
+    elif mode == 'single':
+        lock_path = app.config.get('SESSION_SCHEDULER_LOCK') or os.path.join(
+            tempfile.gettempdir(), 'bondmate-session-scheduler.lock'
+        )
+        if session_scheduler.acquire_process_lock(lock_path):
+            session_scheduler.start(app)
+    elif mode != 'off':
+        raise ValueError(f'Unknown SESSION_SCHEDULER mode: {mode}')
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import re
+import tempfile
+from urllib.parse import urlsplit
+from flask import current_app
+
+# Stored objects are named <sha256 of the bytes>.<extension>
+KEY_PATTERN = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]{1,5}$')
+
+
+def content_key(data, extension):
+    """Content-addressed key of some bytes: equal bytes, equal key"""
+    return f'{hashlib.sha256(data).hexdigest()}.{extension}'
+
+
+def media_prefix(media_url):
+    """Path the media route is served under: MEDIA_URL's path, even when it names a CDN host"""
+    return urlsplit(media_url).path.rstrip('/') or '/media'
+
+
+class StorageBackend:
+    """Storage interface for uploaded media.
+
+    Objects are content-addressed (see content_key), so a key never
+    changes what it names. Implement this to keep uploads elsewhere (e.g.
+    object storage, with url() pointing at a bucket or CDN) and pass it to
+    init_storage().
+    """
+
+    def save(self, data, extension):
+        """Store bytes unless already present and return their key"""
+        raise NotImplementedError
+
+    def exists(self, key):
+        """Whether an object is stored under key"""
+        raise NotImplementedError
+
+    def open(self, key):
+        """Binary file object with the stored bytes"""
+        raise NotImplementedError
+
+    def url(self, key):
+        """URL clients fetch the object from"""
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """Content-addressed blobs in a directory on local disk.
+
+    Storing the same bytes again is a no-op and the served URL can be
+    cached forever. Files are sharded by the first two hex pairs of the
+    hash (ab/cd/abcd....jpg) to keep directories small.
+    """
+
+    def __init__(self, root='uploads', base_url='/media'):
+        self.root = root
+        self.base_url = base_url.rstrip('/')
+
+    def path(self, key):
+        if not KEY_PATTERN.match(key):
+            raise ValueError('Invalid storage key')
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def save(self, data, extension):
+        key = content_key(data, extension)
+        path = self.path(key)
+        if os.path.exists(path):
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write aside and rename, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return key
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def url(self, key):
+        return f'{self.base_url}/{key}'
+
+
+def get_storage():
+    """The StorageBackend configured for the current app"""
+    return current_app.extensions['storage']
+
+
+def init_storage(app, backend=None):
+    """Store uploads under MEDIA_ROOT and build URLs under MEDIA_URL, unless given another backend"""
+    root = app.config.get('MEDIA_ROOT') or os.path.join(app.root_path, 'uploads')
+    app.extensions['storage'] = backend or LocalStorage(root, app.config.get('MEDIA_URL', '/media'))
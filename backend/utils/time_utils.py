@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta, timezone
+
+
+def parse_utc_datetime(value):
+    """Parse an ISO 8601 string into a naive UTC datetime.
+
+    Timestamps are stored naive in UTC (datetime.utcnow), so offsets such
+    as a trailing 'Z' are converted rather than dropped. Raises ValueError
+    on malformed input.
+    """
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def next_slot_start(value, slot):
+    """Start of the first slot on the grid (multiples of slot) at or after value"""
+    return datetime.min + -(-(value - datetime.min) // slot) * slot
+
+
+def on_slot_grid(value, slot):
+    """Whether value starts a slot on the grid"""
+    return (value - datetime.min) % slot == timedelta(0)
@@ -0,0 +1,17 @@
+"""WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+`python app.py` starts Flask's debug server and is for development only.
+"""
+import os
+
+# Production schema changes go through `alembic upgrade head`, so workers
+# boot without touching the schema unless explicitly asked to
+os.environ.setdefault('DB_AUTO_CREATE', '0')
+# Complete ended sessions from one worker, not from every one of them
+os.environ.setdefault('SESSION_SCHEDULER', 'single')
+
+from app import create_app
+
+app = create_app()
@@ -1,6 +1,7 @@
 import axios from 'axios';
 
 const API_URL = 'http://localhost:5000/api';
+const MEDIA_ORIGIN = new URL(API_URL).origin;
 
 // Create axios instance
 const api = axios.create({
@@ -41,19 +42,50 @@ export const getProfile = () => api.get('/users/profile');
 export const updateProfile = (userData) => api.put('/users/profile', userData);
 
 // Companion APIs
-export const getCompanions = () => api.get('/companions');
-export const getCompanionCities = () => api.get('/companions/cities'); // NEW added API
+export const getCompanions = (params = {}) => api.get('/companions', { params });
+// Available companions per state and district. The list is revalidated with its
+// ETag, so while nothing changed each call costs a 304 with no body.
+let companionCities = null;
+export const getCompanionCities = async () => {
+  const response = await api.get('/companions/cities', {
+    headers: companionCities ? { 'If-None-Match': companionCities.etag } : {},
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+  });
+  if (response.status === 304 && companionCities) {
+    return { ...response, data: companionCities.data };
+  }
+  if (response.headers.etag) {
+    companionCities = { etag: response.headers.etag, data: response.data };
+  }
+  return response;
+};
 export const getCompanion = (id) => api.get(`/companions/${id}`);
+export const getCompanionSlots = (id, params = {}) => api.get(`/companions/${id}/slots`, { params });
 export const createCompanion = (companionData) => api.post('/companions', companionData);
 export const updateCompanion = (id, companionData) => api.put(`/companions/${id}`, companionData);
 export const deleteCompanion = (id) => api.delete(`/companions/${id}`);
+export const uploadCompanionImage = (id, file) => {
+  const form = new FormData();
+  form.append('image', file);
+  return api.post(`/companions/${id}/image`, form, { headers: { 'Content-Type': 'multipart/form-data' } });
+};
+
+// Uploaded images come back as /media/... paths on the API server; external URLs pass through
+export const mediaUrl = (url) => (url && url.startsWith('/') ? `${MEDIA_ORIGIN}${url}` : url);
 
 // Booking APIs
 export const getBookings = () => api.get('/bookings');
-export const getAllBookings = () => api.get('/bookings/all');
+export const getAllBookings = (params = {}) => api.get('/bookings/all', { params });
+export const exportBookings = (params = {}) => api.get('/bookings/export', { params, responseType: 'blob' });
 export const createBooking = (bookingData) => api.post('/bookings', bookingData);
 export const approveBooking = (id) => api.put(`/bookings/${id}/approve`);
 export const rejectBooking = (id) => api.put(`/bookings/${id}/reject`);
+export const moderateBookings = (action, ids) => api.put('/bookings/batch', { action, ids });
 export const deleteBooking = (id) => api.delete(`/bookings/${id}`);
 
+// Bootstrap: profile, bookings with counts by status, and open chats in one request
+export const getDashboard = (params = {}) => api.get('/dashboard', { params });
+// Several GET requests in one call: requests = [{ id, path: '/api/...' }]
+export const batchGet = (requests) => api.post('/batch', { requests });
+
 export default api;
\ No newline at end of file
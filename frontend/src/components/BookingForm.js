@@ -1,7 +1,13 @@
-import React, { useState } from 'react';
-import { createBooking } from '../api';
+import React, { useState, useEffect } from 'react';
+import { createBooking, getCompanionSlots } from '../api';
 import './Forms.css';
 
+// yyyy-mm-dd in the browser's local time zone
+const toDateInput = (date) => {
+  const offset = date.getTimezoneOffset() * 60000;
+  return new Date(date.getTime() - offset).toISOString().slice(0, 10);
+};
+
 function BookingForm({ companionId, onSuccess }) {
   const [formData, setFormData] = useState({
     companion_id: companionId,
@@ -10,6 +16,31 @@ function BookingForm({ companionId, onSuccess }) {
   const [error, setError] = useState('');
   const [loading, setLoading] = useState(false);
   const [success, setSuccess] = useState(false);
+  const [day, setDay] = useState(toDateInput(new Date()));
+  const [slots, setSlots] = useState([]);
+  const [slotsLoading, setSlotsLoading] = useState(false);
+
+  useEffect(() => {
+    fetchSlots();
+  }, [companionId, day]);
+
+  // Ask the server which 15-minute slots are still free on the chosen day
+  const fetchSlots = async () => {
+    setSlotsLoading(true);
+    try {
+      const from = new Date(`${day}T00:00`);
+      const to = new Date(from.getTime() + 24 * 60 * 60 * 1000);
+      const response = await getCompanionSlots(companionId, {
+        from: from.toISOString(),
+        to: to.toISOString()
+      });
+      setSlots(response.data.slots);
+    } catch (err) {
+      setSlots([]);
+    } finally {
+      setSlotsLoading(false);
+    }
+  };
 
   const handleChange = (e) => {
     setFormData({
@@ -27,6 +58,7 @@ function BookingForm({ companionId, onSuccess }) {
     try {
       await createBooking(formData);
       setSuccess(true);
+      fetchSlots();
       if (onSuccess) onSuccess();
       
       // Reset form
@@ -57,16 +89,32 @@ function BookingForm({ companionId, onSuccess }) {
       
       <form onSubmit={handleSubmit}>
         <div className="form-group">
-          <label>Select Date & Time</label>
+          <label>Select Date</label>
           <input
-            type="datetime-local"
-            name="date"
-            value={formData.date}
-            onChange={handleChange}
+            type="date"
+            value={day}
+            onChange={(e) => {
+              setDay(e.target.value);
+              setFormData({ ...formData, date: '' });
+            }}
             required
-            min={new Date().toISOString().slice(0, 16)}
+            min={toDateInput(new Date())}
           />
-          <small>Choose when you want to start your 15-minute session</small>
+        </div>
+
+        <div className="form-group">
+          <label>Select Time</label>
+          <select name="date" value={formData.date} onChange={handleChange} required disabled={slotsLoading}>
+            <option value="">
+              {slotsLoading ? 'Loading free slots...' : slots.length ? 'Choose a time' : 'No free slots on this day'}
+            </option>
+            {slots.map(slot => (
+              <option key={slot.start} value={`${slot.start}Z`}>
+                {new Date(`${slot.start}Z`).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })}
+              </option>
+            ))}
+          </select>
+          <small>Only free 15-minute slots are shown</small>
         </div>
 
         <button type="submit" className="btn-primary" disabled={loading}>
@@ -2,36 +2,85 @@ import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import './ChatWindow.css';
 
+// Seconds between catch-up fetches, in case a push never arrives
+const POLL_SECONDS = 10;
+// Wait before reopening a dropped stream, doubling up to the max while it keeps failing
+const RECONNECT_SECONDS = 3;
+const MAX_RECONNECT_SECONDS = 60;
+
 function ChatWindow({ bookingId, onClose, isFullPage = false }) {
   const [messages, setMessages] = useState([]);
   const [newMessage, setNewMessage] = useState('');
   const [chatEnabled, setChatEnabled] = useState(false);
   const [timeRemaining, setTimeRemaining] = useState(0);
   const [loading, setLoading] = useState(true);
+  const [hasOlder, setHasOlder] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [currentUser, setCurrentUser] = useState(null);
   const messagesEndRef = useRef(null);
-  const intervalRef = useRef(null);
+  const streamRef = useRef(null);
+  const reconnectRef = useRef(null);
+  const reconnectDelayRef = useRef(RECONNECT_SECONDS);
+  const lastIdRef = useRef(null);
+  const activeRef = useRef(false);
+  const keepScrollRef = useRef(false);
+
   useEffect(() => {
     const user = JSON.parse(sessionStorage.getItem('user'));
     setCurrentUser(user);
-    fetchMessages();
-    checkChatStatus();
+    let cancelled = false;
 
-    // Poll for new messages every 3 seconds
-    const messageInterval = setInterval(fetchMessages, 3000);
+    lastIdRef.current = null;
+    activeRef.current = true;
 
-    // Check chat status every second
-    const statusInterval = setInterval(checkChatStatus, 1000);
+    // Load the history once, then let the server push new messages and the session end
+    fetchMessages().then(() => {
+      if (!cancelled) {
+        openStream();
+      }
+    });
 
-    intervalRef.current = { messageInterval, statusInterval };
+    // The stream may be refused (server at its cap), may sit on another server
+    // process without a shared pub/sub, or may have closed before the session
+    // started, so also catch up on messages and the session state periodically
+    const poller = setInterval(() => {
+      if (!cancelled) {
+        fetchNewMessages();
+        fetchStatus();
+      }
+    }, POLL_SECONDS * 1000);
 
     return () => {
-      clearInterval(messageInterval);
-      clearInterval(statusInterval);
+      cancelled = true;
+      activeRef.current = false;
+      clearInterval(poller);
+      closeStream();
     };
   }, [bookingId]);
 
+  // Count down locally; the stream tells us when the session actually ends
   useEffect(() => {
+    if (!chatEnabled) return undefined;
+
+    const timer = setInterval(() => {
+      setTimeRemaining((seconds) => {
+        if (seconds <= 1) {
+          setChatEnabled(false);
+          return 0;
+        }
+        return seconds - 1;
+      });
+    }, 1000);
+
+    return () => clearInterval(timer);
+  }, [chatEnabled]);
+
+  useEffect(() => {
+    // Prepending older history should not jump the view to the bottom
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
@@ -39,6 +88,17 @@ function ChatWindow({ bookingId, onClose, isFullPage = false }) {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
 
+  const appendMessages = (incoming) => {
+    setMessages((current) => {
+      const seen = new Set(current.map((msg) => msg.id));
+      const fresh = incoming.filter((msg) => !seen.has(msg.id));
+      fresh.forEach((msg) => {
+        if (msg.id > (lastIdRef.current || 0)) lastIdRef.current = msg.id;
+      });
+      return fresh.length ? [...current, ...fresh] : current;
+    });
+  };
+
   const fetchMessages = async () => {
     try {
       const token = sessionStorage.getItem('token');
@@ -46,8 +106,12 @@ function ChatWindow({ bookingId, onClose, isFullPage = false }) {
         `http://localhost:5000/api/chat/bookings/${bookingId}/messages`,
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      setMessages(response.data.messages);
+      const { messages: loaded } = response.data;
+      setMessages(loaded);
+      lastIdRef.current = loaded.length ? loaded[loaded.length - 1].id : null;
+      setHasOlder(response.data.has_more);
       setChatEnabled(response.data.chat_enabled);
+      setTimeRemaining(response.data.time_remaining);
       setLoading(false);
     } catch (error) {
       console.error('Error fetching messages:', error);
@@ -55,7 +119,25 @@ function ChatWindow({ bookingId, onClose, isFullPage = false }) {
     }
   };
 
-  const checkChatStatus = async () => {
+  // Fetch anything newer than the last message we have, or the latest page before the first one
+  const fetchNewMessages = async () => {
+    try {
+      const token = sessionStorage.getItem('token');
+      const response = await axios.get(
+        `http://localhost:5000/api/chat/bookings/${bookingId}/messages`,
+        {
+          headers: { Authorization: `Bearer ${token}` },
+          params: lastIdRef.current ? { after_id: lastIdRef.current } : {}
+        }
+      );
+      appendMessages(response.data.messages);
+    } catch (error) {
+      console.error('Error fetching new messages:', error);
+    }
+  };
+
+  // Pick up the session starting (after approval) or ending without the stream
+  const fetchStatus = async () => {
     try {
       const token = sessionStorage.getItem('token');
       const response = await axios.get(
@@ -64,25 +146,130 @@ function ChatWindow({ bookingId, onClose, isFullPage = false }) {
       );
       setChatEnabled(response.data.chat_enabled);
       setTimeRemaining(response.data.time_remaining);
+      // The stream closes on session_end; open it again once the session is live
+      if (response.data.chat_enabled && !streamRef.current && !reconnectRef.current && activeRef.current) {
+        openStream();
+      }
+    } catch (error) {
+      console.error('Error fetching chat status:', error);
+    }
+  };
+
+  // Page backwards through the transcript from the oldest loaded message
+  const fetchOlderMessages = async () => {
+    if (!messages.length || loadingOlder) return;
+    setLoadingOlder(true);
+    try {
+      const token = sessionStorage.getItem('token');
+      const response = await axios.get(
+        `http://localhost:5000/api/chat/bookings/${bookingId}/messages`,
+        {
+          headers: { Authorization: `Bearer ${token}` },
+          params: { before_id: messages[0].id }
+        }
+      );
+      keepScrollRef.current = true;
+      setMessages((current) => [...response.data.messages, ...current]);
+      setHasOlder(response.data.has_more);
     } catch (error) {
-      console.error('Error checking chat status:', error);
+      console.error('Error fetching older messages:', error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
+  // The stream URL carries a short-lived stream token, never the access token
+  const openStream = async () => {
+    closeStream();
+    let streamToken;
+    try {
+      const token = sessionStorage.getItem('token');
+      const response = await axios.post(
+        `http://localhost:5000/api/chat/bookings/${bookingId}/stream-token`,
+        {},
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      streamToken = response.data.token;
+    } catch (error) {
+      console.error('Could not open chat stream:', error);
+      if (activeRef.current) scheduleReconnect();
+      return;
+    }
+    if (!activeRef.current) return;
+    const params = new URLSearchParams({ token: streamToken });
+    if (lastIdRef.current) {
+      params.set('last_event_id', lastIdRef.current);
+    }
+    const source = new EventSource(
+      `http://localhost:5000/api/chat/bookings/${bookingId}/stream?${params.toString()}`
+    );
+
+    source.addEventListener('status', (event) => {
+      reconnectDelayRef.current = RECONNECT_SECONDS;
+      const data = JSON.parse(event.data);
+      setChatEnabled(data.chat_enabled);
+      setTimeRemaining(data.time_remaining);
+    });
+
+    source.addEventListener('message', (event) => {
+      appendMessages([JSON.parse(event.data)]);
+    });
+
+    source.addEventListener('session_end', () => {
+      setChatEnabled(false);
+      setTimeRemaining(0);
+      closeStream();
+    });
+
+    source.addEventListener('reconnect', () => {
+      scheduleReconnect();
+    });
+
+    source.onerror = () => {
+      // The stream token has expired by now, so reopen with a fresh one. The
+      // server refuses streams past its cap; polling keeps the chat current meanwhile.
+      console.error('Chat stream interrupted, reconnecting...');
+      scheduleReconnect();
+    };
+
+    streamRef.current = source;
+  };
+
+  const scheduleReconnect = () => {
+    closeStream();
+    const delay = reconnectDelayRef.current;
+    reconnectDelayRef.current = Math.min(delay * 2, MAX_RECONNECT_SECONDS);
+    reconnectRef.current = setTimeout(() => {
+      reconnectRef.current = null;
+      fetchNewMessages();
+      openStream();
+    }, delay * 1000);
+  };
+
+  const closeStream = () => {
+    if (reconnectRef.current) {
+      clearTimeout(reconnectRef.current);
+      reconnectRef.current = null;
+    }
+    if (streamRef.current) {
+      streamRef.current.close();
+      streamRef.current = null;
     }
   };
 
   const handleSendMessage = async (e) => {
-    console.log("clicked")
     e.preventDefault();
     if (!newMessage.trim() || !chatEnabled) return;
 
     try {
       const token = sessionStorage.getItem('token');
-      await axios.post(
+      const response = await axios.post(
         `http://localhost:5000/api/chat/bookings/${bookingId}/messages`,
         { message: newMessage },
         { headers: { Authorization: `Bearer ${token}` } }
       );
       setNewMessage('');
-      fetchMessages();
+      appendMessages([response.data.message]);
     } catch (error) {
       alert(error.response?.data?.error || 'Failed to send message');
     }
@@ -120,6 +307,11 @@ function ChatWindow({ bookingId, onClose, isFullPage = false }) {
       </div>
 
       <div className="messages-container">
+        {hasOlder && (
+          <button onClick={fetchOlderMessages} disabled={loadingOlder} className="load-older-btn">
+            {loadingOlder ? 'Loading...' : 'Load earlier messages'}
+          </button>
+        )}
         {messages.length === 0 ? (
           <div className="no-messages">
             <p>No messages yet. Start the conversation!</p>
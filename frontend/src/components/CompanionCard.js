@@ -1,5 +1,6 @@
 import React from 'react';
 import { useNavigate } from 'react-router-dom';
+import { mediaUrl } from '../api';
 import './CompanionCard.css';
 
 function CompanionCard({ companion }) {
@@ -26,7 +27,13 @@ function CompanionCard({ companion }) {
     <div className="companion-card">
       <div className="companion-image">
         {companion.image_url ? (
-          <img src={companion.image_url} alt={companion.name} />
+          // Uploaded images have a small thumbnail; fall back to the full image for external URLs
+          <img
+            src={mediaUrl(companion.thumbnail_url || companion.image_url)}
+            alt={companion.name}
+            loading="lazy"
+            decoding="async"
+          />
         ) : (
           <div className="placeholder-image">
             <span>{companion.name?.charAt(0)}</span>
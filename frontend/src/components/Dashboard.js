@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { getBookings, getAllBookings, approveBooking, rejectBooking, deleteBooking, createCompanion, updateCompanion } from '../api';
+import { getDashboard, getBookings, getAllBookings, exportBookings, approveBooking, rejectBooking, moderateBookings, deleteBooking, createCompanion, updateCompanion, uploadCompanionImage, mediaUrl } from '../api';
 import axios from 'axios';
 import ChatWindow from './ChatWindow';
 import './Dashboard.css';
@@ -8,6 +8,10 @@ import './Dashboard.css';
 function Dashboard() {
   const [user, setUser] = useState(null);
   const [bookings, setBookings] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [selectedIds, setSelectedIds] = useState([]);
+  const [moderating, setModerating] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [companionProfile, setCompanionProfile] = useState(null);
@@ -17,6 +21,7 @@ function Dashboard() {
     availability: true
   });
   const [isEditing, setIsEditing] = useState(false);
+  const [uploadingImage, setUploadingImage] = useState(false);
   const [activeChatBookingId, setActiveChatBookingId] = useState(null);
   const [activeSection, setActiveSection] = useState('dashboard');
   const navigate = useNavigate();
@@ -26,26 +31,44 @@ function Dashboard() {
     if (userData) {
       const parsedUser = JSON.parse(userData);
       setUser(parsedUser);
-      fetchBookings(parsedUser.role);
-      if (parsedUser.role === 'companion') {
-        fetchCompanionProfile();
-      }
+      fetchDashboard();
     }
   }, []);
 
+  // Bookings and the companion profile arrive together on first load
+  const fetchDashboard = async () => {
+    try {
+      const response = await getDashboard();
+      setBookings(response.data.bookings);
+      setNextCursor(response.data.next_cursor || null);
+      setSelectedIds([]);
+      if (response.data.companion) {
+        showCompanionProfile(response.data.companion);
+      }
+    } catch (err) {
+      setError('Failed to load bookings');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const showCompanionProfile = (companion) => {
+    setCompanionProfile(companion);
+    setCompanionForm({
+      bio: companion.bio || '',
+      image_url: companion.image_url || '',
+      availability: companion.availability
+    });
+    setIsEditing(true);
+  };
+
   const fetchCompanionProfile = async () => {
     try {
       const token = sessionStorage.getItem('token');
       const response = await axios.get('http://localhost:5000/api/companions/my-profile', {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setCompanionProfile(response.data.companion);
-      setCompanionForm({
-        bio: response.data.companion.bio || '',
-        image_url: response.data.companion.image_url || '',
-        availability: response.data.companion.availability
-      });
-      setIsEditing(true);
+      showCompanionProfile(response.data.companion);
     } catch (err) {
       // Profile doesn't exist yet
       console.log('No companion profile found');
@@ -56,6 +79,8 @@ function Dashboard() {
     try {
       const response = role === 'admin' ? await getAllBookings() : await getBookings();
       setBookings(response.data.bookings);
+      setNextCursor(response.data.next_cursor || null);
+      setSelectedIds([]);
     } catch (err) {
       setError('Failed to load bookings');
     } finally {
@@ -63,27 +88,93 @@ function Dashboard() {
     }
   };
 
+  // Admins page through all bookings, newest first
+  const fetchMoreBookings = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const response = await getAllBookings({ cursor: nextCursor });
+      setBookings((current) => [...current, ...response.data.bookings]);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      setError('Failed to load more bookings');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const handleExport = async () => {
+    try {
+      const response = await exportBookings({ format: 'csv' });
+      const url = window.URL.createObjectURL(response.data);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = 'bookings.csv';
+      link.click();
+      window.URL.revokeObjectURL(url);
+    } catch (err) {
+      alert('Failed to export bookings');
+    }
+  };
+
   const handleLogout = () => {
     sessionStorage.removeItem('token');
     sessionStorage.removeItem('user');
     navigate('/');
   };
 
+  // Swap in the booking returned by approve/reject instead of refetching the list
+  const replaceBooking = (updated) => {
+    setBookings((current) => current.map(booking => booking.id === updated.id ? updated : booking));
+    setSelectedIds((current) => current.filter(id => id !== updated.id));
+  };
+
   const handleApprove = async (bookingId) => {
     try {
-      await approveBooking(bookingId);
-      fetchBookings(user.role);
+      const response = await approveBooking(bookingId);
+      replaceBooking(response.data.booking);
     } catch (err) {
-      alert('Failed to approve booking');
+      alert(err.response?.data?.error || 'Failed to approve booking');
     }
   };
 
   const handleReject = async (bookingId) => {
     try {
-      await rejectBooking(bookingId);
+      const response = await rejectBooking(bookingId);
+      replaceBooking(response.data.booking);
+    } catch (err) {
+      alert(err.response?.data?.error || 'Failed to reject booking');
+    }
+  };
+
+  const pendingIds = bookings.filter(booking => booking.status === 'pending').map(booking => booking.id);
+  const allPendingSelected = pendingIds.length > 0 && pendingIds.every(id => selectedIds.includes(id));
+
+  const toggleSelected = (bookingId) => {
+    setSelectedIds((current) => current.includes(bookingId)
+      ? current.filter(id => id !== bookingId)
+      : [...current, bookingId]);
+  };
+
+  const toggleSelectAllPending = () => {
+    setSelectedIds(allPendingSelected ? [] : pendingIds);
+  };
+
+  // Approve or reject every selected booking in one request
+  const handleBulk = async (action) => {
+    if (selectedIds.length === 0 || moderating) return;
+    setModerating(true);
+    try {
+      const response = await moderateBookings(action, selectedIds);
+      const unchanged = response.data.results.filter(r => r.result === 'skipped' || r.result === 'not_found');
+      if (unchanged.length > 0) {
+        alert(`${response.data.updated} bookings updated, ${unchanged.length} skipped (already handled or removed)`);
+      }
       fetchBookings(user.role);
     } catch (err) {
-      alert('Failed to reject booking');
+      alert(`Failed to ${action} bookings`);
+    } finally {
+      setModerating(false);
     }
   };
 
@@ -91,7 +182,8 @@ function Dashboard() {
     if (window.confirm('Are you sure you want to cancel this booking?')) {
       try {
         await deleteBooking(bookingId);
-        fetchBookings(user.role);
+        setBookings((current) => current.filter(booking => booking.id !== bookingId));
+        setSelectedIds((current) => current.filter(id => id !== bookingId));
       } catch (err) {
         alert('Failed to delete booking');
       }
@@ -106,8 +198,11 @@ function Dashboard() {
         await updateCompanion(companionProfile.id, companionForm);
         alert('Companion profile updated successfully!');
       } else {
-        // Create new profile
-        await createCompanion(companionForm);
+        // Create new profile; the response carries a token with the new companion_id
+        const response = await createCompanion(companionForm);
+        if (response.data.token) {
+          sessionStorage.setItem('token', response.data.token);
+        }
         alert('Companion profile created successfully!');
         setIsEditing(true);
       }
@@ -119,6 +214,22 @@ function Dashboard() {
     }
   };
 
+  // Upload a picture file; the server stores it with resized variants
+  const handleImageUpload = async (e) => {
+    const file = e.target.files[0];
+    e.target.value = '';
+    if (!file || !companionProfile) return;
+    setUploadingImage(true);
+    try {
+      const response = await uploadCompanionImage(companionProfile.id, file);
+      showCompanionProfile(response.data.companion);
+    } catch (err) {
+      alert(err.response?.data?.error || 'Failed to upload image');
+    } finally {
+      setUploadingImage(false);
+    }
+  };
+
   const handleCompanionChange = (e) => {
     const value = e.target.type === 'checkbox' ? e.target.checked : e.target.value;
     setCompanionForm({
@@ -209,6 +320,36 @@ function Dashboard() {
             </div>
             <div className="bookings-section">
               <h3>{user?.role === 'admin' ? 'All Bookings' : 'My Bookings'}</h3>
+              {user?.role === 'admin' && (
+                <div className="bulk-actions">
+                  <button onClick={handleExport} className="btn-secondary">
+                    Export CSV
+                  </button>
+                  <label>
+                    <input
+                      type="checkbox"
+                      checked={allPendingSelected}
+                      onChange={toggleSelectAllPending}
+                      disabled={pendingIds.length === 0}
+                    />
+                    Select all pending ({pendingIds.length})
+                  </label>
+                  <button
+                    onClick={() => handleBulk('approve')}
+                    disabled={selectedIds.length === 0 || moderating}
+                    className="btn-approve"
+                  >
+                    Approve selected ({selectedIds.length})
+                  </button>
+                  <button
+                    onClick={() => handleBulk('reject')}
+                    disabled={selectedIds.length === 0 || moderating}
+                    className="btn-reject"
+                  >
+                    Reject selected
+                  </button>
+                </div>
+              )}
               {bookings.length === 0 ? (
                 <p>No bookings found.</p>
               ) : (
@@ -216,7 +357,17 @@ function Dashboard() {
                   {bookings.map(booking => (
                     <div key={booking.id} className={`booking-card status-${booking.status}`}>
                       <div className="booking-info">
-                        <h4>Booking #{booking.id}</h4>
+                        <h4>
+                          {user?.role === 'admin' && booking.status === 'pending' && (
+                            <input
+                              type="checkbox"
+                              className="booking-select"
+                              checked={selectedIds.includes(booking.id)}
+                              onChange={() => toggleSelected(booking.id)}
+                            />
+                          )}
+                          Booking #{booking.id}
+                        </h4>
                         <p><strong>User:</strong> {booking.user_name}</p>
                         <p><strong>Companion:</strong> {booking.companion_name}</p>
                         <p><strong>Date:</strong> {new Date(booking.date).toLocaleString()}</p>
@@ -253,6 +404,11 @@ function Dashboard() {
                   ))}
                 </div>
               )}
+              {nextCursor && (
+                <button onClick={fetchMoreBookings} disabled={loadingMore} className="btn-secondary">
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              )}
             </div>
           </>
         )}
@@ -273,7 +429,7 @@ function Dashboard() {
                   <p className="pricing-info">💰 All sessions are 15 minutes at ₹299</p>
                   {companionProfile.image_url && (
                     <div className="profile-image-preview">
-                      <img src={companionProfile.image_url} alt="Profile" />
+                      <img src={mediaUrl(companionProfile.image_url)} alt="Profile" />
                     </div>
                   )}
                 </div>
@@ -299,7 +455,7 @@ function Dashboard() {
                 <div className="form-group">
                   <label>Image URL</label>
                   <input
-                    type="url"
+                    type="text"
                     name="image_url"
                     value={companionForm.image_url}
                     onChange={handleCompanionChange}
@@ -307,6 +463,19 @@ function Dashboard() {
                   />
                 </div>
 
+                {companionProfile && (
+                  <div className="form-group">
+                    <label>Or upload a picture</label>
+                    <input
+                      type="file"
+                      accept="image/jpeg,image/png,image/webp,image/gif"
+                      onChange={handleImageUpload}
+                      disabled={uploadingImage}
+                    />
+                    {uploadingImage && <small>Uploading...</small>}
+                  </div>
+                )}
+
                 <div className="form-group checkbox-group">
                   <label>
                     <input
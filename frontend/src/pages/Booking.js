@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { getCompanion } from '../api';
+import { getCompanion, mediaUrl } from '../api';
 import BookingForm from '../components/BookingForm';
 import './Pages.css';
 
@@ -54,7 +54,7 @@ function Booking() {
         <div className="companion-preview">
           <h2>Booking Companion</h2>
           {companion.image_url ? (
-            <img src={companion.image_url} alt={companion.name} className="companion-preview-image" />
+            <img src={mediaUrl(companion.image_url)} alt={companion.name} className="companion-preview-image" />
           ) : (
             <div className="companion-preview-placeholder">
               <span>{companion.name?.charAt(0)}</span>
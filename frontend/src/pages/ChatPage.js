@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import axios from 'axios';
+import { getDashboard } from '../api';
 import ChatWindow from '../components/ChatWindow';
 import './ChatPage.css';
 
@@ -20,22 +20,14 @@ function ChatPage() {
 
     const parsedUser = JSON.parse(userData);
     setUser(parsedUser);
-    fetchApprovedBookings(parsedUser.role);
+    fetchApprovedBookings();
   }, [navigate]);
 
-  const fetchApprovedBookings = async (role) => {
+  const fetchApprovedBookings = async () => {
     try {
-      const token = sessionStorage.getItem('token');
-      const response = role === 'admin'
-        ? await axios.get('http://localhost:5000/api/bookings/all', {
-            headers: { Authorization: `Bearer ${token}` }
-          })
-        : await axios.get('http://localhost:5000/api/bookings', {
-            headers: { Authorization: `Bearer ${token}` }
-          });
-
-      // Filter only approved bookings
-      const approvedBookings = response.data.bookings.filter(booking => booking.status === 'approved');
+      // Approved bookings whose chat is still open
+      const response = await getDashboard({ limit: 1 });
+      const approvedBookings = response.data.active_chats;
       setBookings(approvedBookings);
 
       // Auto-select first chat if available
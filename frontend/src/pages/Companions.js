@@ -1,17 +1,29 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { getCompanions } from '../api';
+import { getCompanions, getCompanionCities } from '../api';
 import CompanionCard from '../components/CompanionCard';
+import { getStates, getDistricts } from '../data/indiaStates';
 import './Pages.css';
 
 function Companions() {
   const [companions, setCompanions] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
-  const [filter, setFilter] = useState({ state: '', district: '', minPrice: '', maxPrice: '' });
+  const [filter, setFilter] = useState({ state: '', district: '', minPrice: '', maxPrice: '', sort: 'rating' });
   const [user, setUser] = useState(null);
+  const [ready, setReady] = useState(false);
+  const [locations, setLocations] = useState(null);
   const navigate = useNavigate();
 
+  // States and districts that have available companions, with their counts
+  useEffect(() => {
+    getCompanionCities()
+      .then((response) => setLocations(response.data.states))
+      .catch(() => setLocations(null));
+  }, []);
+
   useEffect(() => {
     // Get user info
     const userData = sessionStorage.getItem('user');
@@ -26,14 +38,35 @@ function Companions() {
         return;
       }
     }
-
-    fetchCompanions();
+    setReady(true);
   }, [navigate]);
 
+  // Refetch the first page whenever the filters change (price inputs are debounced)
+  useEffect(() => {
+    if (!ready) return undefined;
+    const timer = setTimeout(() => fetchCompanions(), 300);
+    return () => clearTimeout(timer);
+  }, [ready, filter]);
+
+  // Filtering, interest matching and paging all happen on the server
+  const buildParams = (cursor) => {
+    const params = { sort: filter.sort };
+    if (filter.state) params.state = filter.state;
+    if (filter.district) params.district = filter.district;
+    if (filter.minPrice) params.min_price = filter.minPrice;
+    if (filter.maxPrice) params.max_price = filter.maxPrice;
+    if (user?.interests) params.interests = user.interests;
+    if (cursor) params.cursor = cursor;
+    return params;
+  };
+
   const fetchCompanions = async () => {
+    setLoading(true);
     try {
-      const response = await getCompanions();
+      const response = await getCompanions(buildParams());
       setCompanions(response.data.companions);
+      setNextCursor(response.data.next_cursor);
+      setError('');
     } catch (err) {
       setError('Failed to load companions');
     } finally {
@@ -41,35 +74,29 @@ function Companions() {
     }
   };
 
-  const filteredCompanions = companions.filter(companion => {
-    // Filter by state
-    if (filter.state && !companion.state?.toLowerCase().includes(filter.state.toLowerCase())) {
-      return false;
-    }
-    // Filter by district
-    if (filter.district && !companion.district?.toLowerCase().includes(filter.district.toLowerCase())) {
-      return false;
-    }
-    // Filter by min price
-    if (filter.minPrice && companion.price_per_hour < parseFloat(filter.minPrice)) {
-      return false;
-    }
-    // Filter by max price
-    if (filter.maxPrice && companion.price_per_hour > parseFloat(filter.maxPrice)) {
-      return false;
+  const fetchMoreCompanions = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const response = await getCompanions(buildParams(nextCursor));
+      setCompanions((current) => [...current, ...response.data.companions]);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      setError('Failed to load more companions');
+    } finally {
+      setLoadingMore(false);
     }
-    return true;
-  });
-
-  // Filter companions by user interests if logged in
-  const interestFilteredCompanions = user?.interests 
-    ? filteredCompanions.filter(companion => {
-        if (!companion.interests) return true;
-        const userInterests = user.interests.split(',').map(i => i.trim().toLowerCase());
-        const companionInterests = companion.interests.split(',').map(i => i.trim().toLowerCase());
-        return userInterests.some(interest => companionInterests.includes(interest));
-      })
-    : filteredCompanions;
+  };
+
+  // Fall back to the static list (without counts) if the counts can't be loaded
+  const states = locations
+    ? locations.map(({ state, count }) => ({ name: state, count }))
+    : getStates().map((name) => ({ name }));
+  const selectedState = locations && locations.find(({ state }) => state === filter.state);
+  const districts = !filter.state ? [] : locations
+    ? (selectedState ? selectedState.districts.map(({ district, count }) => ({ name: district, count })) : [])
+    : getDistricts(filter.state).map((name) => ({ name }));
+  const withCount = ({ name, count }) => (count === undefined ? name : `${name} (${count})`);
 
   return (
     <>
@@ -95,20 +122,27 @@ function Companions() {
       </div>
 
       <div className="filters-section">
-        <input
-          type="text"
-          placeholder="Filter by state"
+        <select
           value={filter.state}
-          onChange={(e) => setFilter({ ...filter, state: e.target.value })}
+          onChange={(e) => setFilter({ ...filter, state: e.target.value, district: '' })}
           className="filter-input"
-        />
-        <input
-          type="text"
-          placeholder="Filter by district"
+        >
+          <option value="">All states</option>
+          {states.map(state => (
+            <option key={state.name} value={state.name}>{withCount(state)}</option>
+          ))}
+        </select>
+        <select
           value={filter.district}
           onChange={(e) => setFilter({ ...filter, district: e.target.value })}
           className="filter-input"
-        />
+          disabled={!filter.state}
+        >
+          <option value="">All districts</option>
+          {districts.map(district => (
+            <option key={district.name} value={district.name}>{withCount(district)}</option>
+          ))}
+        </select>
         <input
           type="number"
           placeholder="Min price"
@@ -123,20 +157,36 @@ function Companions() {
           onChange={(e) => setFilter({ ...filter, maxPrice: e.target.value })}
           className="filter-input"
         />
+        <select
+          value={filter.sort}
+          onChange={(e) => setFilter({ ...filter, sort: e.target.value })}
+          className="filter-input"
+        >
+          <option value="rating">Top rated</option>
+          <option value="newest">Newest</option>
+        </select>
       </div>
 
       {loading && <div className="loading">Loading companions...</div>}
       {error && <div className="error-message">{error}</div>}
 
       <div className="companions-grid">
-        {interestFilteredCompanions.length === 0 ? (
+        {!loading && companions.length === 0 ? (
           <p className="no-companions">No companions found matching your criteria.</p>
         ) : (
-          interestFilteredCompanions.map(companion => (
+          companions.map(companion => (
             <CompanionCard key={companion.id} companion={companion} />
           ))
         )}
       </div>
+
+      {nextCursor && (
+        <div className="load-more">
+          <button onClick={fetchMoreCompanions} disabled={loadingMore} className="btn-secondary">
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
     </div>
   <footer className="footer">
         <p>&copy; 2025 BondMate. All rights reserved.</p>